@@ -0,0 +1,265 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import time
+import argparse
+import tempfile
+import joblib
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_corpus import generate_corpus
+from scripts.pipeline import fresh_process_executor
+
+# Generated corpora are cached here, one file per size and seed
+BENCHMARK_CORPUS_DIR = os.getenv('BENCHMARK_CORPUS_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '.corpus')))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+SCALES = {'10k': 10000, '100k': 100000, '1m': 1000000}
+
+# Largest slowdown (or memory growth) over the baseline before a benchmark counts as a regression
+TOLERANCE = 0.5
+
+
+def corpus_path(n_articles, seed=0):
+    """
+    Path of the cached synthetic corpus of this size, generating it on first use.
+    """
+    path = os.path.join(BENCHMARK_CORPUS_DIR, f'corpus-{n_articles}-{seed}.joblib')
+    if not os.path.exists(path):
+        os.makedirs(BENCHMARK_CORPUS_DIR, exist_ok=True)
+        joblib.dump(generate_corpus(n_articles, seed=seed), path + '.tmp')
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def _clean(frames):
+    from scripts.helper import clean_data
+    return clean_data(frames['data'].copy()), clean_data(frames['domains_location'].copy())
+
+
+def _tfidf(data):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from scripts.feature_store import FEATURE_SPECS, build_text
+    return TfidfVectorizer(**FEATURE_SPECS['tfidf']['params']).fit_transform(build_text(data))
+
+
+# Setup functions (untimed) prepare the arguments of the timed functions
+def setup_clean_data(frames):
+    return [frames['data'].copy()]
+
+def run_clean_data(data):
+    from scripts.helper import clean_data
+    return clean_data(data)
+
+def setup_mention_counts(frames):
+    return list(_clean(frames))
+
+def run_country_counts(data, domains_location):
+    from scripts.helper import analyze_country_article_counts
+    return analyze_country_article_counts(data, domains_location)
+
+def run_region_counts(data, domains_location):
+    from scripts.helper import analyze_region_article_counts
+    return analyze_region_article_counts(data, domains_location)
+
+def setup_cleaned_data(frames):
+    return [_clean(frames)[0]]
+
+def run_extract_keywords_tfidf(data):
+    from scripts.topic_and_event_modeling import extract_keywords_tfidf
+    return extract_keywords_tfidf(data['full_content'], n=5)
+
+def run_lda(data):
+    from scripts.topic_and_event_modeling import perform_topic_modeling_by_lda
+    return perform_topic_modeling_by_lda(data, n_topics=10)
+
+def run_tfidf(data):
+    return _tfidf(data)
+
+def setup_tfidf(frames):
+    return [_tfidf(_clean(frames)[0])]
+
+def run_kmeans_events(tfidf_matrix):
+    from sklearn.cluster import KMeans
+    return KMeans(n_clusters=10, random_state=42).fit(tfidf_matrix).labels_
+
+def setup_dashboard(frames):
+    from scripts.helper import clean_data
+    from scripts.article_frame import compact_articles
+    data, domains_location = _clean(frames)
+    # The dashboard keeps the articles in their compact form
+    return [compact_articles(data), domains_location, clean_data(frames['rating'].copy()), clean_data(frames['traffic'].copy())]
+
+def run_dashboard_aggregations(data, domains_location, rating, traffic):
+    # The aggregations behind the Tabular and Graphical pages (files mode)
+    from src.data_loader import get_top_articles, get_top_traffic
+    from scripts.plot_summaries import length_summaries
+    from scripts.sentiment_stats import sentiment_counts, sentiment_statistics
+    from scripts.source_dimension import SourceDimension
+    sources = SourceDimension(domains_location, traffic)
+    stats = sentiment_statistics(sentiment_counts(rating)).reset_index()
+    ranked = stats.assign(GlobalRank=sources.lookup(stats['source_name'])['GlobalRank'].to_numpy()).dropna(subset=['GlobalRank'])
+    volume = sources.counts_by(data['source_name'], 'Country')
+    return get_top_articles(data), get_top_traffic(traffic), ranked, length_summaries(data), volume
+
+def setup_db_load(frames):
+    from sqlalchemy import create_engine
+    from src.db.db_config import Base
+    import src.db.models  # noqa: F401 (registers the tables)
+    data = _clean(frames)[0].reset_index(drop=True)
+    data = data.assign(title_sentiment=frames['rating']['title_sentiment'].to_numpy()[:len(data)],
+                       topic=data['article_id'] * 7 % 10, cluster=data['article_id'] % 10, event_description='event')
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'news.db')}")
+    Base.metadata.create_all(bind=engine)
+    return [data, _tfidf(data), [[f'word{i}'] for i in range(10)], engine]
+
+def run_db_load(data, tfidf_matrix, topics, engine):
+    from src.db.loader import load_articles
+    return load_articles(data, tfidf_matrix, topics, engine=engine, verbose=False)
+
+def _similar_article_index(data):
+    from scripts.similar_articles import SimilarArticleIndex
+    from scripts.feature_store import build_text
+    index = SimilarArticleIndex()
+    index.add(data['article_id'], build_text(data))
+    return index
+
+def setup_similar_articles(frames):
+    index = _similar_article_index(_clean(frames)[0])
+    return [index, index.article_ids[::max(len(index) // 200, 1)][:200]]
+
+def run_similar_articles(index, article_ids):
+    # 200 "more like this" queries against the approximate index
+    return [index.similar(article_id, k=10) for article_id in article_ids]
+
+
+# Benchmark name: (setup, timed function)
+BENCHMARKS = {
+    'clean_data': (setup_clean_data, run_clean_data),
+    'country_counts': (setup_mention_counts, run_country_counts),
+    'region_counts': (setup_mention_counts, run_region_counts),
+    'extract_keywords_tfidf': (setup_cleaned_data, run_extract_keywords_tfidf),
+    'lda_topics': (setup_cleaned_data, run_lda),
+    'tfidf_features': (setup_cleaned_data, run_tfidf),
+    'kmeans_events': (setup_tfidf, run_kmeans_events),
+    'dashboard_aggregations': (setup_dashboard, run_dashboard_aggregations),
+    'db_load': (setup_db_load, run_db_load),
+    'similar_articles': (setup_similar_articles, run_similar_articles),
+}
+
+
+def _memory_mb(field):
+    # Resident (VmRSS) or peak resident (VmHWM) memory of this process
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def _run_benchmark(name, path):
+    # Run one benchmark in a fresh worker process
+    setup, run = BENCHMARKS[name]
+    arguments = setup(joblib.load(path))
+    before = _memory_mb('VmRSS')
+    # Reset the peak RSS so that it only covers the timed call (Linux)
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    started = time.perf_counter()
+    run(*arguments)
+    seconds = time.perf_counter() - started
+    return {'benchmark': name, 'seconds': seconds, 'peak_memory_mb': max(_memory_mb('VmHWM') - before, 0.0)}
+
+
+def run_benchmarks(n_articles, names=None):
+    """
+    Time every benchmark on a synthetic corpus of `n_articles` articles.
+
+    Every benchmark runs in a fresh process: its setup (cleaning, vectorizing, ...) is not timed,
+    and its memory is the peak resident memory during the timed call above the memory before it.
+
+    Returns:
+    - results (DataFrame): 'benchmark', 'seconds' and 'peak_memory_mb'.
+    """
+    path = corpus_path(n_articles)
+    rows = []
+    for name in names or list(BENCHMARKS):
+        with fresh_process_executor(1) as executor:
+            rows.append(executor.submit(_run_benchmark, name, path).result())
+    return pd.DataFrame(rows, columns=['benchmark', 'seconds', 'peak_memory_mb'])
+
+
+def similar_articles_recall(n_articles, k=10, n_queries=200):
+    """
+    Recall at k and mean query times of the similar-article index against brute force, on the
+    synthetic corpus of this size (see scripts/similar_articles.evaluate_recall).
+    """
+    from scripts.similar_articles import evaluate_recall
+    return evaluate_recall(_similar_article_index(_clean(joblib.load(corpus_path(n_articles)))[0]), k=k, n_queries=n_queries)
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Compare benchmark results with baseline results of the same scale.
+
+    Returns:
+    - comparison (DataFrame): The results with the baseline values, their ratios to the baseline,
+      'regression' (slower or more memory than the baseline by more than `tolerance`) and 'status'
+      ('ok', 'regression', or 'no baseline' for benchmarks the baseline of the scale lacks).
+    """
+    # A scale or benchmark without a baseline has missing baseline values, never a regression
+    base = (pd.DataFrame.from_dict(baseline, orient='index')
+            .reindex(index=results['benchmark'], columns=['seconds', 'peak_memory_mb']).astype('float64'))
+    comparison = results.copy()
+    for column in ['seconds', 'peak_memory_mb']:
+        comparison[f'baseline_{column}'] = base[column].to_numpy()
+        comparison[f'{column}_ratio'] = comparison[column] / comparison[f'baseline_{column}']
+    # Differences of a few milliseconds or megabytes are noise
+    time_regression = (comparison['seconds_ratio'] > 1 + tolerance) & (comparison['seconds'] - comparison['baseline_seconds'] > 0.1)
+    memory_regression = (comparison['peak_memory_mb_ratio'] > 1 + tolerance) & (comparison['peak_memory_mb'] - comparison['baseline_peak_memory_mb'] > 16)
+    comparison['regression'] = time_regression | memory_regression
+    comparison['status'] = np.where(base['seconds'].isna().to_numpy(), 'no baseline',
+                                    np.where(comparison['regression'], 'regression', 'ok'))
+    return comparison
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time the analysis code on a synthetic corpus and compare it with the baseline.")
+    parser.add_argument('--scale', choices=list(SCALES), default='10k')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Run only these benchmarks.")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the baseline of the scale.")
+    parser.add_argument('--recall', action='store_true', help="Only report the recall of the similar-article index against brute force.")
+    args = parser.parse_args()
+
+    if args.recall:
+        print(json.dumps(similar_articles_recall(SCALES[args.scale]), indent=1))
+        sys.exit(0)
+
+    results = run_benchmarks(SCALES[args.scale], args.only)
+    baseline = load_baseline()
+    if args.update_baseline:
+        baseline.setdefault(args.scale, {}).update(results.set_index('benchmark').round(4).to_dict(orient='index'))
+        save_baseline(baseline)
+        print(results.to_string(index=False))
+        sys.exit(0)
+    comparison = compare(results, baseline.get(args.scale, {}), args.tolerance)
+    print(comparison.to_string(index=False, float_format='%.3f'))
+    # A non-zero exit status flags a regression
+    sys.exit(1 if comparison['regression'].any() else 0)
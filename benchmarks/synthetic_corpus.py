@@ -0,0 +1,174 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Countries (name and location code) the sources are located in and the articles mention
+COUNTRIES = [
+    ('United States', 'US'), ('United Kingdom', 'GB'), ('India', 'IN'), ('Germany', 'DE'), ('France', 'FR'),
+    ('Canada', 'CA'), ('Australia', 'AU'), ('Nigeria', 'NG'), ('Kenya', 'KE'), ('South Africa', 'ZA'),
+    ('Egypt', 'EG'), ('Ghana', 'GH'), ('Ethiopia', 'ET'), ('Qatar', 'QA'), ('Israel', 'IL'),
+    ('Saudi Arabia', 'SA'), ('United Arab Emirates', 'AE'), ('Italy', 'IT'), ('Spain', 'ES'), ('Poland', 'PL'),
+    ('Netherlands', 'NL'), ('Ireland', 'IE'), ('Japan', 'JP'), ('China', 'CN'), ('Russia', 'RU'),
+    ('Ukraine', 'UA'), ('Brazil', 'BR'), ('Mexico', 'MX'), ('Pakistan', 'PK'), ('Niger', 'NE'),
+]
+
+# Words of every topic; articles mix the words of their topic with background words
+TOPIC_WORDS = {
+    'politics': 'election vote parliament minister president campaign policy government opposition coalition',
+    'economy': 'market inflation bank stocks trade growth prices investors currency recession',
+    'conflict': 'war troops ceasefire attack military border missile peace talks sanctions',
+    'sport': 'football match league coach goal championship players season tournament final',
+    'health': 'vaccine hospital virus patients doctors health outbreak disease treatment care',
+    'climate': 'climate emissions energy floods drought heatwave renewable carbon storm weather',
+    'technology': 'technology software startup data privacy chips smartphone internet artificial intelligence',
+    'crime': 'police court trial arrested judge prison charges investigation fraud lawyer',
+}
+CATEGORIES = list(TOPIC_WORDS)
+SENTIMENT_LABELS = ['Negative', 'Neutral', 'Positive']
+
+
+def _vocabulary(size, rng):
+    # Pronounceable background words, used with Zipf-distributed frequencies
+    syllables = np.array(['ba', 'de', 'ki', 'lo', 'mu', 'na', 'po', 're', 'si', 'ta', 'vu', 'zo', 'an', 'el', 'or'])
+    lengths = rng.integers(2, 5, size)
+    return np.array([''.join(rng.choice(syllables, length)) for length in lengths])
+
+
+def _join_words(words, lengths):
+    # One string per document from a flat word array and the number of words of every document
+    ends = np.cumsum(lengths)
+    return [' '.join(words[end - length:end]) for end, length in zip(ends.tolist(), lengths.tolist())]
+
+
+def _documents(rng, lengths, topics, vocabulary, topic_share, mention_rate=0.0, chunksize=50000):
+    # Documents of the given lengths (in words), generated in chunks of articles to bound memory:
+    # Zipf-distributed background words, a share of topic words and optionally one country mention
+    word_weights = 1 / np.arange(1, len(vocabulary) + 1)
+    word_weights /= word_weights.sum()
+    topic_vocabulary = [np.array(TOPIC_WORDS[category].split()) for category in CATEGORIES]
+    country_names = np.array([name for name, _ in COUNTRIES])
+    documents = []
+    for start in range(0, len(lengths), chunksize):
+        chunk_lengths, chunk_topics = lengths[start:start + chunksize], topics[start:start + chunksize]
+        words = rng.choice(vocabulary, int(chunk_lengths.sum()), p=word_weights).astype(object)
+        topic_positions = np.flatnonzero(rng.random(len(words)) < topic_share)
+        word_topics = np.repeat(chunk_topics, chunk_lengths)[topic_positions]
+        for topic, topic_words in enumerate(topic_vocabulary):
+            positions = topic_positions[word_topics == topic]
+            words[positions] = rng.choice(topic_words, len(positions))
+        mentions = np.flatnonzero(rng.random(len(chunk_lengths)) < mention_rate)
+        mention_positions = (np.cumsum(chunk_lengths)[mentions] - 1
+                             - (rng.random(len(mentions)) * chunk_lengths[mentions]).astype(np.int64))
+        words[mention_positions] = country_names[rng.integers(0, len(COUNTRIES), len(mentions))]
+        documents.extend(_join_words(words, chunk_lengths))
+    return np.array(documents, dtype=object)
+
+
+def generate_corpus(n_articles=10000, n_sources=None, mean_words=250, duplicate_rate=0.05, seed=0):
+    """
+    Generate a deterministic synthetic news corpus shaped like the project's datasets.
+
+    Article counts per source follow a Zipf-like distribution (a few large sites, a long tail),
+    content lengths are log-normal around `mean_words` words, titles have 5 to 15 words, and every
+    article belongs to a topic whose words it mixes with Zipf-distributed background words. Some
+    articles mention countries, and a share of them are syndicated copies of earlier articles.
+
+    Parameters:
+    - n_articles (int, optional): Number of articles.
+    - n_sources (int, optional): Number of news sites; grows with the corpus by default.
+    - mean_words (int, optional): Mean number of words of the full content.
+    - duplicate_rate (float, optional): Share of articles republishing an earlier article.
+    - seed (int, optional): Seed; the same arguments always give the same frames.
+
+    Returns:
+    - frames (dict): Raw (uncleaned) DataFrames 'data', 'domains_location', 'traffic' and 'rating',
+      with the columns of the CSV files under docs/data.
+    """
+    rng = np.random.default_rng(seed)
+    n_sources = n_sources or int(min(max(50, n_articles // 200), 5000))
+
+    # Sources, their location and their share of the articles
+    country_codes = rng.integers(0, len(COUNTRIES), n_sources)
+    sources = np.array([f'news{i}.{COUNTRIES[code][1].lower()}' for i, code in enumerate(country_codes)])
+    source_weights = 1 / np.arange(1, n_sources + 1) ** 1.1
+    source_codes = rng.choice(n_sources, n_articles, p=source_weights / source_weights.sum())
+
+    # Content: topic words and background words, log-normal lengths
+    vocabulary = _vocabulary(5000, rng)
+    topics = rng.integers(0, len(CATEGORIES), n_articles)
+    content_lengths = np.clip(rng.lognormal(np.log(mean_words) - 0.18, 0.6, n_articles).astype(np.int64), 20, 20 * mean_words)
+    full_content = _documents(rng, content_lengths, topics, vocabulary, topic_share=0.2, mention_rate=0.5)
+    title_lengths = rng.integers(5, 16, n_articles)
+    titles = _documents(rng, title_lengths, topics, vocabulary, topic_share=0.4)
+
+    # Syndicated copies: other sites republish an earlier article with a new title suffix
+    copies = np.flatnonzero(rng.random(n_articles) < duplicate_rate)
+    copies = copies[copies > 0]
+    originals = (rng.random(len(copies)) * copies).astype(np.int64)
+    full_content[copies] = full_content[originals]
+    titles[copies] = titles[originals] + ' - ' + sources[source_codes[copies]]
+    topics[copies] = topics[originals]
+
+    published_at = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 90 * 24 * 3600, n_articles), unit='s')
+    # Every source leans a little towards one sentiment
+    source_bias = rng.normal(0, 0.5, n_sources)
+    scores = source_bias[source_codes] + rng.normal(0, 1, n_articles)
+    sentiment = np.array(SENTIMENT_LABELS)[np.digitize(scores, [-0.5, 0.5])]
+
+    data = pd.DataFrame({
+        'article_id': np.arange(n_articles),
+        'source_id': source_codes,
+        'source_name': sources[source_codes],
+        'author': np.array([f'author{i}' for i in range(200)])[rng.integers(0, 200, n_articles)],
+        'title': titles,
+        'description': [title[:80] for title in titles],
+        'url': [f'https://{source}/article/{i}' for i, source in enumerate(sources[source_codes])],
+        'url_to_image': None,
+        'published_at': published_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'content': [content[:200] for content in full_content],
+        'category': np.array(CATEGORIES)[topics],
+        'full_content': full_content,
+    })
+    # A few missing values, as in the scraped data
+    data.loc[rng.random(n_articles) < 0.01, 'author'] = None
+
+    rating = pd.DataFrame({
+        'article_id': data['article_id'], 'source_name': data['source_name'], 'title': data['title'],
+        'published_at': data['published_at'], 'title_sentiment': sentiment, 'source_id': data['source_id'],
+    })
+
+    domains_location = pd.DataFrame({
+        'SourceCommonName': sources,
+        'location': [COUNTRIES[code][1] for code in country_codes],
+        'Country': [COUNTRIES[code][0] for code in country_codes],
+    })
+
+    # Traffic ranks of most sources (bigger sites rank higher) among other domains
+    ranked = np.flatnonzero(rng.random(n_sources) < 0.8)
+    n_other = 4 * n_sources
+    domains = np.concatenate([sources[ranked], [f'other{i}.com' for i in range(n_other)]])
+    ranks = rng.permutation(len(domains)) + 1
+    ranks[:len(ranked)] = np.sort(ranks[:len(ranked)])
+    traffic = pd.DataFrame({
+        'GlobalRank': ranks, 'TldRank': ranks, 'Domain': domains, 'TLD': [domain.rsplit('.', 1)[-1] for domain in domains],
+        'RefSubNets': rng.integers(1, 100000, len(domains)), 'RefIPs': rng.integers(1, 100000, len(domains)),
+        'IDN_Domain': domains, 'IDN_TLD': [domain.rsplit('.', 1)[-1] for domain in domains],
+        'PrevGlobalRank': ranks, 'PrevTldRank': ranks,
+        'PrevRefSubNets': rng.integers(1, 100000, len(domains)), 'PrevRefIPs': rng.integers(1, 100000, len(domains)),
+    })
+    return {'data': data, 'domains_location': domains_location, 'traffic': traffic, 'rating': rating}
+
+
+def write_corpus(directory, n_articles=10000, **kwargs):
+    """
+    Generate a synthetic corpus and write it as data.csv, domains_location.csv, traffic.csv and rating.csv.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, frame in generate_corpus(n_articles, **kwargs).items():
+        frame.to_csv(os.path.join(directory, f'{name}.csv'), index=False)
+
+
+if __name__ == '__main__':
+    # python benchmarks/synthetic_corpus.py <directory> [n_articles]
+    write_corpus(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
@@ -3,25 +3,16 @@ import sys
 # Adjust the Python path to include the src directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
 
-import papermill as pm
-from src.db.db_config import init_db
-import pandas as pd
+from scripts.pipeline import news_pipeline
 import subprocess
 
 def main():
-    # Initialize the database and create tables
-    print("Initializing database...")
-    init_db()
-    
-    print("Executing Jupyter notebook...")
-    notebook_path = 'notebooks/parse_news_data.ipynb'  # Update this with the path to your notebook
-    output_notebook_path = 'notebooks/parse_news_data_output.ipynb'
-    
-    # Run the notebook
-    pm.execute_notebook(
-        notebook_path,
-        output_notebook_path
-    )
+    # Clean, vectorize, model and load the data into the database. Stages whose inputs have not
+    # changed since the last run are skipped, and independent ones (LDA, K-Means) run concurrently
+    print("Running the news analysis pipeline...")
+    report = news_pipeline().run()
+    print(report.to_string(index=False))
+    print(f"Pipeline finished in {report.attrs['wall_seconds']:.1f}s")
 
     # Run the Streamlit dashboard
     print("Launching Streamlit dashboard...")
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Free-text columns, stored as Arrow strings: one contiguous buffer per column instead of a
+# Python object per value
+TEXT_COLUMNS = ['title', 'description', 'content', 'full_content', 'url', 'url_to_image']
+
+# Columns repeating a few distinct values, stored as categoricals: one small integer code per
+# row and a single copy of every distinct value
+CATEGORICAL_COLUMNS = ['source_id', 'source_name', 'author', 'category']
+
+ARROW_STRING = pd.StringDtype('pyarrow')
+
+
+def compact_articles(df, text_columns=TEXT_COLUMNS, categorical_columns=CATEGORICAL_COLUMNS):
+    """
+    Convert an article frame to its memory-lean columnar representation.
+
+    Text columns become Arrow-backed strings and repeated labels become categoricals; the values
+    themselves are unchanged (missing values become <NA>). Columns absent from `df` are skipped.
+    Group categorical columns with observed=True to skip the categories missing from a subset.
+
+    Parameters:
+    - df (DataFrame): Articles, e.g. the output of clean_data.
+    - text_columns (list of str, optional): Columns stored as Arrow strings.
+    - categorical_columns (list of str, optional): Columns stored as categoricals.
+
+    Returns:
+    - df (DataFrame): A new frame with the converted columns.
+    """
+    converted = {}
+    for col in categorical_columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Plain object categories keep merges and comparisons with string columns working as before
+            converted[col] = pd.Categorical(df[col].astype(object).where(df[col].notna(), None))
+    for col in text_columns:
+        if col in df.columns and col not in converted:
+            converted[col] = df[col].astype(ARROW_STRING)
+    return df.assign(**converted)
+
+
+def _arrow_strings(texts):
+    # Arrow string array of any string-like sequence (zero copy for Arrow-backed Series)
+    series = pd.Series(texts, copy=False)
+    if series.dtype != ARROW_STRING:
+        series = series.astype(ARROW_STRING)
+    return pa.array(series.array).cast(pa.large_string())
+
+
+def text_lengths(texts):
+    """
+    Number of characters of every text (0 for missing texts), computed natively on the Arrow buffer.
+    """
+    lengths = pc.fill_null(pc.utf8_length(_arrow_strings(texts)), 0)
+    return lengths.to_numpy(zero_copy_only=False).astype(np.int64)
+
+
+def text_word_counts(texts):
+    """
+    Number of whitespace-separated words of every text (0 for missing texts), like len(text.split()),
+    computed natively on the Arrow buffer.
+    """
+    trimmed = pc.utf8_trim_whitespace(_arrow_strings(texts))
+    counts = pc.list_value_length(pc.utf8_split_whitespace(trimmed))
+    # Splitting an empty string gives one empty word
+    counts = pc.if_else(pc.equal(pc.utf8_length(trimmed), 0), 0, counts)
+    return pc.fill_null(counts, 0).to_numpy(zero_copy_only=False).astype(np.int64)
+
+
+class ArticleText:
+    """
+    Lazy view of the text modeled by the topic and event models: title followed by the full content.
+
+    Iterating yields one string per article, joined chunk by chunk, so vectorizers can be fed
+    without materializing a concatenated text column next to the title and content.
+    The view can be iterated any number of times.
+
+    Parameters:
+    - df (DataFrame): Articles with the `columns`.
+    - columns (tuple of str, optional): Columns joined, in order.
+    - separator (str, optional): String between the columns.
+    - chunksize (int, optional): Number of articles joined at a time.
+    """
+
+    def __init__(self, df, columns=('title', 'full_content'), separator=' ', chunksize=10000):
+        self.columns = [df[col] for col in columns]
+        self.separator = separator
+        self.chunksize = chunksize
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def __iter__(self):
+        for start in range(0, len(self), self.chunksize):
+            arrays = [_arrow_strings(col.iloc[start:start + self.chunksize]) for col in self.columns]
+            # Missing parts count as empty strings, like a concatenation of filled columns
+            joined = pc.binary_join_element_wise(*arrays, pa.scalar(self.separator, pa.large_string()),
+                                                 null_handling='replace', null_replacement='')
+            yield from joined.to_pylist()
+
+    def to_series(self):
+        """
+        Materialize the view as a Series (e.g. for a small subset of articles).
+        """
+        return pd.Series(list(self), index=self.columns[0].index, dtype=object)
+
+
+def article_text(df):
+    """
+    Title followed by the full content of every article, as a lazy ArticleText view.
+    """
+    return ArticleText(df)
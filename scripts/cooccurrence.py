@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scripts.instrumentation import instrumented
+
+
+def event_source_matrix(event_labels, source_names):
+    """
+    Count the articles of every source per event as a sparse events x sources matrix.
+
+    Rows with a missing event or source are ignored.
+
+    Returns:
+    - counts (csr_matrix): float64 counts, one row per event and one column per source.
+    - events (Index): The event of every row (sorted).
+    - sources (Index): The source of every column (sorted).
+    """
+    event_codes, events = pd.factorize(pd.Series(event_labels), sort=True)
+    source_codes, sources = pd.factorize(pd.Series(source_names), sort=True)
+    keep = (event_codes >= 0) & (source_codes >= 0)
+    counts = sp.csr_matrix((np.ones(int(keep.sum())), (event_codes[keep], source_codes[keep])),
+                           shape=(len(events), len(sources)))
+    counts.sum_duplicates()
+    return counts, events, sources
+
+
+def _correlation_blocks(counts, block_size):
+    # Pearson correlation of the columns of `counts`, yielded as dense (block x sources) row blocks
+    n_rows, n_columns = counts.shape
+    counts = counts.tocsc()
+    means = np.asarray(counts.mean(axis=0)).ravel()
+    squares = np.asarray(counts.multiply(counts).sum(axis=0)).ravel()
+    # Columns without variance (e.g. a source in every event equally) have no defined correlation
+    std = np.sqrt(np.maximum(squares - n_rows * means ** 2, 0))
+    std[std == 0] = np.nan
+    counts_t = counts.T.tocsr()
+    for start in range(0, n_columns, block_size):
+        stop = min(start + block_size, n_columns)
+        products = (counts_t[start:stop] @ counts).toarray()
+        covariance = products - n_rows * np.outer(means[start:stop], means)
+        yield start, stop, covariance / np.outer(std[start:stop], std)
+
+
+@instrumented
+def source_correlations(event_labels, source_names, top_k=10, threshold=None, block_size=512, export_path=None):
+    """
+    Correlate news sites by the events they report, keeping only the strongest pairs.
+
+    Equivalent to `pivot_table(event x source, aggfunc='size').corr()`, but computed from the
+    sparse event x source counts in blocks of sources, so memory grows with the block size and
+    the number of returned pairs instead of with the square of the number of sources.
+
+    Parameters:
+    - event_labels (array-like): Event of every article.
+    - source_names (array-like): Source of every article.
+    - top_k (int, optional): Number of most correlated partners kept per source (None for all).
+    - threshold (float, optional): Only keep pairs with a correlation of at least this value.
+    - block_size (int, optional): Number of sources correlated per block.
+    - export_path (str, optional): Also write the full sources x sources matrix to this .npy file
+      (memory-mapped, written block by block); its rows and columns follow the sorted sources.
+
+    Returns:
+    - pairs (DataFrame): 'source_name', 'partner' and 'correlation', strongest partners first per source.
+    """
+    counts, _, sources = event_source_matrix(event_labels, source_names)
+    n_sources = len(sources)
+    exported = None
+    if export_path is not None:
+        exported = np.lib.format.open_memmap(export_path, mode='w+', dtype=np.float32, shape=(n_sources, n_sources))
+
+    rows, partners, values = [], [], []
+    for start, stop, block in _correlation_blocks(counts, block_size):
+        if exported is not None:
+            exported[start:stop] = block
+        # Never pair a source with itself; undefined correlations are dropped
+        block[np.arange(stop - start), np.arange(start, stop)] = np.nan
+        block = np.where(np.isnan(block), -np.inf, block)
+        if top_k is not None and top_k < n_sources - 1:
+            candidates = np.argpartition(-block, top_k - 1, axis=1)[:, :top_k]
+        else:
+            candidates = np.tile(np.arange(n_sources), (stop - start, 1))
+        candidate_values = np.take_along_axis(block, candidates, axis=1)
+        order = np.argsort(-candidate_values, axis=1, kind='stable')
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_values = np.take_along_axis(candidate_values, order, axis=1)
+        keep = np.isfinite(candidate_values)
+        if threshold is not None:
+            keep &= candidate_values >= threshold
+        row_ids = np.broadcast_to(np.arange(start, stop)[:, None], candidates.shape)
+        rows.append(row_ids[keep])
+        partners.append(candidates[keep])
+        values.append(candidate_values[keep])
+    if exported is not None:
+        exported.flush()
+
+    rows, partners, values = (np.concatenate(parts) if parts else np.empty(0, dtype=int) for parts in (rows, partners, values))
+    return pd.DataFrame({'source_name': sources[rows], 'partner': sources[partners], 'correlation': values.astype(float)})
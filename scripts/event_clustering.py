@@ -0,0 +1,197 @@
+import os
+import json
+import pickle
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+# Directory holding the persisted clustering state
+EVENT_STATE_DIR = os.getenv('EVENT_STATE_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models', 'events')))
+
+
+class IncrementalEventClusterer:
+    """
+    Assign continuously arriving articles to events without re-clustering the history.
+
+    The first batch fits the vectorizer and an initial MiniBatchKMeans. Every later batch is
+    transformed with that fixed vectorizer and each article joins its nearest event when the
+    cosine distance to the event centroid is within `distance_threshold`; otherwise it starts a
+    new event. Centroids are updated as running means, so a batch costs time proportional to its
+    size, and event ids never change once given out. Saving appends the labels of the new articles
+    as a shard next to the centroids, so it does not rewrite the label history either.
+
+    Parameters:
+    - n_initial_events (int, optional): Number of events found in the first batch.
+    - distance_threshold (float, optional): Largest cosine distance at which an article joins an event.
+    - vectorizer (TfidfVectorizer, optional): An unfitted vectorizer; the default matches the event TF-IDF.
+    - random_state (int, optional): Seed of the initial clustering.
+    """
+
+    def __init__(self, n_initial_events=10, distance_threshold=0.9, vectorizer=None, random_state=42):
+        self.n_initial_events = n_initial_events
+        self.distance_threshold = distance_threshold
+        self.random_state = random_state
+        self.vectorizer = vectorizer or TfidfVectorizer(max_df=0.8, min_df=2, stop_words='english', max_features=10000)
+        self.centroids = None
+        self.counts = None
+        self.labels_ = {}
+        # Articles labeled since the last save, and the directory and label shards of that save
+        self._unsaved = []
+        self._saved_path = None
+        self._n_shards = 0
+
+    @property
+    def n_events(self):
+        return 0 if self.centroids is None else self.centroids.shape[0]
+
+    def _fit_initial(self, texts):
+        try:
+            matrix = self.vectorizer.fit_transform(texts)
+        except ValueError:
+            # A small first batch may have no term within the document frequency limits (e.g. min_df=2
+            # with three articles): the bootstrap vocabulary then keeps every term
+            self.vectorizer.set_params(min_df=1, max_df=1.0)
+            matrix = self.vectorizer.fit_transform(texts)
+        n_clusters = min(self.n_initial_events, matrix.shape[0])
+        kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=self.random_state, n_init=3)
+        labels = kmeans.fit_predict(matrix)
+        self.counts = np.bincount(labels, minlength=n_clusters).astype(np.int64)
+        # Running means of the member vectors
+        indicator = sp.csr_matrix((np.ones(len(labels)), (labels, np.arange(len(labels)))), shape=(n_clusters, len(labels)))
+        sums = np.asarray((indicator @ matrix).todense())
+        self.centroids = sums / np.maximum(self.counts, 1)[:, None]
+        return labels
+
+    def _assign(self, matrix):
+        matrix = matrix.tocsr()
+        labels = np.empty(matrix.shape[0], dtype=np.int64)
+        similarities = matrix @ normalize(self.centroids).T
+        best = np.asarray(similarities.argmax(axis=1)).ravel()
+        best_distance = 1 - np.asarray(similarities[np.arange(matrix.shape[0]), best]).ravel()
+        # Articles without any known term cannot open a meaningful event and join the nearest one
+        empty = np.diff(matrix.indptr) == 0
+        joined = (best_distance <= self.distance_threshold) | empty
+        labels[joined] = best[joined]
+
+        # Articles far from every event open new ones, which later articles of the batch may join
+        new_centroids = []
+        for row in np.flatnonzero(~joined):
+            vector = matrix[row].toarray().ravel()
+            if new_centroids:
+                new_similarities = normalize(np.vstack(new_centroids)) @ vector
+                nearest = int(new_similarities.argmax())
+                if 1 - new_similarities[nearest] <= self.distance_threshold:
+                    labels[row] = self.n_events + nearest
+                    continue
+            new_centroids.append(vector)
+            labels[row] = self.n_events + len(new_centroids) - 1
+
+        n_events = self.n_events + len(new_centroids)
+        if new_centroids:
+            self.centroids = np.vstack([self.centroids] + [np.zeros((len(new_centroids), self.centroids.shape[1]))])
+            self.counts = np.concatenate([self.counts, np.zeros(len(new_centroids), dtype=np.int64)])
+
+        # Running mean update of every event that received articles
+        batch_counts = np.bincount(labels, minlength=n_events)
+        indicator = sp.csr_matrix((np.ones(len(labels)), (labels, np.arange(len(labels)))), shape=(n_events, len(labels)))
+        batch_sums = np.asarray((indicator @ matrix).todense())
+        touched = batch_counts > 0
+        total = self.counts[touched] + batch_counts[touched]
+        self.centroids[touched] = (self.centroids[touched] * self.counts[touched, None] + batch_sums[touched]) / total[:, None]
+        self.counts[touched] = total
+        return labels
+
+    def partial_fit(self, article_ids, texts):
+        """
+        Assign a batch of articles to events; articles seen before keep their event.
+
+        Parameters:
+        - article_ids (iterable): Identifiers of the articles.
+        - texts (iterable of str): Their text (title + full content).
+
+        Returns:
+        - labels (ndarray): The event of every article of the batch.
+        """
+        article_ids = [str(article_id) for article_id in article_ids]
+        texts = pd.Series(list(texts), dtype=object)
+        is_new = np.array([article_id not in self.labels_ for article_id in article_ids], dtype=bool)
+        # Duplicate ids inside the batch are clustered once
+        is_new &= ~pd.Series(article_ids).duplicated().to_numpy()
+        new_ids = [article_id for article_id, new in zip(article_ids, is_new) if new]
+
+        if new_ids:
+            new_texts = texts[is_new].fillna('')
+            if self.centroids is None:
+                new_labels = self._fit_initial(new_texts)
+            else:
+                new_labels = self._assign(self.vectorizer.transform(new_texts))
+            self.labels_.update(zip(new_ids, new_labels.tolist()))
+            self._unsaved.extend(new_ids)
+
+        return np.array([self.labels_[article_id] for article_id in article_ids], dtype=np.int64)
+
+    def save(self, path=EVENT_STATE_DIR):
+        """
+        Persist the vectorizer, centroids, event sizes and article labels to a directory.
+
+        Only the labels of the articles added since the last save to `path` are written, as a new
+        label shard; the centroids and event sizes (whose size does not grow with the history) are
+        then replaced, together with the number of shards they cover. Every file is written to a
+        temporary name and renamed, so an interrupted save leaves the previous state readable.
+        """
+        os.makedirs(path, exist_ok=True)
+        if self._saved_path != os.path.abspath(path):
+            # A directory this clusterer was not loaded from or saved to: write every label
+            self._saved_path, self._n_shards, self._unsaved = os.path.abspath(path), 0, list(self.labels_)
+            _write_atomic(os.path.join(path, 'vectorizer.pkl'),
+                          lambda f: pickle.dump(self.vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL))
+            _write_atomic(os.path.join(path, 'config.json'), lambda f: f.write(json.dumps({
+                'n_initial_events': self.n_initial_events, 'distance_threshold': self.distance_threshold,
+                'random_state': self.random_state}).encode('utf-8')))
+        if self._unsaved:
+            ids = np.array(self._unsaved, dtype=str)
+            labels = np.array([self.labels_[article_id] for article_id in self._unsaved], dtype=np.int64)
+            _write_atomic(_shard_path(path, self._n_shards), lambda f: np.savez(f, article_ids=ids, labels=labels))
+            self._n_shards += 1
+            self._unsaved = []
+        # Shards past n_shards (left by an interrupted save) are ignored on load and overwritten
+        _write_atomic(os.path.join(path, 'state.npz'), lambda f: np.savez(
+            f, centroids=self.centroids, counts=self.counts, n_shards=self._n_shards))
+
+    @classmethod
+    def load(cls, path=EVENT_STATE_DIR):
+        """
+        Restore a clusterer saved with `save`, or return a new one if `path` holds no state.
+        """
+        if not os.path.exists(os.path.join(path, 'state.npz')):
+            return cls()
+        with open(os.path.join(path, 'config.json')) as f:
+            clusterer = cls(**json.load(f))
+        with open(os.path.join(path, 'vectorizer.pkl'), 'rb') as f:
+            clusterer.vectorizer = pickle.load(f)
+        state = np.load(os.path.join(path, 'state.npz'))
+        clusterer.centroids = state['centroids']
+        clusterer.counts = state['counts']
+        if 'article_ids' in state:
+            # State saved before the label shards
+            clusterer.labels_ = dict(zip(state['article_ids'].tolist(), state['labels'].tolist()))
+            return clusterer
+        for shard in range(int(state['n_shards'])):
+            labels = np.load(_shard_path(path, shard))
+            clusterer.labels_.update(zip(labels['article_ids'].tolist(), labels['labels'].tolist()))
+        clusterer._saved_path, clusterer._n_shards = os.path.abspath(path), int(state['n_shards'])
+        return clusterer
+
+
+def _shard_path(path, shard):
+    return os.path.join(path, f'labels-{shard:06d}.npz')
+
+
+def _write_atomic(path, write):
+    # Write a file through a temporary name, replacing the previous version in one rename
+    with open(path + '.tmp', 'wb') as f:
+        write(f)
+    os.replace(path + '.tmp', path)
@@ -0,0 +1,147 @@
+import os
+import json
+import pickle
+import hashlib
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+from scripts.article_frame import article_text
+from scripts.featurization import HashingFeaturizer
+
+# Directory holding the persisted feature matrices
+FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'feature_store')))
+
+# Vectorizers shared by the analysis code: which text they read and how they are configured
+FEATURE_SPECS = {
+    # Document-term counts for LDA topic modeling
+    'counts': {'vectorizer': 'count', 'column': 'text', 'params': dict(max_df=0.9, min_df=2, stop_words='english')},
+    # TF-IDF used for K-Means event clustering, the dashboard and the database features
+    'tfidf': {'vectorizer': 'tfidf', 'column': 'text', 'params': dict(max_df=0.8, min_df=2, stop_words='english', max_features=10000)},
+    # TF-IDF of titles and of full contents for keyword extraction
+    'title_tfidf': {'vectorizer': 'tfidf', 'column': 'title', 'params': dict(max_df=0.8, max_features=10000, stop_words='english')},
+    'content_tfidf': {'vectorizer': 'tfidf', 'column': 'full_content', 'params': dict(max_df=0.8, max_features=10000, stop_words='english')},
+    # Hashing counterparts of 'tfidf' and 'counts', vectorized in parallel shards without a vocabulary
+    # (scripts/featurization.py); their columns have no stored names
+    'tfidf_hashing': {'vectorizer': 'hashing', 'column': 'text', 'params': dict(max_df=0.8, min_df=2, stop_words='english')},
+    'counts_hashing': {'vectorizer': 'hashing', 'column': 'text',
+                       'params': dict(n_features=2 ** 18, use_idf=False, norm=None, max_df=0.9, min_df=2, stop_words='english')},
+}
+
+_VECTORIZERS = {'count': CountVectorizer, 'tfidf': TfidfVectorizer, 'hashing': HashingFeaturizer}
+
+
+def build_text(df):
+    # Text modeled by the topic and event models: title followed by the full content,
+    # as a lazy view the vectorizers iterate over (no concatenated column is materialized)
+    return article_text(df)
+
+
+def snapshot_fingerprint(df, columns=('title', 'full_content')):
+    """
+    Fingerprint the text of a data snapshot from a vectorized hash of its rows.
+
+    Returns:
+    - fingerprint (str): A short hex digest, identical for identical text in the same order.
+    """
+    row_hashes = pd.util.hash_pandas_object(df[list(columns)], index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:16]
+
+
+def _spec_texts(df, spec):
+    return build_text(df) if spec['column'] == 'text' else df[spec['column']]
+
+
+class FeatureStore:
+    """
+    Fit each vectorizer of FEATURE_SPECS once per data snapshot and persist its sparse matrix.
+
+    Every entry is a directory holding the CSR arrays (data, indices, indptr) and the vocabulary
+    as plain .npy files, which are memory-mapped on load, plus the pickled fitted vectorizer for
+    transforming new documents.
+
+    Parameters:
+    - root (str, optional): Directory of the store.
+    """
+
+    def __init__(self, root=FEATURE_STORE_DIR):
+        self.root = root
+
+    def entry_path(self, name, fingerprint):
+        params = json.dumps(FEATURE_SPECS[name], sort_keys=True, default=str)
+        params_hash = hashlib.sha1(params.encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.root, f'{name}-{params_hash}-{fingerprint}')
+
+    def exists(self, name, fingerprint):
+        return os.path.exists(os.path.join(self.entry_path(name, fingerprint), 'meta.json'))
+
+    def save(self, name, fingerprint, matrix, vectorizer):
+        """
+        Persist a feature matrix and its fitted vectorizer; the entry appears atomically.
+        """
+        path = self.entry_path(name, fingerprint)
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=self.root, prefix='.tmp-')
+        matrix = matrix.tocsr()
+        np.save(os.path.join(tmp_path, 'data.npy'), matrix.data)
+        np.save(os.path.join(tmp_path, 'indices.npy'), matrix.indices)
+        np.save(os.path.join(tmp_path, 'indptr.npy'), matrix.indptr)
+        if hasattr(vectorizer, 'get_feature_names_out'):
+            np.save(os.path.join(tmp_path, 'vocabulary.npy'), vectorizer.get_feature_names_out().astype(str))
+            # The stop word set is only kept by sklearn for introspection
+            vectorizer.stop_words_ = None
+        with open(os.path.join(tmp_path, 'vectorizer.pkl'), 'wb') as f:
+            pickle.dump(vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'name': name, 'fingerprint': fingerprint, 'shape': list(matrix.shape),
+                       'nnz': int(matrix.nnz), 'spec': FEATURE_SPECS[name]}, f, default=str)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+        return path
+
+    def load_matrix(self, name, fingerprint, mmap_mode='r'):
+        """
+        Load a persisted feature matrix as a CSR matrix backed by memory-mapped arrays.
+        """
+        path = self.entry_path(name, fingerprint)
+        with open(os.path.join(path, 'meta.json')) as f:
+            shape = tuple(json.load(f)['shape'])
+        data, indices, indptr = (np.load(os.path.join(path, f'{part}.npy'), mmap_mode=mmap_mode)
+                                 for part in ['data', 'indices', 'indptr'])
+        return sp.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+
+    def load_vocabulary(self, name, fingerprint, mmap_mode='r'):
+        return np.load(os.path.join(self.entry_path(name, fingerprint), 'vocabulary.npy'), mmap_mode=mmap_mode)
+
+    def load_vectorizer(self, name, fingerprint):
+        with open(os.path.join(self.entry_path(name, fingerprint), 'vectorizer.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+    def get_or_build(self, name, df, fingerprint=None):
+        """
+        Return the feature matrix and fitted vectorizer of `name` for this data snapshot.
+
+        The vectorizer is fitted and the matrix persisted only the first time a snapshot is seen;
+        afterwards both are loaded from disk without re-tokenizing the corpus.
+
+        Parameters:
+        - name (str): A key of FEATURE_SPECS.
+        - df (DataFrame): The articles, with 'title' and 'full_content' columns.
+        - fingerprint (str, optional): Identifier of the snapshot, e.g. a source file fingerprint.
+          Computed from the text when omitted.
+
+        Returns:
+        - matrix (csr_matrix): One row per article of `df`.
+        - vectorizer (CountVectorizer, TfidfVectorizer or HashingFeaturizer): The fitted vectorizer.
+        """
+        if fingerprint is None:
+            fingerprint = snapshot_fingerprint(df)
+        if not self.exists(name, fingerprint):
+            spec = FEATURE_SPECS[name]
+            vectorizer = _VECTORIZERS[spec['vectorizer']](**spec['params'])
+            matrix = vectorizer.fit_transform(_spec_texts(df, spec))
+            self.save(name, fingerprint, matrix, vectorizer)
+        return self.load_matrix(name, fingerprint), self.load_vectorizer(name, fingerprint)
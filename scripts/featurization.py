@@ -0,0 +1,188 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+# Number of processes vectorizing shards of the corpus (one per CPU by default)
+FEATURIZATION_WORKERS = int(os.getenv('FEATURIZATION_WORKERS', str(os.cpu_count() or 1)))
+
+# Documents per shard: large enough to amortize sending a shard to a worker
+SHARD_SIZE = int(os.getenv('FEATURIZATION_SHARD_SIZE', '5000'))
+
+
+def _shards(texts, shard_size):
+    # Lists of at most shard_size documents from any iterable (e.g. a lazy ArticleText view)
+    iterator = iter(texts)
+    while True:
+        shard = list(islice(iterator, shard_size))
+        if not shard:
+            return
+        yield shard
+
+
+def _map_shards(func, shards, n_jobs, *args):
+    # Apply func(shard, *args) to every shard in a process pool, yielding the results in order.
+    # At most two shards per worker are in flight, so the corpus is never held in memory at once
+    if n_jobs == 1:
+        for shard in shards:
+            yield func(shard, *args)
+        return
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        pending = deque()
+        for shard in shards:
+            pending.append(executor.submit(func, shard, *args))
+            if len(pending) >= 2 * n_jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _count_shard(shard, params):
+    # Term counts of one shard in the hashed feature space, as raw CSR arrays
+    counts = HashingVectorizer(**params).transform(shard)
+    counts.sum_duplicates()
+    return counts.data, counts.indices, counts.indptr
+
+
+def _decode_shard(shard, params, wanted):
+    # First token (or n-gram) of the shard hashed to every wanted column
+    analyzer = HashingVectorizer(**params).build_analyzer()
+    tokens = sorted({token for document in shard for token in analyzer(document)})
+    if not tokens:
+        return {}
+    # The hasher of HashingVectorizer, applied to one token per row
+    hasher = FeatureHasher(n_features=params['n_features'], input_type='string', alternate_sign=False)
+    columns = hasher.transform([[token] for token in tokens]).indices
+    return {int(column): token for column, token in zip(columns, tokens) if column in wanted}
+
+
+def stack_rows(parts, n_features):
+    """
+    Stack CSR row blocks given as (data, indices, indptr) arrays into one CSR matrix.
+
+    The arrays are concatenated once with NumPy; only the row offsets of every block are shifted.
+    """
+    parts = list(parts)
+    if not parts:
+        return sp.csr_matrix((0, n_features))
+    data = np.concatenate([part[0] for part in parts])
+    indices = np.concatenate([part[1] for part in parts])
+    offsets = np.cumsum([0] + [len(part[0]) for part in parts[:-1]])
+    indptr = np.concatenate([[0]] + [part[2][1:] + offset for part, offset in zip(parts, offsets)])
+    return sp.csr_matrix((data, indices, indptr.astype(indices.dtype if indptr[-1] < 2 ** 31 else np.int64)),
+                         shape=(len(indptr) - 1, n_features), copy=False)
+
+
+class HashingFeaturizer:
+    """
+    Stateless TF-IDF featurization: tokens are hashed into a fixed number of columns, so shards of
+    the corpus are vectorized independently in a process pool without a vocabulary pass.
+
+    The shard counts are stacked into one sparse matrix, then a cheap second pass over its
+    nonzeros applies the document-frequency filters, the IDF weights (smooth, as TfidfVectorizer)
+    and the row normalization. Only the document frequency of every column is kept by fit.
+    Columns have no names; feature_names decodes the columns of interest from a corpus.
+
+    Parameters:
+    - n_features (int, optional): Number of hashed columns; collisions grow as it shrinks.
+    - use_idf (bool, optional): Weight the counts by IDF (False gives raw counts, e.g. for LDA).
+    - norm (str, optional): 'l2', 'l1' or None.
+    - min_df, max_df (int or float, optional): Drop columns found in fewer / more documents
+      (a float is a share of the documents), like CountVectorizer.
+    - n_jobs (int, optional): Number of worker processes (FEATURIZATION_WORKERS by default).
+    - shard_size (int, optional): Documents per shard.
+    - **params: Tokenization parameters of HashingVectorizer (stop_words, ngram_range, lowercase, ...).
+    """
+
+    def __init__(self, n_features=2 ** 20, use_idf=True, norm='l2', min_df=1, max_df=1.0, n_jobs=None,
+                 shard_size=SHARD_SIZE, **params):
+        self.n_features = n_features
+        self.use_idf = use_idf
+        self.norm = norm
+        self.min_df = min_df
+        self.max_df = max_df
+        self.n_jobs = n_jobs
+        self.shard_size = shard_size
+        self.params = params
+        self.document_frequency_ = None
+        self.n_documents_ = 0
+
+    @property
+    def _hashing_params(self):
+        return {**self.params, 'n_features': self.n_features, 'alternate_sign': False, 'norm': None}
+
+    def _workers(self):
+        return max(self.n_jobs or FEATURIZATION_WORKERS, 1)
+
+    def counts(self, texts):
+        """
+        Raw term counts of every document in the hashed space, vectorized shard by shard in parallel.
+        """
+        parts = _map_shards(_count_shard, _shards(texts, self.shard_size), self._workers(), self._hashing_params)
+        return stack_rows(parts, self.n_features)
+
+    def fit(self, texts):
+        self.fit_transform(texts)
+        return self
+
+    def fit_transform(self, texts):
+        counts = self.counts(texts)
+        self.n_documents_ = counts.shape[0]
+        self.document_frequency_ = np.bincount(counts.indices, minlength=self.n_features).astype(np.int64)
+        return self._weight(counts)
+
+    def transform(self, texts):
+        if self.document_frequency_ is None:
+            raise ValueError("The featurizer is not fitted; call fit or fit_transform first.")
+        return self._weight(self.counts(texts))
+
+    @property
+    def kept_columns_(self):
+        # Columns passing the document-frequency filters of the fit
+        n = self.n_documents_
+        min_df = self.min_df if isinstance(self.min_df, int) else self.min_df * n
+        max_df = self.max_df if isinstance(self.max_df, int) else self.max_df * n
+        return (self.document_frequency_ >= max(min_df, 1)) & (self.document_frequency_ <= max_df)
+
+    @property
+    def idf_(self):
+        return np.log((1 + self.n_documents_) / (1 + self.document_frequency_)) + 1
+
+    def _weight(self, counts):
+        # Second pass over the nonzeros: filter columns, weight by IDF and normalize rows
+        counts = counts.astype(np.float64, copy=False)
+        weights = self.kept_columns_.astype(np.float64)
+        if self.use_idf:
+            weights *= self.idf_
+        counts.data *= weights[counts.indices]
+        counts.eliminate_zeros()
+        return normalize(counts, norm=self.norm, copy=False) if self.norm else counts
+
+    def feature_names(self, columns, texts):
+        """
+        Token (or n-gram) of every column, found by scanning `texts` in parallel shards.
+
+        Columns without a token in `texts` get an empty string; of colliding tokens one is returned.
+
+        Returns:
+        - names (ndarray): One string per column of `columns`.
+        """
+        columns = np.asarray(columns, dtype=np.int64)
+        wanted = set(columns.tolist())
+        found = {}
+        for mapping in _map_shards(_decode_shard, _shards(texts, self.shard_size), self._workers(), self._hashing_params, wanted):
+            for column, token in mapping.items():
+                found.setdefault(column, token)
+        return np.array([found.get(column, '') for column in columns.tolist()], dtype=object)
+
+    def version(self):
+        """
+        Identifier of the hashed feature space; vectors are comparable within one version.
+        """
+        params = ','.join(f'{key}={value}' for key, value in sorted(self.params.items()))
+        return f'hashing-{self.n_features}-{params}'
@@ -1,8 +1,13 @@
 import pandas as pd
 import numpy as np
-
-def clean_data(df, date_columns=None, fillna_strategy='mean', dropna_threshold=0.5, date_format=None, custom_types=None): # type: ignore
-    
+from scripts.text_matching import MultiPatternMatcher
+from scripts.sentiment_stats import sentiment_counts, sentiment_distribution, sentiment_statistics, sentiment_values
+from scripts.instrumentation import instrumented
+from scripts.source_dimension import SourceDimension
+# The region location codes live with the source dimension; re-exported for existing imports
+from scripts.source_dimension import AFRICA_LOCATIONS, EU_LOCATIONS, MIDDLE_EAST_LOCATIONS  # noqa: F401
+
+def _prepare_frame(df, custom_types=None):
     # Fill missing values for specific columns if provided
     if 'title' in df.columns:
         df['title'] = df['title'].fillna('')
@@ -23,19 +28,28 @@ def clean_data(df, date_columns=None, fillna_strategy='mean', dropna_threshold=0
                     df[col] = df[col].astype(dtype)
     
     # General data type conversion
-    df = df.convert_dtypes()
-    
-    # Handle missing values based on general strategy
+    return df.convert_dtypes()
+
+
+def _fill_values(df, fillna_strategy, fill_columns=None):
+    # Values used to fill missing data for the general strategy
     if isinstance(fillna_strategy, dict):
-        df = df.fillna(value=fillna_strategy)
-    elif fillna_strategy == 'mean':
-        df = df.fillna(df.mean(numeric_only=True))
+        return fillna_strategy
+    if fill_columns is not None:
+        df = df[[col for col in df.columns if col in fill_columns]]
+    if fillna_strategy == 'mean':
+        return df.mean(numeric_only=True)
     elif fillna_strategy == 'median':
-        df = df.fillna(df.median(numeric_only=True))
+        return df.median(numeric_only=True)
     elif fillna_strategy == 'mode':
-        df = df.fillna(df.mode().iloc[0])
+        return df.mode().iloc[0] if len(df.columns) else pd.Series(dtype=object)
     else:
         raise ValueError("Invalid fillna_strategy. Choose from 'mean', 'median', 'mode', or provide a dictionary.")
+
+
+def _fill_and_filter(df, fill_values, dropna_threshold, date_columns, date_format):
+    # Handle missing values based on general strategy
+    df = df.fillna(value=fill_values)
     
     # Drop rows with missing values based on threshold
     df = df.dropna(thresh=int(dropna_threshold * len(df.columns)))
@@ -50,25 +64,225 @@ def clean_data(df, date_columns=None, fillna_strategy='mean', dropna_threshold=0
     if date_columns:
         df = df.dropna(subset=date_columns)
     
+    return df
+
+
+def _strip_strings(df):
+    # Remove whitespace from string columns (vectorized, missing values are kept); the columns are
+    # returned as object columns holding str and pd.NA, like the element-wise strip did
+    for col in df.select_dtypes(include='string').columns:
+        df[col] = df[col].str.strip().astype(object)
+    return df
+
+
+@instrumented
+def clean_data(df, date_columns=None, fillna_strategy='mean', dropna_threshold=0.5, date_format=None, custom_types=None, # type: ignore
+               fill_columns=None):
+    """
+    Clean the input DataFrame by filling missing values, ensuring correct data types, and handling invalid dates.
+
+    Parameters:
+    - df (DataFrame): The input DataFrame to clean.
+    - date_columns (list of str, optional): List of column names to be parsed as dates.
+    - fillna_strategy (str or dict, optional): Strategy to fill missing values. Options are 'mean', 'median', 'mode', or a dictionary of column-specific strategies.
+    - dropna_threshold (float, optional): Threshold for dropping rows with missing values. Rows with missing values above this threshold will be dropped.
+    - date_format (str, optional): Format to enforce for date columns. If None, pandas will infer the format.
+    - custom_types (dict, optional): A dictionary specifying the desired data types for specific columns.
+    - fill_columns (list of str, optional): Columns filled by the 'mean', 'median' or 'mode' strategy (all by default).
+
+    Returns:
+    - cleaned_df (DataFrame): The cleaned DataFrame.
+    """
+    df = _prepare_frame(df, custom_types)
+    df = _fill_and_filter(df, _fill_values(df, fillna_strategy, fill_columns), dropna_threshold, date_columns, date_format)
+    
     # Drop duplicates
     df = df.drop_duplicates()
     
-    # Remove whitespace from string columns
-    for col in df.select_dtypes(include='string').columns:
-        df[col] = df[col].map(lambda x: x.strip() if isinstance(x, str) else x)
+    df = _strip_strings(df)
     
     # Reset index
     df = df.reset_index(drop=True)
     
     return df
 
-def analyze_country_article_counts(data_df, domains_location_df):
+
+def _unify_dtypes(chunk_dtypes):
+    # Pick one dtype per column from the dtypes inferred chunk by chunk
+    unified = {}
+    for col, dtypes in chunk_dtypes.items():
+        distinct = list(dict.fromkeys(dtypes))
+        if len(distinct) == 1:
+            unified[col] = distinct[0]
+        elif all(pd.api.types.is_integer_dtype(d) or pd.api.types.is_float_dtype(d) for d in distinct):
+            is_float = any(pd.api.types.is_float_dtype(d) for d in distinct)
+            unified[col] = pd.Float64Dtype() if is_float else pd.Int64Dtype()
+        else:
+            unified[col] = np.dtype(object)
+    return unified
+
+
+def _add_counts(value_counts, col, counts_):
+    value_counts[col] = counts_ if col not in value_counts else value_counts[col].add(counts_, fill_value=0)
+
+
+def _median_from_counts(counts_):
+    # Exact median of the values counted in a value -> count Series
+    counts_ = counts_.sort_index()
+    cumulative = counts_.to_numpy().cumsum()
+    total = cumulative[-1]
+    lower = counts_.index[np.searchsorted(cumulative, (total + 1) // 2)]
+    upper = counts_.index[np.searchsorted(cumulative, total // 2 + 1)]
+    return (lower + upper) / 2
+
+
+def _scan_chunks(path, chunksize, custom_types, fillna_strategy, read_csv_kwargs, fill_columns=None):
+    """
+    First streaming pass: infer the column dtypes the whole file would get and the global fill values.
+
+    'mean' keeps a sum and a count per numeric column. 'median' and 'mode' are exact, so they keep a
+    count per distinct value of every filled column (numeric columns for 'median'): their memory grows
+    with the number of distinct values, which for free text such as 'full_content' is about the number
+    of rows. Restrict them to low-cardinality columns with `fill_columns`, or pass a dict of fill values.
+    """
+    if not isinstance(fillna_strategy, dict) and fillna_strategy not in ('mean', 'median', 'mode'):
+        raise ValueError("Invalid fillna_strategy. Choose from 'mean', 'median', 'mode', or provide a dictionary.")
+
+    chunk_dtypes, first_dtypes = {}, {}
+    columns = None
+    sums, counts, value_counts = {}, {}, {}
+
+    for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+        chunk = _prepare_frame(chunk, custom_types)
+        columns = chunk.columns
+        for col in chunk.columns:
+            first_dtypes.setdefault(col, chunk[col].dtype)
+            # A column that is empty in this chunk says nothing about its type
+            if chunk[col].notna().any():
+                chunk_dtypes.setdefault(col, []).append(chunk[col].dtype)
+
+        filled = chunk if fill_columns is None else chunk[[col for col in chunk.columns if col in fill_columns]]
+        if fillna_strategy == 'mean':
+            numeric = filled.select_dtypes(include=['number', 'bool'])
+            for col in numeric.columns:
+                sums[col] = sums.get(col, 0) + numeric[col].sum()
+                counts[col] = counts.get(col, 0) + numeric[col].count()
+        elif fillna_strategy == 'median':
+            numeric = filled.select_dtypes(include=['number', 'bool'])
+            for col in numeric.columns:
+                _add_counts(value_counts, col, numeric[col].dropna().astype('float64').value_counts())
+        elif fillna_strategy == 'mode':
+            for col in filled.columns:
+                _add_counts(value_counts, col, filled[col].value_counts())
+
+    if columns is None:
+        return {}, None
+
+    # Columns that were empty in every chunk keep the dtype of the first chunk
+    dtypes = _unify_dtypes({col: chunk_dtypes.get(col, [first_dtypes[col]]) for col in columns})
+    numeric_cols = [col for col in columns if pd.api.types.is_numeric_dtype(dtypes[col])]
+
+    fill_values = fillna_strategy
+    if fillna_strategy == 'mean':
+        fill_values = pd.Series({col: sums[col] / counts[col] if counts.get(col) else np.nan
+                                 for col in numeric_cols if col in sums}, dtype='float64')
+    elif fillna_strategy == 'median':
+        fill_values = pd.Series({col: _median_from_counts(value_counts[col]) if value_counts[col].sum() else np.nan
+                                 for col in numeric_cols if col in value_counts}, dtype='float64')
+    elif fillna_strategy == 'mode':
+        # Most frequent value per column; ties resolve to the smallest value like DataFrame.mode()
+        modes = {}
+        for col in (columns if fill_columns is None else [col for col in columns if col in fill_columns]):
+            counts_ = value_counts.get(col)
+            if counts_ is None or counts_.empty:
+                modes[col] = np.nan
+            else:
+                modes[col] = pd.Series(counts_[counts_ == counts_.max()].index).sort_values().iloc[0]
+        fill_values = pd.Series(modes, dtype=object)
+
+    return dtypes, fill_values
+
+
+def iter_clean_data(path, chunksize=100000, date_columns=None, fillna_strategy='mean', dropna_threshold=0.5,
+                    date_format=None, custom_types=None, dedupe_subset=None, read_csv_kwargs=None, fill_columns=None):
+    """
+    Streaming version of clean_data: read a CSV file in bounded-size chunks and yield cleaned chunks.
+
+    The file is read twice. A first pass infers the dtypes and the fill values the whole file would
+    get, the second pass cleans chunk by chunk with vectorized string operations. Duplicates are
+    detected across chunks by a 64-bit hash of each row (or of `dedupe_subset`), so peak memory is set
+    by `chunksize` plus 8 bytes per distinct row rather than by the file size. The exact 'median' and
+    'mode' fill values are the exception: they count every distinct value of the filled columns, so
+    limit them with `fill_columns` (e.g. 'mode' on the short categorical columns, not 'full_content').
+
+    Parameters:
+    - path (str): Path of the CSV file.
+    - chunksize (int, optional): Number of rows read per chunk.
+    - date_columns, fillna_strategy, dropna_threshold, date_format, custom_types, fill_columns: Same as clean_data.
+    - dedupe_subset (list of str, optional): Key columns used to detect duplicates. By default the whole
+      row is compared, exactly like clean_data.
+    - read_csv_kwargs (dict, optional): Extra keyword arguments for pd.read_csv.
+
+    Yields:
+    - chunk (DataFrame): A cleaned chunk; its index continues the index of the previous chunk.
+    """
+    read_csv_kwargs = read_csv_kwargs or {}
+    dtypes, fill_values = _scan_chunks(path, chunksize, custom_types, fillna_strategy, read_csv_kwargs, fill_columns)
+    if fill_values is None:
+        return
+
+    seen = np.empty(0, dtype=np.uint64)
+    offset = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+        chunk = _prepare_frame(chunk, custom_types)
+        chunk = chunk.astype({col: dtype for col, dtype in dtypes.items() if chunk[col].dtype != dtype})
+        chunk = _fill_and_filter(chunk, fill_values, dropna_threshold, date_columns, date_format)
+
+        # Drop duplicates within the chunk and against every row kept so far
+        hashes = pd.util.hash_pandas_object(chunk if dedupe_subset is None else chunk[dedupe_subset], index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(seen):
+            positions = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+            keep &= seen[positions] != hashes
+        chunk = chunk[keep]
+        # Merge the new hashes into the sorted seen hashes without sorting them all again
+        new_hashes = np.sort(hashes[keep])
+        seen = np.insert(seen, np.searchsorted(seen, new_hashes), new_hashes)
+
+        chunk = _strip_strings(chunk)
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+@instrumented
+def clean_data_streaming(path, chunksize=100000, **kwargs):
+    """
+    Clean a CSV file chunk by chunk and return the same DataFrame as clean_data(pd.read_csv(path)).
+
+    See iter_clean_data for the parameters.
+    """
+    chunks = list(iter_clean_data(path, chunksize=chunksize, **kwargs))
+    return pd.concat(chunks) if chunks else pd.DataFrame()
+
+def _count_chunks(matcher, data_df, n_jobs):
+    # Sum the matches over one frame or over the chunks of a streamed one
+    chunks = [data_df] if isinstance(data_df, pd.DataFrame) else data_df
+    return sum((matcher.count_documents(chunk['content'], n_jobs=n_jobs) for chunk in chunks), matcher.count_documents([]))
+
+
+@instrumented
+def analyze_country_article_counts(data_df, domains_location_df, word_boundary=False, n_jobs=1):
     """
     Analyze the number of articles written about each country mentioned in the content.
 
+    Every article is scanned once for all countries (case-insensitive).
+
     Parameters:
-    - data_df (DataFrame): A DataFrame containing articles with a 'content' column.
+    - data_df (DataFrame or iterable of DataFrames): Articles with a 'content' column, or chunks of them.
     - domains_location_df (DataFrame): A DataFrame containing countries in a 'Country' column.
+    - word_boundary (bool, optional): Only count whole-word mentions (e.g. 'Niger' not in 'Nigeria').
+    - n_jobs (int, optional): Number of processes scanning chunks of articles in parallel.
 
     Returns:
     - top_10_countries_articles (DataFrame): A DataFrame of the top 10 countries by article count.
@@ -76,77 +290,64 @@ def analyze_country_article_counts(data_df, domains_location_df):
     """
 
     # List of countries to check in the content
-    countries_list = domains_location_df['Country'].unique()
+    countries_list = [str(country) for country in domains_location_df['Country'].dropna().unique()]
 
-    # Initialize a dictionary to count articles per country
-    country_article_count = {country: 0 for country in countries_list}
+    # Count the articles mentioning each country in a single pass over the content
+    matcher = MultiPatternMatcher({country: [country] for country in countries_list}, word_boundary=word_boundary)
+    country_article_count = _count_chunks(matcher, data_df, n_jobs)
 
-    # Count occurrences of each country in the article content
-    for country in countries_list:
-        country = str(country)
-        country_article_count[country] = data_df['content'].str.contains(country, case=False, na=False).sum()
-
-    # Convert dictionary to DataFrame
-    country_article_count_df = pd.DataFrame(list(country_article_count.items()), columns=['Country', 'ArticleCount']).dropna()
+    # Convert counts to DataFrame
+    country_article_count_df = pd.DataFrame({'Country': country_article_count.index, 'ArticleCount': country_article_count.values})
 
     # Sort by ArticleCount to find the top and bottom 10 countries
     top_10_countries_articles = country_article_count_df.sort_values(by='ArticleCount', ascending=False).head(10)
-    bottom_10_countries_articles = country_article_count_df.sort_values(by='ArticleCount', ascending=True).tail(10)
+    bottom_10_countries_articles = country_article_count_df.sort_values(by='ArticleCount', ascending=True).head(10)
 
     return top_10_countries_articles, bottom_10_countries_articles
 
 
-def analyze_region_article_counts(data_df, domains_location_df):
+@instrumented
+def analyze_region_article_counts(data_df, domains_location_df, word_boundary=False, n_jobs=1, source_dimension=None):
     """
     Analyze the number of articles reporting about specific regions like Africa, US, China, EU, Russia, Ukraine, and Middle East.
 
+    Every article is scanned once for all regions. Africa, EU and Middle East are matched on the
+    (case-sensitive) names of the sources located there; the other regions on their name (case-insensitive).
+
     Parameters:
-    - data_df (DataFrame): A DataFrame containing articles with a 'content' column.
+    - data_df (DataFrame or iterable of DataFrames): Articles with a 'content' column, or chunks of them.
     - domains_location_df (DataFrame): A DataFrame containing location data with 'location' and 'SourceCommonName' columns.
+    - word_boundary (bool, optional): Only count whole-word mentions.
+    - n_jobs (int, optional): Number of processes scanning chunks of articles in parallel.
+    - source_dimension (SourceDimension, optional): Prebuilt source dimension of domains_location_df,
+      whose region bitmask gives the sources of every region without filtering the locations again.
 
     Returns:
     - top_10_region_articles (DataFrame): A DataFrame of the top 10 regions by article count.
     - bottom_10_region_articles (DataFrame): A DataFrame of the bottom 10 regions by article count.
     """
 
-    # Define country groups for each region
-    african_countries = domains_location_df[domains_location_df['location'].isin([
-        'DZ', 'AO', 'BJ', 'BW', 'BF', 'BI', 'CV', 'CM', 'CF', 'TD', 'KM', 'CG', 'CD',
-        'DJ', 'EG', 'GQ', 'ER', 'SZ', 'ET', 'GA', 'GM', 'GH', 'GN', 'GW', 'KE', 'LS',
-        'LR', 'LY', 'MG', 'MW', 'ML', 'MR', 'MU', 'YT', 'MA', 'MZ', 'NA', 'NE', 'NG',
-        'RE', 'RW', 'SH', 'ST', 'SN', 'SC', 'SL', 'SO', 'ZA', 'SS', 'SD', 'TZ', 'TG',
-        'TN', 'UG', 'EH', 'ZM', 'ZW'])]['SourceCommonName'].unique()
-
-    eu_countries = domains_location_df[domains_location_df['location'].isin([
-        'AT', 'BE', 'BG', 'HR', 'CY', 'CZ', 'DK', 'EE', 'FI', 'FR', 'DE', 'GR', 'HU',
-        'IE', 'IT', 'LV', 'LT', 'LU', 'MT', 'NL', 'PL', 'PT', 'RO', 'SK', 'SI', 'ES',
-        'SE'])]['SourceCommonName'].unique()
-
-    middle_east_countries = domains_location_df[domains_location_df['location'].isin([
-        'BH', 'EG', 'IR', 'IQ', 'IL', 'JO', 'KW', 'LB', 'OM', 'PS', 'QA', 'SA', 'SY',
-        'AE', 'YE'])]['SourceCommonName'].unique()
-
-    # Initialize dictionaries for each region
-    africa_article_count = data_df['content'].apply(lambda x: any(country in x for country in african_countries)).sum()
-    us_article_count = data_df['content'].str.contains('US', case=False, na=False).sum()
-    china_article_count = data_df['content'].str.contains('China', case=False, na=False).sum()
-    eu_article_count = data_df['content'].apply(lambda x: any(country in x for country in eu_countries)).sum()
-    russia_article_count = data_df['content'].str.contains('Russia', case=False, na=False).sum()
-    ukraine_article_count = data_df['content'].str.contains('Ukraine', case=False, na=False).sum()
-    middle_east_article_count = data_df['content'].apply(lambda x: any(country in x for country in middle_east_countries)).sum()
-
-    # Aggregate the article counts for each region
-    region_article_count = {
-        'Africa': africa_article_count,
-        'US': us_article_count,
-        'China': china_article_count,
-        'EU': eu_article_count,
-        'Russia': russia_article_count,
-        'Ukraine': ukraine_article_count,
-        'Middle East': middle_east_article_count
+    # Define country groups for each region from the region bitmask of the sources
+    sources = source_dimension if source_dimension is not None else SourceDimension(domains_location_df)
+    african_countries = sources.region_sources('Africa')
+    eu_countries = sources.region_sources('EU')
+    middle_east_countries = sources.region_sources('Middle East')
+
+    region_terms = {
+        'Africa': african_countries,
+        'US': ['US'],
+        'China': ['China'],
+        'EU': eu_countries,
+        'Russia': ['Russia'],
+        'Ukraine': ['Ukraine'],
+        'Middle East': middle_east_countries
     }
 
-    region_article_count_df = pd.DataFrame(list(region_article_count.items()), columns=['Region', 'ArticleCount'])
+    # Count the articles reporting about each region in a single pass over the content
+    matcher = MultiPatternMatcher(region_terms, word_boundary=word_boundary, case_sensitive=['Africa', 'EU', 'Middle East'])
+    region_article_count = _count_chunks(matcher, data_df, n_jobs)
+
+    region_article_count_df = pd.DataFrame({'Region': region_article_count.index, 'ArticleCount': region_article_count.values})
 
     # Sort and display the top and bottom 10 regions by article count
     top_10_region_articles = region_article_count_df.sort_values(by='ArticleCount', ascending=False).head(10)
@@ -155,24 +356,23 @@ def analyze_region_article_counts(data_df, domains_location_df):
     return top_10_region_articles, bottom_10_region_articles
 
 
+@instrumented
 def analyze_sentiment_statistics(rating_df, traffic_data_df):
     """
     Convert sentiment to numeric values and calculate descriptive statistics by domain.
     Compare global sentiment distribution with the distribution for the top 10 domains by traffic.
+
+    Statistics and distributions are derived from per-domain sentiment counts (see scripts/sentiment_stats.py).
     """
 
     # Convert sentiment to numeric values for descriptive statistics
-    sentiment_mapping = {'Negative': -1, 'Neutral': 0, 'Positive': 1}
-    rating_df['title_sentiment_numeric'] = rating_df['title_sentiment'].map(sentiment_mapping)
-    rating_df['title_sentiment_numeric'] = pd.to_numeric(rating_df['title_sentiment_numeric'])
-
-    # Group by domain and calculate descriptive statistics
-    sentiment_stats = rating_df.groupby('source_name')['title_sentiment_numeric'].agg(
-        mean_sentiment=np.mean,
-        median_sentiment=np.median,
-        variance_sentiment=np.var,
-        count='count'
-    ).reset_index()
+    rating_df['title_sentiment_numeric'] = sentiment_values(rating_df['title_sentiment'])
+
+    # Count the sentiments of every domain in one pass; every statistic follows from the counts.
+    # Rows without a source are kept in a last group so the global distribution still covers them
+    counts = sentiment_counts(rating_df, dropna=False)
+    stats = sentiment_statistics(counts[counts.index.notna()])
+    sentiment_stats = stats[['mean_sentiment', 'median_sentiment', 'variance_sentiment', 'count']].reset_index()
 
     # Identify top 10 domains by visitor traffic
     top_10_traffic_domains = traffic_data_df.sort_values(by='GlobalRank').head(10)['Domain']
@@ -181,10 +381,10 @@ def analyze_sentiment_statistics(rating_df, traffic_data_df):
     top_10_sentiment_stats = sentiment_stats[sentiment_stats['source_name'].isin(top_10_traffic_domains)]
 
     # Global sentiment distribution
-    global_sentiment_distribution = rating_df['title_sentiment'].value_counts(normalize=True)
+    global_sentiment_distribution = sentiment_distribution(counts)
 
     # Sentiment distribution for top 10 domains
-    top_10_domains_sentiment_distribution = rating_df[rating_df['source_name'].isin(top_10_traffic_domains)]['title_sentiment'].value_counts(normalize=True)
+    top_10_domains_sentiment_distribution = sentiment_distribution(counts[counts.index.isin(top_10_traffic_domains)])
 
     return sentiment_stats, global_sentiment_distribution, top_10_domains_sentiment_distribution, top_10_sentiment_stats
 
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+import tracemalloc
+from collections import deque
+import pandas as pd
+
+# Spans are only recorded with NEWS_INSTRUMENTATION=1 (or after enable()); otherwise an
+# instrumented function costs one flag check per call
+INSTRUMENTATION_ENABLED = os.getenv('NEWS_INSTRUMENTATION', '0').lower() in ('1', 'true', 'yes')
+
+# Trace file (.json or .csv) written when the process exits, if set
+TRACE_PATH = os.getenv('NEWS_TRACE_PATH')
+
+# Number of most recent spans kept in memory
+TRACE_MAX_SPANS = int(os.getenv('NEWS_TRACE_MAX_SPANS', '10000'))
+
+TRACE_COLUMNS = ['name', 'parent', 'depth', 'started_at', 'wall_seconds', 'cpu_seconds', 'peak_memory_mb', 'rows', 'error']
+
+_enabled = False
+_trace_memory = False
+_spans = deque(maxlen=TRACE_MAX_SPANS)
+_lock = threading.Lock()
+# Open spans of every thread (Streamlit runs every session in its own thread)
+_local = threading.local()
+
+
+def enable(trace_memory=True):
+    """
+    Start recording spans.
+
+    Parameters:
+    - trace_memory (bool, optional): Also record the peak memory allocated within every span with
+      tracemalloc, which slows down allocation-heavy code while enabled.
+    """
+    global _enabled, _trace_memory
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+
+def disable():
+    """
+    Stop recording spans (and stop tracing memory allocations if enable() started it).
+    """
+    global _enabled, _trace_memory
+    _enabled = False
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _trace_memory = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def _rows(value):
+    # Number of rows of a frame, array, sparse matrix or list; None for anything else (e.g. a chunk iterator)
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return int(shape[0])
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    return None
+
+
+class span:
+    """
+    Context manager recording the wall time, CPU time, peak allocated memory and input rows of a block.
+
+    Spans nest: a span opened inside another records it as its parent, and the peak memory of the
+    outer span includes the peaks of the inner ones. CPU time is the process CPU time, so it includes
+    the threads of numerical libraries (and of other dashboard sessions running at the same time).
+
+    Parameters:
+    - name (str): Name of the span, e.g. the function or dashboard panel.
+    - rows (int, optional): Number of input rows.
+    """
+
+    __slots__ = ('name', 'rows', '_active', '_started_at', '_wall', '_cpu', '_memory', '_child_peak')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self._active = _enabled
+        if not self._active:
+            return self
+        stack = _local.__dict__.setdefault('stack', [])
+        self._child_peak = 0
+        self._memory = None
+        if _trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Keep the peak reached so far by the enclosing span before resetting it
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+            tracemalloc.reset_peak()
+            self._memory = current
+        stack.append(self)
+        self._started_at = time.time()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._active:
+            return False
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        peak, peak_memory_mb = 0, None
+        if self._memory is not None and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self._child_peak)
+            peak_memory_mb = max(peak - self._memory, 0) / 2 ** 20
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+        record = {
+            'name': self.name, 'parent': stack[-1].name if stack else None, 'depth': len(stack),
+            'started_at': self._started_at, 'wall_seconds': wall, 'cpu_seconds': cpu,
+            'peak_memory_mb': peak_memory_mb, 'rows': self.rows, 'error': exc_type.__name__ if exc_type else None,
+        }
+        with _lock:
+            _spans.append(record)
+        return False
+
+
+def instrumented(func=None, name=None):
+    """
+    Decorator recording a span for every call of a function (see span).
+
+    The input rows are taken from the first positional argument when it is a frame, array,
+    sparse matrix or list. Use as @instrumented or @instrumented(name='...').
+    """
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with span(span_name, rows=_rows(args[0]) if args else None):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def trace():
+    """
+    Recorded spans, oldest first, as a DataFrame with the TRACE_COLUMNS ('started_at' is a Unix time).
+    """
+    with _lock:
+        records = list(_spans)
+    trace_df = pd.DataFrame(records, columns=TRACE_COLUMNS)
+    trace_df['rows'] = trace_df['rows'].astype('Int64')
+    return trace_df
+
+
+def summary(trace_df=None):
+    """
+    Per span name: number of calls, total, mean and last wall time, total CPU time, largest peak
+    memory and rows of the last call, sorted by total wall time.
+    """
+    trace_df = trace() if trace_df is None else trace_df
+    grouped = trace_df.groupby('name')
+    result = pd.DataFrame({
+        'calls': grouped.size(),
+        'total_seconds': grouped['wall_seconds'].sum(),
+        'mean_seconds': grouped['wall_seconds'].mean(),
+        'last_seconds': grouped['wall_seconds'].last(),
+        'cpu_seconds': grouped['cpu_seconds'].sum(),
+        'peak_memory_mb': grouped['peak_memory_mb'].max(),
+        'last_rows': grouped['rows'].last(),
+    })
+    return result.sort_values('total_seconds', ascending=False).reset_index()
+
+
+def clear():
+    with _lock:
+        _spans.clear()
+
+
+def to_json(trace_df):
+    return json.dumps(trace_df.astype(object).where(trace_df.notna(), None).to_dict(orient='records'), indent=1)
+
+
+def export(path):
+    """
+    Write the recorded spans to a trace file, as JSON records (.json) or CSV (any other extension).
+    """
+    trace_df = trace()
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            f.write(to_json(trace_df))
+    else:
+        trace_df.to_csv(path, index=False)
+    return path
+
+
+if INSTRUMENTATION_ENABLED:
+    enable()
+
+if TRACE_PATH:
+    atexit.register(lambda: export(TRACE_PATH) if len(_spans) else None)
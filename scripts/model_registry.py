@@ -0,0 +1,89 @@
+import os
+import json
+import time
+import hashlib
+import joblib
+import pandas as pd
+
+# Directory holding the registered model artifacts
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models', 'registry')))
+
+
+def params_fingerprint(params):
+    # Stable hash of a JSON-serializable parameter dictionary
+    raw = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+
+class ModelRegistry:
+    """
+    File-based registry of fitted models (vectorizers, LDA, K-Means, ...) that needs no tracking server.
+
+    Every artifact is stored under its name, the fingerprint of the data it was trained on and a
+    hash of its parameters, as an uncompressed joblib file whose numpy arrays (LDA components,
+    cluster centers, labels) are memory-mapped on load instead of being read eagerly.
+
+    Parameters:
+    - root (str, optional): Directory of the registry.
+    """
+
+    def __init__(self, root=MODEL_REGISTRY_DIR):
+        self.root = root
+
+    def entry_path(self, name, data_fingerprint, params):
+        return os.path.join(self.root, name, f'{data_fingerprint}-{params_fingerprint(params)}')
+
+    def exists(self, name, data_fingerprint, params):
+        return os.path.exists(os.path.join(self.entry_path(name, data_fingerprint, params), 'meta.json'))
+
+    def save(self, name, data_fingerprint, params, model):
+        """
+        Register a fitted model; the metadata file is written last, marking the entry complete.
+        """
+        path = self.entry_path(name, data_fingerprint, params)
+        os.makedirs(path, exist_ok=True)
+        model_path = os.path.join(path, 'model.joblib')
+        joblib.dump(model, model_path + '.tmp')
+        os.replace(model_path + '.tmp', model_path)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'name': name, 'data_fingerprint': data_fingerprint, 'params': params,
+                       'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'size_bytes': os.path.getsize(model_path)},
+                      f, default=str)
+        return path
+
+    def load(self, name, data_fingerprint, params, mmap_mode='r'):
+        """
+        Load a registered model, memory-mapping its arrays (read-only) unless mmap_mode is None.
+        """
+        return joblib.load(os.path.join(self.entry_path(name, data_fingerprint, params), 'model.joblib'), mmap_mode=mmap_mode)
+
+    def load_or_train(self, name, data_fingerprint, params, train_fn, mmap_mode='r'):
+        """
+        Load the model trained on this data with these parameters, training and registering it first if needed.
+
+        Parameters:
+        - name (str): Model name, e.g. 'lda' or 'kmeans'.
+        - data_fingerprint (str): Content hash of the training data.
+        - params (dict): Hyperparameters; part of the key.
+        - train_fn (callable): Called without arguments to train the model on a registry miss.
+
+        Returns:
+        - model: The registered model.
+        """
+        if not self.exists(name, data_fingerprint, params):
+            self.save(name, data_fingerprint, params, train_fn())
+        return self.load(name, data_fingerprint, params, mmap_mode=mmap_mode)
+
+    def list_models(self):
+        """
+        Return a DataFrame with the metadata of every registered model.
+        """
+        rows = []
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                for entry in sorted(os.listdir(os.path.join(self.root, name))):
+                    meta_path = os.path.join(self.root, name, entry, 'meta.json')
+                    if os.path.exists(meta_path):
+                        with open(meta_path) as f:
+                            rows.append(json.load(f))
+        return pd.DataFrame(rows, columns=['name', 'data_fingerprint', 'params', 'created_at', 'size_bytes'])
@@ -0,0 +1,273 @@
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Directory holding the persisted signatures and syndication groups
+NEAR_DUPLICATE_STATE_DIR = os.getenv('NEAR_DUPLICATE_STATE_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models', 'near_duplicates')))
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Upper bound on shingles x permutations hashed at once (about 64 MB of uint64)
+_MAX_CELLS = 2 ** 23
+
+
+def shingle_hashes(texts, shingle_size=5):
+    """
+    Hash the word shingles (runs of `shingle_size` consecutive words) of every document.
+
+    Documents with fewer words than `shingle_size` have no shingles.
+
+    Returns:
+    - hashes (ndarray): uint32 hash of every shingle, document after document.
+    - offsets (ndarray): Start of every document's shingles in `hashes`, plus the total at the end.
+    """
+    tokens = pd.Series(list(texts), dtype=object).fillna('').astype(str).str.lower().str.findall(r'\w+')
+    lengths = tokens.str.len().to_numpy(dtype=np.int64)
+    flat = np.array([token for document in tokens for token in document], dtype=object)
+    token_hashes = pd.util.hash_array(flat) if len(flat) else np.empty(0, dtype=np.uint64)
+
+    # Combine every run of consecutive token hashes, then keep the runs inside one document
+    n_shingles = np.maximum(lengths - shingle_size + 1, 0)
+    combined = token_hashes[:max(len(token_hashes) - shingle_size + 1, 0)].copy()
+    for offset in range(1, shingle_size):
+        combined = combined * np.uint64(1000003) ^ token_hashes[offset:offset + len(combined)]
+    token_starts = np.cumsum(lengths) - lengths
+    starts = np.repeat(token_starts, n_shingles) + (np.arange(n_shingles.sum()) - np.repeat(np.cumsum(n_shingles) - n_shingles, n_shingles))
+    hashes = (combined[starts] & _MAX_HASH).astype(np.uint32) if len(starts) else np.empty(0, dtype=np.uint32)
+    return hashes, np.concatenate([[0], np.cumsum(n_shingles)])
+
+
+class NearDuplicateIndex:
+    """
+    Detect near-duplicate (syndicated) articles with MinHash signatures and LSH banding.
+
+    Every article is reduced to `num_perm` MinHash values of its word shingles, whose agreement
+    estimates the Jaccard similarity of two articles. The signature is cut into `bands` bands;
+    articles sharing a band land in the same bucket and become candidates, so checking a new
+    article costs a few dictionary lookups instead of a comparison with every article. A
+    candidate is a duplicate when its estimated similarity reaches `threshold`. The first
+    article of a syndication group is its canonical article.
+
+    Parameters:
+    - num_perm (int, optional): Number of MinHash permutations.
+    - bands (int, optional): Number of LSH bands; must divide num_perm.
+    - shingle_size (int, optional): Number of words per shingle.
+    - threshold (float, optional): Smallest estimated Jaccard similarity of near duplicates.
+    - seed (int, optional): Seed of the permutations.
+    """
+
+    def __init__(self, num_perm=128, bands=16, shingle_size=5, threshold=0.8, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.article_ids = []
+        self.source_names = []
+        self.canonical = np.empty(0, dtype=np.int64)
+        self._positions = {}
+        self._buckets = [{} for _ in range(bands)]
+
+    def __len__(self):
+        return len(self.article_ids)
+
+    def minhash(self, texts):
+        """
+        MinHash signatures of the documents, one uint32 row per document (all ones without shingles).
+        """
+        hashes, offsets = shingle_hashes(texts, self.shingle_size)
+        n_documents = len(offsets) - 1
+        signatures = np.full((n_documents, self.num_perm), _MAX_HASH, dtype=np.uint64)
+        counts = np.diff(offsets)
+        document = 0
+        while document < n_documents:
+            # Hash a run of whole documents holding at most _MAX_CELLS shingle x permutation cells
+            end = np.searchsorted(offsets, offsets[document] + max(_MAX_CELLS // self.num_perm, 1), side='right') - 1
+            end = min(max(end, document + 1), n_documents)
+            block = hashes[offsets[document]:offsets[end]].astype(np.uint64)
+            if len(block):
+                permuted = (block[:, None] * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+                non_empty = np.flatnonzero(counts[document:end])
+                starts = offsets[document:end][non_empty] - offsets[document]
+                signatures[document + non_empty] = np.minimum.reduceat(permuted, starts, axis=0)
+            document = end
+        return signatures.astype(np.uint32)
+
+    def _band_keys(self, signatures):
+        # One 64-bit key per document and band
+        rows = self.num_perm // self.bands
+        banded = signatures.reshape(len(signatures), self.bands, rows).astype(np.uint64)
+        keys = np.zeros(banded.shape[:2], dtype=np.uint64)
+        for row in range(rows):
+            keys = keys * np.uint64(4294967311) ^ banded[:, :, row]
+        return keys
+
+    def _index(self, position, keys):
+        for band, key in enumerate(keys.tolist()):
+            self._buckets[band].setdefault(key, []).append(position)
+
+    def add(self, article_ids, texts, source_names=None):
+        """
+        Check a batch of articles against every indexed article (and each other) and index them.
+
+        Articles indexed before keep their group.
+
+        Parameters:
+        - article_ids (iterable): Identifiers of the articles.
+        - texts (iterable of str): Their text, e.g. the full content.
+        - source_names (iterable, optional): Their source, for the syndication view.
+
+        Returns:
+        - assignments (DataFrame): 'article_id', 'canonical_id', 'is_duplicate' and 'similarity'
+          (estimated Jaccard similarity with the matched article, NaN for canonical articles).
+        """
+        article_ids = [str(article_id) for article_id in article_ids]
+        texts = list(texts)
+        source_names = [None] * len(article_ids) if source_names is None else list(source_names)
+        # Rows of articles not indexed yet; repeated ids in the batch are indexed once
+        new, seen = [], set()
+        for row, article_id in enumerate(article_ids):
+            if article_id not in self._positions and article_id not in seen:
+                seen.add(article_id)
+                new.append(row)
+
+        signatures = self.minhash([texts[i] for i in new])
+        keys = self._band_keys(signatures)
+        empty = (signatures == np.uint32(_MAX_HASH)).all(axis=1)
+        start = len(self.article_ids)
+        self.signatures = np.vstack([self.signatures, signatures])
+        canonical = np.concatenate([self.canonical, np.arange(start, start + len(new), dtype=np.int64)])
+        similarity = {}
+
+        for offset, row in enumerate(new):
+            position = start + offset
+            self._positions[article_ids[row]] = position
+            self.article_ids.append(article_ids[row])
+            self.source_names.append(source_names[row])
+            if empty[offset]:
+                continue
+            candidates = {candidate for band, key in enumerate(keys[offset].tolist())
+                          for candidate in self._buckets[band].get(key, ())}
+            if candidates:
+                candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+                agreement = (self.signatures[candidates] == signatures[offset]).mean(axis=1)
+                best = int(agreement.argmax())
+                if agreement[best] >= self.threshold:
+                    canonical[position] = canonical[candidates[best]]
+                    similarity[position] = float(agreement[best])
+            self._index(position, keys[offset])
+        self.canonical = canonical
+
+        positions = np.array([self._positions[article_id] for article_id in article_ids], dtype=np.int64)
+        canonical_ids = np.array(self.article_ids, dtype=object)[self.canonical[positions]]
+        return pd.DataFrame({
+            'article_id': article_ids,
+            'canonical_id': canonical_ids,
+            'is_duplicate': self.canonical[positions] != positions,
+            'similarity': [similarity.get(position, np.nan) for position in positions.tolist()],
+        })
+
+    def groups(self):
+        """
+        Every indexed article with its canonical article and source.
+        """
+        article_ids = np.array(self.article_ids, dtype=object)
+        return pd.DataFrame({'article_id': article_ids, 'canonical_id': article_ids[self.canonical],
+                             'source_name': self.source_names})
+
+    def syndication_groups(self):
+        """
+        The articles of every syndication group with more than one article.
+        """
+        groups = self.groups()
+        size = groups.groupby('canonical_id')['article_id'].transform('size')
+        return groups[size > 1].sort_values(['canonical_id', 'article_id']).reset_index(drop=True)
+
+    def syndication_sources(self):
+        """
+        Who syndicates whom: number of articles of `origin_source` republished by `republisher_source`.
+        """
+        groups = self.groups()
+        origin = groups.set_index('article_id')['source_name']
+        duplicates = groups[groups['article_id'] != groups['canonical_id']]
+        pairs = pd.DataFrame({'origin_source': origin.loc[duplicates['canonical_id']].to_numpy(),
+                              'republisher_source': duplicates['source_name'].to_numpy()})
+        counts = pairs.groupby(['origin_source', 'republisher_source'], dropna=False).size().reset_index(name='articles')
+        return counts.sort_values('articles', ascending=False, kind='stable').reset_index(drop=True)
+
+    def save(self, path=NEAR_DUPLICATE_STATE_DIR):
+        """
+        Persist the signatures and groups to a directory; the buckets are rebuilt on load.
+
+        The state is written to a temporary directory that then replaces `path`, so an interrupted
+        save never leaves a state mixing two versions.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+        np.savez(os.path.join(tmp_path, 'state.npz'), signatures=self.signatures, canonical=self.canonical,
+                 article_ids=np.array(self.article_ids, dtype=str),
+                 source_names=np.array(['' if name is None else str(name) for name in self.source_names], dtype=str))
+        with open(os.path.join(tmp_path, 'config.json'), 'w') as f:
+            json.dump({'num_perm': self.num_perm, 'bands': self.bands, 'shingle_size': self.shingle_size,
+                       'threshold': self.threshold, 'seed': self.seed}, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=NEAR_DUPLICATE_STATE_DIR):
+        """
+        Restore an index saved with `save`, or return a new one if `path` holds no state.
+        """
+        if not os.path.exists(os.path.join(path, 'state.npz')):
+            return cls()
+        with open(os.path.join(path, 'config.json')) as f:
+            index = cls(**json.load(f))
+        state = np.load(os.path.join(path, 'state.npz'))
+        index.signatures = state['signatures']
+        index.canonical = state['canonical']
+        index.article_ids = state['article_ids'].tolist()
+        index.source_names = [name or None for name in state['source_names'].tolist()]
+        index._positions = {article_id: position for position, article_id in enumerate(index.article_ids)}
+        empty = (index.signatures == np.uint32(_MAX_HASH)).all(axis=1)
+        for position, keys in enumerate(index._band_keys(index.signatures)):
+            if not empty[position]:
+                index._index(position, keys)
+        return index
+
+
+def detect_near_duplicates(data, index=None, batch_size=10000, text_column='full_content'):
+    """
+    Run near-duplicate detection over articles in one streaming pass.
+
+    Parameters:
+    - data (DataFrame or iterable of DataFrames): Articles with 'article_id', 'source_name' and the text column,
+      e.g. the chunks of iter_clean_data.
+    - index (NearDuplicateIndex, optional): Index holding the previously seen articles; a new one by default.
+    - batch_size (int, optional): Number of articles signed at once.
+    - text_column (str, optional): Column compared between articles.
+
+    Returns:
+    - assignments (DataFrame): The assignments of NearDuplicateIndex.add for every article, in order.
+    - index (NearDuplicateIndex): The index, now holding these articles too.
+    """
+    index = index if index is not None else NearDuplicateIndex()
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    assignments = []
+    for chunk in chunks:
+        for start in range(0, len(chunk), batch_size):
+            batch = chunk.iloc[start:start + batch_size]
+            assignments.append(index.add(batch['article_id'], batch[text_column], batch['source_name']))
+    assignments = pd.concat(assignments, ignore_index=True) if assignments else pd.DataFrame(
+        columns=['article_id', 'canonical_id', 'is_duplicate', 'similarity'])
+    return assignments, index
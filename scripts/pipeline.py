@@ -0,0 +1,330 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import joblib
+import multiprocessing
+import pandas as pd
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# Directory holding the stage outputs and the state of the last runs
+PIPELINE_DIR = os.getenv('PIPELINE_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models', 'pipeline')))
+
+# Number of stages run at the same time (each in its own process)
+PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', '2'))
+
+# Location of the raw CSV files read by the news pipeline
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'data'))
+
+
+def file_fingerprint(path):
+    # Cheap fingerprint of a source file from its path, size and modification time
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _peak_memory_mb():
+    # Peak resident memory of this process; every stage runs in a fresh process
+    try:
+        import resource
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+class _FreshProcessPool:
+    # Python 3.10 counterpart of ProcessPoolExecutor(max_tasks_per_child=1): a multiprocessing pool
+    # replacing its worker after every task, whose results are delivered as concurrent futures
+    def __init__(self, max_workers):
+        self._pool = multiprocessing.get_context().Pool(max_workers, maxtasksperchild=1)
+
+    def submit(self, func, *args):
+        future = Future()
+        self._pool.apply_async(func, args, callback=future.set_result, error_callback=future.set_exception)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._pool.close()
+        else:
+            self._pool.terminate()
+        self._pool.join()
+        return False
+
+
+def fresh_process_executor(max_workers):
+    """
+    Executor running every submitted task in a fresh worker process, so that the peak memory a
+    task reports is its own (max_tasks_per_child needs Python 3.11; older versions use a
+    multiprocessing pool with maxtasksperchild=1).
+    """
+    if sys.version_info >= (3, 11):
+        return ProcessPoolExecutor(max_workers=max_workers, max_tasks_per_child=1)
+    return _FreshProcessPool(max_workers)
+
+
+def _execute(func, inputs, params, output_path):
+    # Run one stage in a worker process: load its inputs, call it and persist its output.
+    # `inputs` holds (path, is_source) pairs; sources are passed as their path
+    started = time.perf_counter()
+    inputs = [path if is_source else joblib.load(path) for path, is_source in inputs]
+    output = func(*inputs, **params)
+    fingerprint = joblib.hash(output)
+    joblib.dump(output, output_path + '.tmp')
+    os.replace(output_path + '.tmp', output_path)
+    return {'seconds': time.perf_counter() - started, 'peak_memory_mb': _peak_memory_mb(), 'fingerprint': fingerprint}
+
+
+class Stage:
+    """
+    A step of a pipeline: a function of the outputs of other stages (or of source files).
+
+    Parameters:
+    - name (str): Unique name of the stage, used by the stages depending on it.
+    - func (callable): Module-level function called as func(*inputs, **params); its return value is the
+      stage output and must be picklable.
+    - inputs (list of str, optional): Names of the stages or sources whose outputs are passed, in order.
+      A source is passed as its file path.
+    - params (dict, optional): Keyword arguments of `func`; part of the stage key.
+    """
+
+    def __init__(self, name, func, inputs=(), params=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+
+    def key(self, input_fingerprints):
+        # Changes with the function, its parameters or the content of any input
+        raw = json.dumps([self.name, self.func.__module__, self.func.__qualname__, self.params, input_fingerprints],
+                         sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class Pipeline:
+    """
+    Run stages in dependency order, skipping the stages whose inputs have not changed.
+
+    Every stage output is persisted with the fingerprint of its content. A stage is rerun only when
+    its key (function, parameters and input fingerprints) differs from its last run, so new data
+    only reruns the stages depending on it, and a rerun producing the same output as before
+    leaves the stages after it cached. Independent stages run concurrently, each in a fresh
+    process, which records the wall time and peak memory of the stage.
+
+    Parameters:
+    - stages (list of Stage): The stages; their inputs refer to stage or source names.
+    - sources (dict, optional): Source file paths keyed by name, fingerprinted by size and modification time.
+    - root (str, optional): Directory holding the stage outputs and the run state.
+    """
+
+    def __init__(self, stages, sources=None, root=PIPELINE_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.sources = dict(sources or {})
+        self.root = root
+        for stage in stages:
+            unknown = [name for name in stage.inputs if name not in self.stages and name not in self.sources]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} depends on unknown inputs: {unknown}")
+
+    @property
+    def state_path(self):
+        return os.path.join(self.root, 'state.json')
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        with open(self.state_path + '.tmp', 'w') as f:
+            json.dump(state, f, indent=1)
+        os.replace(self.state_path + '.tmp', self.state_path)
+
+    def _required(self, targets):
+        # The target stages and every stage they depend on
+        required, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name in self.stages and name not in required:
+                required.add(name)
+                pending.extend(self.stages[name].inputs)
+        return required
+
+    def output(self, name):
+        """
+        Load the last output of a stage.
+        """
+        return joblib.load(self.load_state()[name]['path'])
+
+    def run(self, targets=None, max_workers=PIPELINE_WORKERS, force=()):
+        """
+        Bring the target stages up to date.
+
+        Parameters:
+        - targets (list of str, optional): Stages to produce; every stage by default.
+        - max_workers (int, optional): Number of stages run at the same time.
+        - force (list of str, optional): Stages rerun even when their inputs have not changed.
+
+        Returns:
+        - report (DataFrame): Per stage (in completion order) its 'status' ('ran' or 'cached'),
+          'seconds' (wall time) and 'peak_memory_mb' of the run that produced its output.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        state = self.load_state()
+        remaining = self._required(targets or list(self.stages))
+        fingerprints = {name: file_fingerprint(path) for name, path in self.sources.items()}
+        paths = dict(self.sources)
+        report, running = [], {}
+        started = time.perf_counter()
+
+        with fresh_process_executor(max(max_workers, 1)) as executor:
+            while remaining or running:
+                ready = [name for name in sorted(remaining)
+                         if all(input_name in fingerprints for input_name in self.stages[name].inputs)]
+                for name in ready:
+                    remaining.discard(name)
+                    stage = self.stages[name]
+                    key = stage.key([fingerprints[input_name] for input_name in stage.inputs])
+                    previous = state.get(name, {})
+                    if name not in force and previous.get('key') == key and os.path.exists(previous.get('path', '')):
+                        fingerprints[name], paths[name] = previous['fingerprint'], previous['path']
+                        report.append({'stage': name, 'status': 'cached', 'seconds': previous['seconds'],
+                                       'peak_memory_mb': previous['peak_memory_mb']})
+                        continue
+                    output_path = os.path.join(self.root, f'{name}-{key}.joblib')
+                    inputs = [(paths[input_name], input_name in self.sources) for input_name in stage.inputs]
+                    future = executor.submit(_execute, stage.func, inputs, stage.params, output_path)
+                    running[future] = (name, key, output_path)
+                if not running:
+                    # Cached stages may have made others ready; without any, the rest wait on each other
+                    if remaining and not ready:
+                        raise ValueError(f"Stages with circular dependencies: {sorted(remaining)}")
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key, output_path = running.pop(future)
+                    result = future.result()
+                    old_path = state.get(name, {}).get('path')
+                    if old_path and old_path != output_path and os.path.exists(old_path):
+                        os.remove(old_path)
+                    state[name] = {'key': key, 'path': output_path, 'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'), **result}
+                    # Saved after every stage, so an interrupted run resumes from the finished stages
+                    self._save_state(state)
+                    fingerprints[name], paths[name] = result['fingerprint'], output_path
+                    report.append({'stage': name, 'status': 'ran', 'seconds': result['seconds'],
+                                   'peak_memory_mb': result['peak_memory_mb']})
+
+        report = pd.DataFrame(report, columns=['stage', 'status', 'seconds', 'peak_memory_mb'])
+        report.attrs['wall_seconds'] = time.perf_counter() - started
+        return report
+
+
+# News analysis pipeline: the modeling and database steps of parse_news_data.ipynb as stages
+
+def clean_articles(path):
+    from scripts.helper import clean_data
+    return clean_data(pd.read_csv(path)).reset_index(drop=True)
+
+
+def clean_domains(path):
+    from scripts.helper import clean_data
+    return clean_data(pd.read_csv(path))
+
+
+def clean_ratings(path):
+    from scripts.helper import clean_data
+    return clean_data(pd.read_csv(path))
+
+
+def tfidf_features(data_df):
+    # Title + full content TF-IDF shared through the feature store
+    from scripts.feature_store import FeatureStore
+    tfidf_matrix, vectorizer = FeatureStore().get_or_build('tfidf', data_df)
+    return {'matrix': tfidf_matrix.copy(), 'vectorizer': vectorizer}
+
+
+def _top_keywords(components, vocabulary, top_n=10):
+    # Most weighted words of every topic or cluster center, least weighted first
+    return [[vocabulary[index] for index in component.argsort()[-top_n:]] for component in components]
+
+
+def lda_topics(tfidf, n_topics=10, random_state=42):
+    from sklearn.decomposition import LatentDirichletAllocation
+    lda = LatentDirichletAllocation(n_components=n_topics, random_state=random_state).fit(tfidf['matrix'])
+    return {'model': lda, 'topics': _top_keywords(lda.components_, tfidf['vectorizer'].get_feature_names_out()),
+            'assignments': lda.transform(tfidf['matrix']).argmax(axis=1)}
+
+
+def kmeans_events(tfidf, n_clusters=10, random_state=42):
+    from sklearn.cluster import KMeans
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state).fit(tfidf['matrix'])
+    keywords = _top_keywords(kmeans.cluster_centers_, tfidf['vectorizer'].get_feature_names_out())
+    return {'model': kmeans, 'labels': kmeans.labels_, 'descriptions': [', '.join(words) for words in keywords]}
+
+
+def log_models(topics, events):
+    import mlflow
+    import mlflow.sklearn
+    with mlflow.start_run(run_name="LDA_Topic_Modeling"):
+        mlflow.log_param("n_components", topics['model'].n_components)
+        mlflow.sklearn.log_model(topics['model'], "LDA_model")
+        for i, topic in enumerate(topics['topics']):
+            mlflow.log_text(f"Topic {i+1}: {', '.join(topic)}", f"topic_{i+1}.txt")
+    with mlflow.start_run(run_name="KMeans_Event_Clustering"):
+        mlflow.log_param("n_clusters", events['model'].n_clusters)
+        mlflow.sklearn.log_model(events['model'], "KMeans_model")
+        for i, center in enumerate(events['model'].cluster_centers_):
+            mlflow.log_text(f"Cluster {i+1} center: {center}", f"cluster_{i+1}_center.txt")
+
+
+def load_database(data_df, domains_location_df, rating_df, tfidf, topics, events, progress_path=None, engine=None):
+    from src.db.db_config import Base, init_db
+    from src.db.loader import load_articles, load_domain_locations, load_run_key, with_title_sentiment
+    from src.db.sparse_codec import vocabulary_version
+    if engine is None:
+        init_db()
+    else:
+        import src.db.models  # noqa: F401 (registers the tables)
+        Base.metadata.create_all(bind=engine)
+    # The sentiment labels of the articles live in rating.csv
+    data_df = with_title_sentiment(data_df, rating_df)
+    data_df = data_df.assign(topic=topics['assignments'], cluster=events['labels'], event_description=[events['descriptions'][label] for label in events['labels']])
+    version = vocabulary_version(tfidf['vectorizer'].get_feature_names_out())
+    # The key covers the ratings, topics and events too: a rerun of this stage after any of them
+    # changed must reload the articles, not resume the finished load
+    stats = load_articles(data_df, tfidf['matrix'], topics['topics'], engine=engine, progress_path=progress_path,
+                          run_key=load_run_key(data_df, topics['topics'], version), vocabulary_version=version)
+    load_domain_locations(domains_location_df, engine=engine)
+    return stats
+
+
+def news_pipeline(data_dir=DATA_DIR, root=PIPELINE_DIR, n_topics=10, n_clusters=10):
+    """
+    The news analysis pipeline: clean, TF-IDF, LDA topics and K-Means events (run concurrently),
+    MLflow logging and the database load.
+    """
+    stages = [
+        Stage('clean_data', clean_articles, ['data_csv']),
+        Stage('clean_domains', clean_domains, ['domains_location_csv']),
+        Stage('clean_ratings', clean_ratings, ['rating_csv']),
+        Stage('tfidf', tfidf_features, ['clean_data']),
+        Stage('topics', lda_topics, ['tfidf'], {'n_topics': n_topics}),
+        Stage('events', kmeans_events, ['tfidf'], {'n_clusters': n_clusters}),
+        Stage('mlflow', log_models, ['topics', 'events']),
+        # The progress file lets an interrupted load resume after its last committed batch
+        Stage('database', load_database, ['clean_data', 'clean_domains', 'clean_ratings', 'tfidf', 'topics', 'events'],
+              {'progress_path': os.path.join(root, 'load_progress.json')}),
+    ]
+    sources = {'data_csv': os.path.join(data_dir, 'data.csv'),
+               'domains_location_csv': os.path.join(data_dir, 'domains_location.csv'),
+               'rating_csv': os.path.join(data_dir, 'rating.csv')}
+    return Pipeline(stages, sources, root=root)
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+from scripts.article_frame import text_lengths, text_word_counts
+
+
+def content_lengths(texts):
+    """
+    Number of characters of every text (0 for missing texts), computed on Arrow strings.
+    """
+    return text_lengths(texts)
+
+
+def word_counts(texts):
+    """
+    Number of whitespace-separated words of every text (0 for missing texts), like len(text.split()).
+    """
+    return text_word_counts(texts)
+
+
+def box_summaries(values, groups, max_outliers=20, seed=0):
+    """
+    Summarize the distribution of every group as the statistics drawn by a box plot.
+
+    The quartiles use linear interpolation and the whiskers end at the most extreme values within
+    1.5 IQR of the box, like px.box. Only up to `max_outliers` points beyond the whiskers are kept
+    per group (always including the smallest and largest one), so the size of the summary depends
+    on the number of groups, not on the number of values.
+
+    Parameters:
+    - values (array-like): The numeric value of every row.
+    - groups (array-like): The group of every row; rows with a missing group are ignored.
+    - max_outliers (int, optional): Number of outliers kept per group.
+    - seed (int, optional): Seed of the outlier sample.
+
+    Returns:
+    - summary (DataFrame): Per group (sorted) 'count', 'mean', 'q1', 'median', 'q3', 'lowerfence',
+      'upperfence' and 'outliers' (the total number of outliers).
+    - outliers (DataFrame): The sampled outliers, with 'group' and 'value' columns.
+    """
+    frame = pd.DataFrame({'group': pd.Series(groups).to_numpy(), 'value': pd.Series(values, dtype=float).to_numpy()})
+    frame = frame[frame['group'].notna() & frame['value'].notna()]
+    grouped = frame.groupby('group', sort=True)['value']
+    summary = grouped.agg(['count', 'mean'])
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    summary['q1'], summary['median'], summary['q3'] = quartiles[0.25], quartiles[0.5], quartiles[0.75]
+
+    # Whiskers: most extreme values inside the 1.5 IQR limits of their group
+    iqr = (summary['q3'] - summary['q1']).to_numpy()
+    codes = summary.index.get_indexer(frame['group'])
+    low_limit = (summary['q1'].to_numpy() - 1.5 * iqr)[codes]
+    high_limit = (summary['q3'].to_numpy() + 1.5 * iqr)[codes]
+    value = frame['value'].to_numpy()
+    inside = (value >= low_limit) & (value <= high_limit)
+    summary['lowerfence'] = pd.Series(value[inside]).groupby(codes[inside]).min().reindex(range(len(summary))).to_numpy()
+    summary['upperfence'] = pd.Series(value[inside]).groupby(codes[inside]).max().reindex(range(len(summary))).to_numpy()
+
+    # Sample the outliers, the extremes of every group first
+    outlier_rows = np.flatnonzero(~inside)
+    summary['outliers'] = np.bincount(codes[outlier_rows], minlength=len(summary))
+    outliers = pd.DataFrame({'code': codes[outlier_rows], 'value': value[outlier_rows],
+                             'priority': np.random.default_rng(seed).random(len(outlier_rows))})
+    by_code = outliers.groupby('code')['value']
+    outliers.loc[by_code.idxmin().to_numpy(), 'priority'] = -1.0
+    outliers.loc[by_code.idxmax().to_numpy(), 'priority'] = -1.0
+    outliers = outliers.sort_values(['code', 'priority'], kind='stable')
+    outliers = outliers[outliers.groupby('code').cumcount() < max_outliers]
+    outliers = pd.DataFrame({'group': summary.index.to_numpy()[outliers['code'].to_numpy()],
+                             'value': outliers['value'].to_numpy()})
+    return summary, outliers
+
+
+def length_summaries(data_df, max_outliers=20):
+    """
+    Box summaries (see box_summaries) of the content length and title word count of every source.
+
+    Returns:
+    - summaries (dict): 'content_length' and 'title_word_count', each a (summary, outliers) pair.
+    """
+    return {
+        'content_length': box_summaries(content_lengths(data_df['full_content']), data_df['source_name'], max_outliers),
+        'title_word_count': box_summaries(word_counts(data_df['title']), data_df['source_name'], max_outliers),
+    }
+
+
+def downsample_points(df, x, y, max_points=5000, bins=50, seed=0):
+    """
+    Thin a scatter plot to at most `max_points` rows while keeping its sparse regions intact.
+
+    The plane is cut into a bins x bins grid and every cell keeps at most the same number of
+    points, chosen as large as the budget allows; sparse cells (outliers, tails) keep all their
+    points and only the dense cells are thinned.
+
+    Parameters:
+    - df (DataFrame): The points.
+    - x, y (str): Columns holding the coordinates.
+    - max_points (int, optional): Largest number of rows returned.
+    - bins (int, optional): Number of grid cells along each axis.
+    - seed (int, optional): Seed of the sample taken in dense cells.
+
+    Returns:
+    - sample (DataFrame): The kept rows of `df`, in their original order.
+    """
+    if len(df) <= max_points:
+        return df
+    cells = np.zeros(len(df), dtype=np.int64)
+    for column in (x, y):
+        values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+        finite = np.isfinite(values)
+        low, high = (values[finite].min(), values[finite].max()) if finite.any() else (0.0, 0.0)
+        scaled = np.nan_to_num((values - low) / (high - low)) if high > low else np.zeros(len(values))
+        codes = np.clip((scaled * bins).astype(np.int64), 0, bins - 1)
+        # Missing coordinates get a cell of their own
+        codes[~finite] = bins
+        cells = cells * (bins + 1) + codes
+
+    # Largest per-cell cap whose total stays within the budget
+    _, inverse, counts = np.unique(cells, return_inverse=True, return_counts=True)
+    low, high = 1, int(counts.max())
+    while low < high:
+        middle = (low + high + 1) // 2
+        if np.minimum(counts, middle).sum() <= max_points:
+            low = middle
+        else:
+            high = middle - 1
+
+    # Rank of every row within its cell, in a random order
+    inverse = inverse.ravel()
+    order = np.lexsort((np.random.default_rng(seed).random(len(df)), inverse))
+    starts = np.cumsum(counts) - counts
+    rank = np.empty(len(df), dtype=np.int64)
+    rank[order] = np.arange(len(df)) - starts[inverse[order]]
+    return df.iloc[np.flatnonzero(rank < low)[:max_points]]
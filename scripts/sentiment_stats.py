@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# Sentiment labels in the order of their numeric values -1, 0 and 1
+SENTIMENT_LABELS = ['Negative', 'Neutral', 'Positive']
+SENTIMENT_MAPPING = {'Negative': -1, 'Neutral': 0, 'Positive': 1}
+COUNT_COLUMNS = ['negative', 'neutral', 'positive', 'unrated']
+
+
+def encode_sentiment(labels):
+    """
+    Encode sentiment labels as small integer codes: 0, 1, 2 for Negative, Neutral, Positive and 3 for anything else.
+    """
+    codes = pd.Categorical(labels, categories=SENTIMENT_LABELS).codes.astype(np.int8)
+    codes[codes < 0] = 3
+    return codes
+
+
+def sentiment_values(labels):
+    """
+    Numeric sentiment (-1, 0, 1) of every label, NaN for missing or unknown labels.
+    """
+    codes = encode_sentiment(labels)
+    return np.where(codes < 3, codes - 1.0, np.nan)
+
+
+def sentiment_counts(df, by='source_name', sentiment_column='title_sentiment', dropna=True):
+    """
+    Count the negative, neutral, positive and unrated titles of every group in one vectorized pass.
+
+    Titles with a label other than the three sentiments count as unrated, and are also counted
+    per label in one extra column for each such label, so distributions keep them.
+    The counts are a mergeable summary: counts of disjoint batches of ratings combine with
+    merge_counts, and every statistic of sentiment_statistics follows exactly from them.
+
+    Parameters:
+    - df (DataFrame): Ratings with a group column and a sentiment label column.
+    - by (str, optional): Column to group by.
+    - sentiment_column (str, optional): Column holding the sentiment labels.
+    - dropna (bool, optional): Ignore rows with a missing group; if False they are counted in a last NaN group.
+
+    Returns:
+    - counts (DataFrame): One row per group (sorted), with the COUNT_COLUMNS followed by the other labels (sorted).
+    """
+    group_codes, groups = pd.factorize(df[by], sort=True, use_na_sentinel=dropna)
+    codes = encode_sentiment(df[sentiment_column])
+    keep = group_codes >= 0
+    flat = np.bincount(group_codes[keep] * 4 + codes[keep], minlength=len(groups) * 4)
+    counts = pd.DataFrame(flat.reshape(len(groups), 4), index=pd.Index(groups, name=by), columns=COUNT_COLUMNS)
+    labels = df[sentiment_column]
+    other = keep & (codes == 3) & labels.notna().to_numpy()
+    if other.any():
+        label_codes, other_labels = pd.factorize(labels[other], sort=True)
+        flat = np.bincount(group_codes[other] * len(other_labels) + label_codes, minlength=len(groups) * len(other_labels))
+        counts[list(other_labels)] = flat.reshape(len(groups), len(other_labels))
+    return counts
+
+
+def merge_counts(*counts):
+    """
+    Combine the sentiment counts of several batches of ratings.
+    """
+    merged = pd.concat(counts).fillna(0).groupby(level=0, dropna=False).sum().astype(np.int64)
+    return merged[COUNT_COLUMNS + sorted(set(merged.columns) - set(COUNT_COLUMNS), key=str)]
+
+
+def median_from_counts(negative, neutral, positive):
+    """
+    Exact median of -1/0/1 samples given the count of every value (mean of the two middle values, NaN if empty).
+    """
+    negative, neutral, positive = (np.asarray(values, dtype=np.int64) for values in (negative, neutral, positive))
+    n = negative + neutral + positive
+    lower, upper = (n - 1) // 2, n // 2
+
+    def value_at(position):
+        return np.where(position < negative, -1, np.where(position < negative + neutral, 0, 1))
+
+    return np.where(n > 0, (value_at(lower) + value_at(upper)) / 2, np.nan)
+
+
+def sentiment_statistics(counts):
+    """
+    Descriptive sentiment statistics per group, computed from sentiment counts.
+
+    Returns:
+    - stats (DataFrame): Per group the number of reports (all rows), the number of rated titles
+      ('count'), and the mean, median and sample variance (ddof=1) of the numeric sentiment.
+    """
+    negative, neutral, positive = (counts[column].to_numpy(dtype=np.int64) for column in ['negative', 'neutral', 'positive'])
+    rated = negative + neutral + positive
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total = (positive - negative).astype(float)
+        mean = np.where(rated > 0, total / rated, np.nan)
+        # Sum of squares is positive + negative for values in {-1, 0, 1}
+        variance = np.where(rated > 1, ((positive + negative) - total * total / rated) / (rated - 1), np.nan)
+    return pd.DataFrame({
+        'total_reports': rated + counts['unrated'].to_numpy(dtype=np.int64),
+        'count': rated,
+        'mean_sentiment': mean,
+        'median_sentiment': median_from_counts(negative, neutral, positive),
+        'variance_sentiment': variance,
+    }, index=counts.index)
+
+
+def sentiment_distribution(counts, name='title_sentiment'):
+    """
+    Share of every label among the labelled titles of the given groups, most frequent first.
+
+    Matches value_counts(normalize=True) of the labels: other labels are kept and missing labels are ignored.
+    """
+    labels = SENTIMENT_LABELS + [column for column in counts.columns if column not in COUNT_COLUMNS]
+    totals = counts[['negative', 'neutral', 'positive'] + labels[len(SENTIMENT_LABELS):]].sum().to_numpy()
+    distribution = pd.Series(totals / max(totals.sum(), 1), index=pd.Index(labels, name=name), name='proportion')
+    return distribution[totals > 0].sort_values(ascending=False, kind='stable')
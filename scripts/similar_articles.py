@@ -0,0 +1,268 @@
+import os
+import copy
+import json
+import time
+import pickle
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Directory holding the persisted similar-article index
+SIMILAR_ARTICLES_STATE_DIR = os.getenv('SIMILAR_ARTICLES_STATE_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models', 'similar_articles')))
+
+# Rows projected at once when hashing (bounds the dense projection block)
+_HASH_CHUNK = 10000
+
+
+class SimilarArticleIndex:
+    """
+    Approximate nearest-neighbour index answering "which articles are most similar to this one"
+    by cosine similarity of their TF-IDF vectors.
+
+    Every article vector is hashed by random projections (SimHash): the signs of `n_bits` projections
+    form its key in each of `n_tables` tables, and similar articles tend to share keys. A query
+    collects the articles sharing a key with it in any table (with `multi_probe`, also the keys one
+    bit away), then re-ranks only these candidates by their exact cosine similarity, instead of
+    comparing the query with the whole corpus. The keys of all tables are kept in one sorted array
+    (prefixed by their table), so all the probes of a query are one vectorized binary search.
+
+    The first batch fits the vectorizer; later batches are transformed with it and added
+    incrementally, so article vectors (and the index) never need rebuilding.
+
+    Parameters:
+    - n_tables (int, optional): Number of hash tables; more tables raise recall and query time.
+    - n_bits (int, optional): Projections per table (at most 32); more bits make smaller buckets. By
+      default it grows with the log2 of the first batch, keeping buckets small as corpora grow.
+    - multi_probe (bool, optional): Also probe the buckets whose key differs by one bit.
+    - vectorizer (TfidfVectorizer, optional): An unfitted vectorizer; the default matches the event TF-IDF.
+    - seed (int, optional): Seed of the random projections.
+    """
+
+    def __init__(self, n_tables=24, n_bits=None, multi_probe=True, vectorizer=None, seed=0):
+        if n_bits is not None and not 0 < n_bits <= 32:
+            raise ValueError("n_bits must be between 1 and 32.")
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.multi_probe = multi_probe
+        self.seed = seed
+        self.vectorizer = vectorizer or TfidfVectorizer(max_df=0.8, min_df=2, stop_words='english', max_features=20000)
+        self.projection = None
+        self.vectors = None
+        self.keys = np.empty((0, n_tables), dtype=np.uint64)
+        self.article_ids = []
+        self._positions = {}
+        self._tables = None
+        self._ids = None
+
+    def __len__(self):
+        return len(self.article_ids)
+
+    def _draw_projection(self, n_features):
+        rng = np.random.default_rng(self.seed)
+        self.projection = rng.standard_normal((n_features, self.n_tables * self.n_bits), dtype=np.float32)
+
+    def hash(self, matrix):
+        """
+        Key of every row of a TF-IDF matrix in every table, as a (rows, n_tables) uint64 array.
+        """
+        keys = np.empty((matrix.shape[0], self.n_tables), dtype=np.uint64)
+        weights = np.uint64(1) << np.arange(self.n_bits, dtype=np.uint64)
+        for start in range(0, matrix.shape[0], _HASH_CHUNK):
+            signs = np.asarray(matrix[start:start + _HASH_CHUNK] @ self.projection) > 0
+            bits = signs.reshape(-1, self.n_tables, self.n_bits).astype(np.uint64)
+            keys[start:start + _HASH_CHUNK] = (bits * weights).sum(axis=2, dtype=np.uint64)
+        return keys
+
+    def add(self, article_ids, texts):
+        """
+        Index a batch of articles; articles indexed before (and repeated ids) are skipped.
+
+        Parameters:
+        - article_ids (iterable): Identifiers of the articles.
+        - texts (iterable of str): Their text (title + full content), e.g. a lazy ArticleText view.
+
+        Returns:
+        - added (int): Number of articles added to the index.
+        """
+        new_ids, new_texts, seen = [], [], set()
+        for article_id, text in zip(article_ids, texts):
+            article_id = str(article_id)
+            if article_id not in self._positions and article_id not in seen:
+                seen.add(article_id)
+                new_ids.append(article_id)
+                new_texts.append('' if text is None or text is pd.NA else text)
+        if not new_ids:
+            return 0
+
+        if self.projection is None:
+            matrix = self.vectorizer.fit_transform(new_texts)
+            if self.n_bits is None:
+                self.n_bits = int(np.clip(np.log2(len(new_ids)) - 2, 8, 20))
+            self._draw_projection(matrix.shape[1])
+        else:
+            matrix = self.vectorizer.transform(new_texts)
+        matrix = sp.csr_matrix(matrix, dtype=np.float32)
+        self.vectors = matrix if self.vectors is None else sp.vstack([self.vectors, matrix], format='csr')
+        self.keys = np.vstack([self.keys, self.hash(matrix)])
+        self._positions.update((article_id, position) for position, article_id in enumerate(new_ids, start=len(self.article_ids)))
+        self.article_ids.extend(new_ids)
+        self._tables = self._ids = None
+        return len(new_ids)
+
+    def _table_keys(self, keys):
+        # Keys prefixed by their table number, so that the buckets of all tables share one key space
+        return keys | (np.arange(self.n_tables, dtype=np.uint64) << np.uint64(self.n_bits))
+
+    def _sorted_tables(self):
+        # Prefixed keys of all tables in ascending order and the positions of the articles holding them
+        if self._tables is None:
+            keys = self._table_keys(self.keys).ravel()
+            order = np.argsort(keys, kind='stable')
+            self._tables = (keys[order], order // self.n_tables)
+        return self._tables
+
+    def _candidates(self, keys):
+        # Positions of the articles sharing a probed bucket with a query, in any table
+        sorted_keys, positions = self._sorted_tables()
+        flips = np.uint64(1) << np.arange(self.n_bits, dtype=np.uint64) if self.multi_probe else np.empty(0, dtype=np.uint64)
+        flips = np.concatenate([np.zeros(1, dtype=np.uint64), flips])
+        probes = self._table_keys(keys[None, :] ^ flips[:, None]).ravel()
+        lo = np.searchsorted(sorted_keys, probes, side='left')
+        hi = np.searchsorted(sorted_keys, probes, side='right')
+        lengths = hi - lo
+        # Concatenate the ranges positions[lo:hi] of every probe without a Python loop
+        offsets = np.repeat(lo - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        return np.unique(positions[offsets])
+
+    def _search(self, matrix, keys, k, exclude=None):
+        # Top k candidates of every query row by exact cosine similarity
+        results = []
+        for row in range(matrix.shape[0]):
+            candidates = self._candidates(keys[row])
+            if exclude is not None:
+                candidates = candidates[candidates != exclude[row]]
+            # A dense query makes the re-ranking a sparse matrix-vector product
+            scores = self.vectors[candidates] @ matrix[row].toarray().ravel()
+            top = np.argsort(-scores, kind='stable')[:k]
+            # Articles sharing no term with the query are not similar to it
+            top = top[scores[top] > 0]
+            results.append((candidates[top], scores[top]))
+        return results
+
+    def _id_array(self):
+        if self._ids is None:
+            self._ids = np.array(self.article_ids, dtype=object)
+        return self._ids
+
+    def _ranked(self, positions, scores):
+        return pd.DataFrame({'article_id': self._id_array()[positions], 'similarity': scores,
+                             'rank': np.arange(1, len(positions) + 1)})
+
+    def _frame(self, results, queries):
+        article_ids = self._id_array()
+        return pd.DataFrame({
+            'query': np.repeat(queries, [len(positions) for positions, _ in results]),
+            'article_id': article_ids[np.concatenate([positions for positions, _ in results])] if results else [],
+            'similarity': np.concatenate([scores for _, scores in results]) if results else [],
+            'rank': np.concatenate([np.arange(1, len(positions) + 1) for positions, _ in results]) if results else [],
+        })
+
+    def similar(self, article_id, k=10):
+        """
+        The indexed articles most similar to an indexed article, most similar first.
+
+        Fewer than `k` articles are returned when fewer share a probed bucket and a term with the article.
+
+        Returns:
+        - similar (DataFrame): 'article_id', 'similarity' (cosine) and 'rank'.
+        """
+        position = self._positions.get(str(article_id))
+        if position is None:
+            raise KeyError(f"Article {article_id!r} is not indexed.")
+        [(positions, scores)] = self._search(self.vectors[position], self.keys[position:position + 1], k, exclude=[position])
+        return self._ranked(positions, scores)
+
+    def query(self, texts, k=10):
+        """
+        The indexed articles most similar to every text (e.g. an article not indexed yet).
+
+        Returns:
+        - similar (DataFrame): 'query' (position of the text), 'article_id', 'similarity' and 'rank'.
+        """
+        matrix = sp.csr_matrix(self.vectorizer.transform(list(texts)), dtype=np.float32)
+        return self._frame(self._search(matrix, self.hash(matrix), k), np.arange(matrix.shape[0]))
+
+    def exact_similar(self, article_id, k=10):
+        """
+        Brute-force counterpart of `similar`, comparing the article with every indexed article.
+        """
+        position = self._positions[str(article_id)]
+        scores = self.vectors @ self.vectors[position].toarray().ravel()
+        scores[position] = -np.inf
+        top = np.argsort(-scores, kind='stable')[:k]
+        top = top[scores[top] > 0]
+        return self._ranked(top, scores[top])
+
+    def save(self, path=SIMILAR_ARTICLES_STATE_DIR):
+        """
+        Persist the vectorizer, article vectors, keys and ids to a directory; the projections are
+        redrawn from the seed and the sorted tables rebuilt on load.
+        """
+        os.makedirs(path, exist_ok=True)
+        vectors = self.vectors if self.vectors is not None else sp.csr_matrix((0, 0), dtype=np.float32)
+        np.savez(os.path.join(path, 'state.npz'), data=vectors.data, indices=vectors.indices, indptr=vectors.indptr,
+                 shape=np.array(vectors.shape), keys=self.keys, article_ids=np.array(self.article_ids, dtype=str))
+        # The stop word set is only kept by sklearn for introspection; it is dropped from a copy,
+        # since the index (and its vectorizer) may be shared while it is saved
+        vectorizer = copy.copy(self.vectorizer)
+        vectorizer.stop_words_ = None
+        with open(os.path.join(path, 'vectorizer.pkl'), 'wb') as f:
+            pickle.dump(vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(path, 'config.json'), 'w') as f:
+            json.dump({'n_tables': self.n_tables, 'n_bits': self.n_bits, 'multi_probe': self.multi_probe, 'seed': self.seed}, f)
+
+    @classmethod
+    def load(cls, path=SIMILAR_ARTICLES_STATE_DIR):
+        """
+        Restore an index saved with `save`, or return a new one if `path` holds no state.
+        """
+        if not os.path.exists(os.path.join(path, 'state.npz')):
+            return cls()
+        with open(os.path.join(path, 'config.json')) as f:
+            index = cls(**json.load(f))
+        state = np.load(os.path.join(path, 'state.npz'))
+        index.article_ids = state['article_ids'].tolist()
+        if index.article_ids:
+            with open(os.path.join(path, 'vectorizer.pkl'), 'rb') as f:
+                index.vectorizer = pickle.load(f)
+            index.vectors = sp.csr_matrix((state['data'], state['indices'], state['indptr']), shape=tuple(state['shape']))
+            index.keys = state['keys']
+            index._draw_projection(index.vectors.shape[1])
+            index._positions = {article_id: position for position, article_id in enumerate(index.article_ids)}
+        return index
+
+
+def evaluate_recall(index, k=10, n_queries=100, seed=0):
+    """
+    Recall of the approximate search against brute force on random indexed articles.
+
+    Returns:
+    - report (dict): 'recall' (share of the exact top k found), 'ann_ms' and 'exact_ms' (mean query
+      times in milliseconds) and 'queries'.
+    """
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(index.article_ids, size=min(n_queries, len(index)), replace=False)
+    found, expected, ann_seconds, exact_seconds = 0, 0, 0.0, 0.0
+    for article_id in queries:
+        started = time.perf_counter()
+        approximate = index.similar(article_id, k)
+        ann_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        exact = index.exact_similar(article_id, k)
+        exact_seconds += time.perf_counter() - started
+        found += len(set(approximate['article_id']) & set(exact['article_id']))
+        expected += len(exact)
+    n = max(len(queries), 1)
+    return {'recall': found / max(expected, 1), 'ann_ms': 1000 * ann_seconds / n,
+            'exact_ms': 1000 * exact_seconds / n, 'queries': len(queries)}
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+# Location codes of the countries in each region
+AFRICA_LOCATIONS = [
+    'DZ', 'AO', 'BJ', 'BW', 'BF', 'BI', 'CV', 'CM', 'CF', 'TD', 'KM', 'CG', 'CD',
+    'DJ', 'EG', 'GQ', 'ER', 'SZ', 'ET', 'GA', 'GM', 'GH', 'GN', 'GW', 'KE', 'LS',
+    'LR', 'LY', 'MG', 'MW', 'ML', 'MR', 'MU', 'YT', 'MA', 'MZ', 'NA', 'NE', 'NG',
+    'RE', 'RW', 'SH', 'ST', 'SN', 'SC', 'SL', 'SO', 'ZA', 'SS', 'SD', 'TZ', 'TG',
+    'TN', 'UG', 'EH', 'ZM', 'ZW']
+
+EU_LOCATIONS = [
+    'AT', 'BE', 'BG', 'HR', 'CY', 'CZ', 'DK', 'EE', 'FI', 'FR', 'DE', 'GR', 'HU',
+    'IE', 'IT', 'LV', 'LT', 'LU', 'MT', 'NL', 'PL', 'PT', 'RO', 'SK', 'SI', 'ES',
+    'SE']
+
+MIDDLE_EAST_LOCATIONS = [
+    'BH', 'EG', 'IR', 'IQ', 'IL', 'JO', 'KW', 'LB', 'OM', 'PS', 'QA', 'SA', 'SY',
+    'AE', 'YE']
+
+# Bit of every region in the region mask of a source (a source may belong to several regions)
+REGION_BITS = {'Africa': 1, 'EU': 2, 'Middle East': 4}
+REGION_LOCATIONS = {'Africa': AFRICA_LOCATIONS, 'EU': EU_LOCATIONS, 'Middle East': MIDDLE_EAST_LOCATIONS}
+
+DIMENSION_COLUMNS = ['source', 'source_name', 'Domain', 'GlobalRank', 'location', 'Country', 'regions']
+
+
+def normalize_sources(values):
+    """
+    Normalized key of every source name or domain: lowercase, without scheme, 'www.', path or
+    surrounding whitespace, so that 'https://www.BBC.co.uk/news' and 'bbc.co.uk' share one key.
+
+    Every distinct value is normalized once, so categorical and repetitive columns are cheap.
+
+    Returns:
+    - codes (ndarray): Position of every value in `keys` (-1 for missing values).
+    - keys (ndarray): Normalized key of every distinct value.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, copy=False), use_na_sentinel=True)
+    keys = (pd.Series(np.asarray(uniques, dtype=object), dtype=object).astype(str).str.strip().str.lower()
+            .str.replace(r'^[a-z][a-z0-9+.-]*://', '', regex=True)
+            .str.replace(r'^www\.', '', regex=True)
+            .str.split('/', n=1).str[0].str.rstrip('.'))
+    return codes, keys.to_numpy(dtype=object)
+
+
+def region_mask(locations):
+    """
+    Region bitmask (see REGION_BITS) of every location code.
+    """
+    locations = pd.Series(locations, copy=False)
+    mask = np.zeros(len(locations), dtype=np.uint8)
+    for region, codes in REGION_LOCATIONS.items():
+        mask[locations.isin(codes).to_numpy()] |= REGION_BITS[region]
+    return mask
+
+
+class SourceDimension:
+    """
+    Source dimension table: one row per news source, keyed by an integer source id, with its
+    domain, global traffic rank, location, country and region bitmask.
+
+    Built once from the location and traffic frames, it replaces their merges with array lookups:
+    raw source names and domains are normalized (normalize_sources) and mapped to source ids through
+    one hash index, and the attributes of the ids are read by position. Sources of the location
+    frame and domains of the traffic frame that share a normalized key are the same source; its
+    region mask combines the locations of all its rows, while its other attributes are those of
+    its first location row and its best rank.
+
+    Parameters:
+    - domains_location_df (DataFrame, optional): Sources with 'SourceCommonName', 'location' and 'Country'.
+    - traffic_data_df (DataFrame, optional): Domains with 'Domain' and 'GlobalRank'.
+    """
+
+    def __init__(self, domains_location_df=None, traffic_data_df=None):
+        parts = []
+        # Raw location-frame names with the regions of their own location, as matched by region_sources
+        self._names = pd.DataFrame({'source_name': pd.Series(dtype=object), 'regions': pd.Series(dtype=np.uint8)})
+        if domains_location_df is not None:
+            codes, keys = normalize_sources(domains_location_df['SourceCommonName'])
+            locations = pd.DataFrame({
+                'source': keys[codes], 'source_name': domains_location_df['SourceCommonName'].to_numpy(dtype=object),
+                'location': domains_location_df['location'].to_numpy(dtype=object),
+                'Country': domains_location_df['Country'].to_numpy(dtype=object),
+                'regions': region_mask(domains_location_df['location']),
+            })[codes >= 0]
+            self._names = locations[['source_name', 'regions']].reset_index(drop=True)
+            parts.append(locations)
+        if traffic_data_df is not None:
+            codes, keys = normalize_sources(traffic_data_df['Domain'])
+            traffic = pd.DataFrame({
+                'source': keys[codes], 'Domain': traffic_data_df['Domain'].to_numpy(dtype=object),
+                'GlobalRank': pd.to_numeric(traffic_data_df['GlobalRank'], errors='coerce').to_numpy(dtype=np.float64),
+            })[codes >= 0]
+            # The best rank of a domain listed several times
+            parts.append(traffic.sort_values('GlobalRank', kind='stable'))
+        table = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['source'])
+        table = table.reindex(columns=DIMENSION_COLUMNS)
+        # Names spelled differently may be located differently: a source is in every region of its rows
+        regions = table['regions'].fillna(0).astype(np.uint8).groupby(table['source'], sort=True).agg(np.bitwise_or.reduce)
+        # First location and best rank of every key, one row per source id
+        table = table.drop(columns='regions').groupby('source', sort=True).first().reset_index().reindex(columns=DIMENSION_COLUMNS[:-1])
+        table['regions'] = regions.reindex(table['source']).to_numpy(dtype=np.uint8)
+        table['location'] = table['location'].astype('category')
+        table['Country'] = table['Country'].astype('category')
+        self.table = table.rename_axis('source_id')
+        self._index = pd.Index(table['source'])
+
+    def __len__(self):
+        return len(self.table)
+
+    def ids(self, values):
+        """
+        Source id of every raw source name or domain (-1 for unknown or missing sources).
+        """
+        codes, keys = normalize_sources(values)
+        key_ids = self._index.get_indexer(keys)
+        return np.where(codes >= 0, key_ids[codes], -1) if len(keys) else np.full(len(codes), -1)
+
+    def take(self, ids, column):
+        """
+        Values of a dimension column for source ids, missing for the id -1.
+        """
+        return self.table[column].array.take(np.asarray(ids, dtype=np.int64), allow_fill=True)
+
+    def lookup(self, values, columns=('GlobalRank',)):
+        """
+        Dimension columns of every raw source name or domain, aligned with `values`.
+
+        Returns:
+        - attributes (DataFrame): One row per value (with the index of `values` if it is a Series)
+          and one column per dimension column; unknown sources have missing values.
+        """
+        ids = self.ids(values)
+        index = values.index if isinstance(values, pd.Series) else None
+        return pd.DataFrame({column: self.take(ids, column) for column in columns}, index=index)
+
+    def in_region(self, values, region):
+        """
+        Whether every raw source name or domain is located in `region` (a key of REGION_BITS).
+        """
+        ids = self.ids(values)
+        return ((self.table['regions'].to_numpy()[ids] & REGION_BITS[region]) != 0) & (ids >= 0)
+
+    def region_sources(self, region):
+        """
+        Every distinct name of the location frame whose location is in `region`, with its raw spelling
+        (names sharing a normalized key but located elsewhere are left out).
+        """
+        located = (self._names['regions'].to_numpy() & REGION_BITS[region]) != 0
+        return self._names['source_name'][located].dropna().unique()
+
+    def counts_by(self, values, column, weights=None):
+        """
+        Number of values (or sum of `weights`) per value of a dimension column, e.g. the articles per
+        source country; sources unknown to the dimension or without a value of the column are left out.
+
+        Returns:
+        - counts (Series): Indexed by the values of `column`.
+        """
+        ids = self.ids(values)
+        known = ids >= 0
+        per_source = np.bincount(ids[known], weights=None if weights is None else np.asarray(weights)[known],
+                                 minlength=len(self))
+        # Only the sources found in `values`, like an inner join
+        found = np.bincount(ids[known], minlength=len(self)) > 0
+        counts = pd.Series(per_source[found], index=self.table[column].to_numpy(dtype=object)[found])
+        return counts[counts.index.notna()].groupby(level=0).sum()
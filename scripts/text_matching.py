@@ -0,0 +1,145 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+
+def _trie_regex(terms):
+    """
+    Compile a list of literal terms into one regular expression shaped like a prefix trie.
+
+    Shared prefixes are matched once, so the cost of trying the pattern at a position grows
+    with the length of the longest term instead of the number of terms. Optional suffixes are
+    greedy, which makes the regex prefer the longest term starting at a position.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def to_regex(node):
+        branches = [re.escape(char) + to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if '' in node:
+            return '(?:' + '|'.join(branches) + ')?'
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return to_regex(trie)
+
+
+class MultiPatternMatcher:
+    """
+    Count, in a single scan per document, which labelled groups of terms occur in a corpus.
+
+    All terms are compiled into one trie-shaped regex. The scan looks for the longest term
+    starting at every position; the terms contained in that match (for example 'Niger' inside
+    'Nigeria') are then resolved once per distinct matched string and cached, so overlapping
+    terms are counted exactly like separate searches would count them.
+
+    Parameters:
+    - groups (dict): Maps each label (e.g. a country or a region) to an iterable of terms.
+    - word_boundary (bool, optional): Only match terms delimited by word boundaries.
+    - case_sensitive (bool or collection, optional): True for case sensitive matching of every
+      group, or the collection of labels whose terms are matched case sensitively.
+    """
+
+    def __init__(self, groups, word_boundary=False, case_sensitive=False):
+        self.labels = list(groups)
+        self.word_boundary = word_boundary
+        sensitive_labels = set(self.labels) if case_sensitive is True else set(case_sensitive or ())
+
+        # One entry per distinct (term, case sensitivity) with the labels it belongs to
+        entries = {}
+        for label_id, label in enumerate(self.labels):
+            for term in groups[label]:
+                term = str(term)
+                if term:
+                    entries.setdefault((term, label in sensitive_labels), set()).add(label_id)
+        self._entries = [(term, sensitive, np.array(sorted(label_ids))) for (term, sensitive), label_ids in entries.items()]
+        self._term_patterns = [
+            re.compile(r'\b' + re.escape(term) + r'\b', 0 if sensitive else re.IGNORECASE) if word_boundary else None
+            for term, sensitive, _ in self._entries
+        ]
+
+        # The scan itself is case insensitive; case sensitive terms are filtered when resolving
+        alternation = _trie_regex({term.lower() for term, _, _ in self._entries})
+        if word_boundary:
+            alternation = r'\b' + alternation + r'\b'
+        self._pattern = re.compile('(?=(' + alternation + '))', re.IGNORECASE) if self._entries else None
+        self._resolved = {}
+
+    def __getstate__(self):
+        # The resolution cache is rebuilt per process
+        state = self.__dict__.copy()
+        state['_resolved'] = {}
+        return state
+
+    def _resolve(self, matched):
+        # Labels of every term occurring in the matched string
+        label_ids = self._resolved.get(matched)
+        if label_ids is None:
+            hits = []
+            lowered = matched.lower()
+            for (term, sensitive, term_labels), pattern in zip(self._entries, self._term_patterns):
+                if pattern is not None:
+                    found = pattern.search(matched) is not None
+                elif sensitive:
+                    found = term in matched
+                else:
+                    found = term.lower() in lowered
+                if found:
+                    hits.append(term_labels)
+            label_ids = np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=int)
+            self._resolved[matched] = label_ids
+        return label_ids
+
+    def match_labels(self, text):
+        """
+        Return the set of labels with at least one term occurring in `text`.
+        """
+        if self._pattern is None or not isinstance(text, str):
+            return set()
+        label_ids = set()
+        for matched in dict.fromkeys(m.group(1) for m in self._pattern.finditer(text)):
+            label_ids.update(self._resolve(matched).tolist())
+        return {self.labels[label_id] for label_id in label_ids}
+
+    def _count_chunk(self, texts):
+        counts = np.zeros(len(self.labels), dtype=np.int64)
+        if self._pattern is None:
+            return counts
+        for text in texts:
+            if not isinstance(text, str):
+                continue
+            hit = np.zeros(len(self.labels), dtype=bool)
+            for matched in dict.fromkeys(m.group(1) for m in self._pattern.finditer(text)):
+                hit[self._resolve(matched)] = True
+            counts += hit
+        return counts
+
+    def count_documents(self, texts, n_jobs=1, chunk_size=5000):
+        """
+        Count the documents mentioning each label.
+
+        Parameters:
+        - texts (iterable of str): The documents; missing values are never counted.
+        - n_jobs (int, optional): Number of worker processes scanning chunks of documents in parallel
+          (-1 for one per CPU).
+        - chunk_size (int, optional): Number of documents per parallel chunk.
+
+        Returns:
+        - counts (Series): Number of matching documents, indexed by label in the order of `groups`.
+        """
+        texts = list(texts)
+        if n_jobs == 1 or len(texts) <= chunk_size:
+            counts = self._count_chunk(texts)
+        else:
+            chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+            with ProcessPoolExecutor(max_workers=None if n_jobs == -1 else n_jobs) as executor:
+                counts = sum(executor.map(self._count_chunk, chunks))
+        return pd.Series(counts, index=pd.Index(self.labels, dtype=object), name='ArticleCount')
@@ -1,21 +1,116 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.decomposition import LatentDirichletAllocation
+from scripts.instrumentation import instrumented
+from scripts.article_frame import article_text
+from scripts.featurization import HashingFeaturizer
+
+# Function to select the n largest entries of every row of a sparse matrix
+def top_n_sparse(matrix, n=5, max_cells=2**24):
+    """
+    Select the column ids of the `n` largest entries of every row of a sparse matrix.
+
+    Rows are processed in batches straight from the CSR nonzeros: each batch is padded to its
+    longest row and reduced with a partial selection (argpartition), so the matrix is never
+    densified and no row is fully sorted.
+
+    Parameters:
+    - matrix (sparse matrix): Scores, e.g. a TF-IDF matrix.
+    - n (int, optional): Number of entries to keep per row.
+    - max_cells (int, optional): Upper bound on the size of one padded batch.
+
+    Returns:
+    - top_ids (ndarray): An (n_rows, n) int32 array of column ids sorted by decreasing score,
+      padded with -1 for rows with fewer than n nonzero entries.
+    """
+    matrix = matrix.tocsr()
+    n_rows = matrix.shape[0]
+    top_ids = np.full((n_rows, n), -1, dtype=np.int32)
+    row_nnz = np.diff(matrix.indptr)
+
+    if matrix.nnz == 0 or n == 0:
+        return top_ids
+
+    start = 0
+    while start < n_rows:
+        # Grow the batch while the padded (rows x longest row) block stays under max_cells
+        widths = np.maximum.accumulate(np.maximum(row_nnz[start:start + 65536], 1))
+        fits = widths * np.arange(1, len(widths) + 1) <= max_cells
+        stop = start + max(1, int(fits.sum()))
+        width = int(widths[stop - start - 1])
+
+        lengths = row_nnz[start:stop]
+        offsets = matrix.indptr[start:stop]
+        columns = np.arange(width)
+        valid = columns < lengths[:, None]
+        positions = offsets[:, None] + np.where(valid, columns, 0)
+        values = np.where(valid, matrix.data[np.minimum(positions, matrix.nnz - 1)], -np.inf)
+
+        k = min(n, width)
+        if k < width:
+            selected = np.argpartition(-values, k - 1, axis=1)[:, :k]
+        else:
+            selected = np.broadcast_to(columns, values.shape).copy()
+        selected_values = np.take_along_axis(values, selected, axis=1)
+        order = np.argsort(-selected_values, axis=1, kind='stable')
+        selected = np.take_along_axis(selected, order, axis=1)
+        selected_values = np.take_along_axis(selected_values, order, axis=1)
+
+        found = selected_values > 0
+        ids = matrix.indices[np.minimum(np.take_along_axis(positions, selected, axis=1), matrix.nnz - 1)]
+        top_ids[start:stop, :k] = np.where(found, ids, -1)
+        start = stop
+
+    return top_ids
+
+
+# Function to extract top n keyword ids using TF-IDF
+@instrumented
+def extract_keyword_ids_tfidf(texts, n=5, tfidf_matrix=None, feature_names=None, hashing=False):
+    """
+    Extract the top `n` TF-IDF keywords of every document as integer ids.
+
+    A precomputed TF-IDF matrix and its vocabulary (e.g. from the feature store) can be passed
+    instead of fitting a new vectorizer on `texts`. With `hashing=True` the texts are vectorized
+    in parallel shards without a vocabulary (HashingFeaturizer, not limited to 10000 terms) and
+    only the selected keyword columns are decoded back to words.
+
+    Returns:
+    - keyword_ids (ndarray): An (n_documents, n) int32 array of vocabulary ids, -1 where a document
+      has fewer than n distinct terms.
+    - feature_names (ndarray): The vocabulary; feature_names[keyword_ids] gives the keywords.
+    """
+    if tfidf_matrix is None and hashing:
+        texts = texts if hasattr(texts, '__len__') else list(texts)
+        featurizer = HashingFeaturizer(max_df=0.8, stop_words='english')
+        keyword_ids = top_n_sparse(featurizer.fit_transform(texts), n)
+        # Renumber the selected columns 0..k-1 and name only those
+        columns, positions = np.unique(keyword_ids[keyword_ids >= 0], return_inverse=True)
+        keyword_ids[keyword_ids >= 0] = positions
+        return keyword_ids, featurizer.feature_names(columns, texts)
+    if tfidf_matrix is None:
+        vectorizer = TfidfVectorizer(max_df=0.8, max_features=10000, stop_words='english')
+        tfidf_matrix = vectorizer.fit_transform(texts)
+        feature_names = vectorizer.get_feature_names_out()
+    return top_n_sparse(tfidf_matrix, n), feature_names
+
+
+def keywords_from_ids(keyword_ids, feature_names):
+    # Decode keyword ids into lists of keyword strings, dropping the -1 padding
+    return [feature_names[row[row >= 0]].tolist() for row in keyword_ids]
+
 
 # Function to extract top n keywords using TF-IDF
-def extract_keywords_tfidf(texts, n=5):
-    vectorizer = TfidfVectorizer(max_df=0.8, max_features=10000, stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(texts)
-    feature_names = vectorizer.get_feature_names_out()
-    top_keywords = []
-
-    for i in range(tfidf_matrix.shape[0]):
-        tfidf_scores = tfidf_matrix[i].T.todense() # type: ignore
-        sorted_indices = tfidf_scores.argsort(axis=0)[::-1]
-        top_n = [feature_names[index[0, 0]] for index in sorted_indices[:n]]
-        top_keywords.append(top_n)
-    
-    return top_keywords
+@instrumented
+def extract_keywords_tfidf(texts, n=5, hashing=False):
+    keyword_ids, feature_names = extract_keyword_ids_tfidf(texts, n=n, hashing=hashing)
+    return keywords_from_ids(keyword_ids, feature_names)
+
 
 # Function to calculate cosine similarity between two lists of keywords
 def calculate_similarity(keywords1, keywords2):
@@ -24,30 +119,188 @@ def calculate_similarity(keywords1, keywords2):
     return cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0] # type: ignore
 
 
-def perform_topic_modeling_by_lda(df, n_topics=10, n_words=10):
-    # Combine title and full content for topic modeling
-    df['text'] = df['title'] + ' ' + df['full_content']
-    
-    # Vectorize the text
-    vectorizer = CountVectorizer(max_df=0.9, min_df=2, stop_words='english')
-    dtm = vectorizer.fit_transform(df['text'])
+# Function to calculate the title/content keyword similarity of every article at once
+def keyword_similarity_batch(ids_a, vocabulary_a, ids_b, vocabulary_b):
+    """
+    Row-wise cosine similarity between two keyword sets per document, in one sparse operation.
+
+    Gives the same values as calling calculate_similarity on every row: both keyword sets are
+    encoded against one shared vocabulary as binary sparse matrices, and the TF-IDF weighting
+    calculate_similarity fits on each pair (idf 1 for shared keywords, 1 + ln(3/2) otherwise)
+    is applied in closed form from the intersection and set sizes.
+
+    Parameters:
+    - ids_a, ids_b (ndarray): (n_documents, n) keyword id arrays, -1 padded (see extract_keyword_ids_tfidf).
+    - vocabulary_a, vocabulary_b (ndarray): The vocabularies the ids refer to.
+
+    Returns:
+    - similarities (ndarray): One similarity per document; NaN where both keyword sets are empty.
+    """
+    vocabulary = np.union1d(vocabulary_a, vocabulary_b)
+
+    def encode(ids, local_vocabulary):
+        # Binary document x shared-vocabulary matrix
+        ids = np.asarray(ids)
+        shared_ids = np.searchsorted(vocabulary, local_vocabulary)
+        rows, columns = np.nonzero(ids >= 0)
+        matrix = sp.csr_matrix((np.ones(len(rows)), (rows, shared_ids[ids[rows, columns]])),
+                               shape=(ids.shape[0], len(vocabulary)))
+        matrix.data[:] = 1
+        return matrix
+
+    a = encode(ids_a, vocabulary_a)
+    b = encode(ids_b, vocabulary_b)
+    shared = np.asarray(a.multiply(b).sum(axis=1)).ravel()
+    only_a = np.asarray(a.sum(axis=1)).ravel() - shared
+    only_b = np.asarray(b.sum(axis=1)).ravel() - shared
+
+    weight = (1 + np.log(1.5)) ** 2
+    norms = np.sqrt((shared + weight * only_a) * (shared + weight * only_b))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        similarities = np.where(norms > 0, shared / np.where(norms > 0, norms, 1), 0.0)
+    similarities[(shared + only_a + only_b) == 0] = np.nan
+    return similarities
+
+
+@instrumented
+def analyze_keyword_similarity(df, n=5, store=None):
+    """
+    Compare the top `n` TF-IDF keywords of each article's title and full content.
+
+    Parameters:
+    - df (DataFrame): Articles with 'title', 'full_content' and 'source_name' columns.
+    - n (int, optional): Number of keywords per title and per content.
+    - store (FeatureStore, optional): Reuse the persisted title and content TF-IDF matrices.
+
+    Returns:
+    - similarities (ndarray): The keyword similarity of every article.
+    - similarity_by_site (DataFrame): The mean 'keyword_similarity' per 'source_name'.
+    """
+    if store is not None:
+        title_matrix, title_vectorizer = store.get_or_build('title_tfidf', df)
+        content_matrix, content_vectorizer = store.get_or_build('content_tfidf', df)
+        title_ids, title_vocabulary = extract_keyword_ids_tfidf(None, n, title_matrix, title_vectorizer.get_feature_names_out())
+        content_ids, content_vocabulary = extract_keyword_ids_tfidf(None, n, content_matrix, content_vectorizer.get_feature_names_out())
+    else:
+        title_ids, title_vocabulary = extract_keyword_ids_tfidf(df['title'], n=n)
+        content_ids, content_vocabulary = extract_keyword_ids_tfidf(df['full_content'], n=n)
+    similarities = keyword_similarity_batch(title_ids, title_vocabulary, content_ids, content_vocabulary)
+
+    similarity_by_site = pd.DataFrame({'source_name': df['source_name'].to_numpy(), 'keyword_similarity': similarities})
+    similarity_by_site = similarity_by_site.groupby('source_name')['keyword_similarity'].mean().reset_index()
+    return similarities, similarity_by_site
+
+
+def _load_topic_checkpoint(checkpoint):
+    # Online LDA state saved by a previous run, or (None, None)
+    if checkpoint is None or not os.path.exists(checkpoint):
+        return None, None
+    with open(checkpoint, 'rb') as f:
+        state = pickle.load(f)
+    return state['lda'], state['vectorizer']
+
+
+def _save_topic_checkpoint(checkpoint, lda, vectorizer):
+    # Write the checkpoint next to its final location and swap it in atomically
+    os.makedirs(os.path.dirname(os.path.abspath(checkpoint)), exist_ok=True)
+    tmp_path = checkpoint + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'lda': lda, 'vectorizer': vectorizer}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, checkpoint)
+
+
+def _fit_online(lda, dtm, chunk_size):
+    # Update the model chunk by chunk
+    for start in range(0, dtm.shape[0], chunk_size):
+        lda.partial_fit(dtm[start:start + chunk_size])
+
+
+@instrumented
+def perform_topic_modeling_by_lda(df, n_topics=10, n_words=10, dtm=None, vectorizer=None, learning_method='batch',
+                                  batch_size=128, n_jobs=-1, checkpoint=None, return_assignments=False, fit_rows=None,
+                                  hashing=False):
+    """
+    Fit an LDA topic model on the title + full content of the articles.
+
+    In 'online' mode the model is updated from mini-batches of `batch_size` documents and, when
+    `checkpoint` is given, resumed from and saved back to that file together with its vectorizer,
+    so a refresh only needs to be fed the new articles.
+
+    Parameters:
+    - df (DataFrame): Articles with 'title' and 'full_content' columns.
+    - n_topics (int, optional): Number of topics.
+    - n_words (int, optional): Number of top words describing each topic.
+    - dtm, vectorizer (optional): A precomputed document-term matrix and its fitted vectorizer.
+    - learning_method (str, optional): 'batch' or 'online'.
+    - batch_size (int, optional): Documents per online update.
+    - n_jobs (int, optional): Number of cores used by LDA (-1 for all).
+    - checkpoint (str, optional): Path of the online model checkpoint.
+    - return_assignments (bool, optional): Also return the most likely topic of every document under
+      the trained model, from one transform of the whole corpus after training (so, in online mode,
+      the topic of a document does not depend on the chunk it was trained in).
+    - fit_rows (array-like, optional): Positions of the documents the model is fitted on, e.g. the
+      canonical articles of syndication groups; the other documents are only assigned a topic.
+    - hashing (bool, optional): Count the terms with a HashingFeaturizer in parallel shards instead
+      of fitting a CountVectorizer vocabulary; the topic words are decoded from the articles.
+
+    Returns:
+    - lda (LatentDirichletAllocation): The fitted model.
+    - topics (list of str): The top words of every topic.
+    - vectorizer (CountVectorizer or HashingFeaturizer): The vectorizer of the document-term matrix.
+    - topic_assignments (ndarray): Only with return_assignments=True.
+    """
+    lda = None
+    if learning_method == 'online':
+        lda, checkpoint_vectorizer = _load_topic_checkpoint(checkpoint)
+        if checkpoint_vectorizer is not None and dtm is None:
+            # A resumed model keeps the vocabulary it was trained with
+            vectorizer = checkpoint_vectorizer
+            dtm = vectorizer.transform(article_text(df))
+
+    if dtm is None:
+        # Vectorize title and full content, joined lazily instead of in a new column of df
+        if hashing:
+            vectorizer = HashingFeaturizer(n_features=2 ** 18, use_idf=False, norm=None, max_df=0.9, min_df=2, stop_words='english')
+        else:
+            vectorizer = CountVectorizer(max_df=0.9, min_df=2, stop_words='english')
+        dtm = vectorizer.fit_transform(article_text(df))
     
+    # Documents left out of the fit (e.g. near duplicates) are assigned after it
+    full_dtm = dtm
+    if fit_rows is not None:
+        fit_rows = np.asarray(fit_rows)
+        dtm = full_dtm[fit_rows]
+
     # Apply LDA
-    lda = LatentDirichletAllocation(n_components=n_topics, random_state=42)
-    lda.fit(dtm)
+    if learning_method == 'online':
+        if lda is None:
+            lda = LatentDirichletAllocation(n_components=n_topics, learning_method='online', batch_size=batch_size,
+                                            n_jobs=n_jobs, random_state=42)
+        _fit_online(lda, dtm, chunk_size=batch_size * 32)
+        if checkpoint is not None:
+            _save_topic_checkpoint(checkpoint, lda, vectorizer)
+    else:
+        lda = LatentDirichletAllocation(n_components=n_topics, random_state=42, n_jobs=n_jobs).fit(dtm)
     
     # Get the topics and their top words
-    topics = []
-    for index, topic in enumerate(lda.components_):
-        topic_words = [vectorizer.get_feature_names_out()[i] for i in topic.argsort()[-n_words:]]
-        topics.append(' '.join(topic_words)) # type: ignore
+    top_words = np.array([topic.argsort()[-n_words:] for topic in lda.components_])
+    if hasattr(vectorizer, 'get_feature_names_out'):
+        feature_names = vectorizer.get_feature_names_out() # type: ignore
+        topic_words = feature_names[top_words]
+    else:
+        # Hashed columns have no names: decode the top columns of every topic from the articles
+        topic_words = vectorizer.feature_names(top_words.ravel(), article_text(df)).reshape(top_words.shape)
+    topics = [' '.join(words) for words in topic_words]
     
+    if return_assignments:
+        return lda, topics, vectorizer, lda.transform(full_dtm).argmax(axis=1)
     return lda, topics, vectorizer
 
 
+@instrumented
 def analyze_topic_diversity(df):
     # Calculate the number of unique topics reported by each website
-    diversity = df.groupby('source_name')['topic'].nunique().reset_index()
+    diversity = df.groupby('source_name', observed=True)['topic'].nunique().reset_index()
     diversity.columns = ['source_name', 'unique_topics']
     
     # Sort by most diverse topics
@@ -0,0 +1,398 @@
+import sys
+import os
+import hashlib
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scripts import helper
+from scripts.sentiment_stats import sentiment_counts, sentiment_statistics, sentiment_values
+from scripts.plot_summaries import length_summaries as compute_length_summaries
+from scripts.article_frame import compact_articles
+from scripts.instrumentation import instrumented, span
+
+# The modeling libraries (sklearn via the feature store, registry and clusterers) and the
+# database layer are imported by the functions using them, so the dashboard starts without them.
+
+# Location of the raw CSV files used by the dashboard
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'data'))
+
+# Memory bound of every cache: number of distinct snapshots/parameter sets kept
+# per cached function, and how long (in seconds) an entry may live. The caches are
+# process wide, so every Streamlit session served by this process shares them.
+CACHE_MAX_ENTRIES = int(os.getenv('DASHBOARD_CACHE_MAX_ENTRIES', '4'))
+CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', '86400'))
+
+# 'kmeans' refits K-Means on every new snapshot, 'incremental' only clusters new articles
+EVENT_CLUSTERING_MODE = os.getenv('EVENT_CLUSTERING_MODE', 'kmeans')
+
+# 'keep' fits the topic and event models on every article, 'skip' only on the canonical article
+# of every group of near-duplicate (syndicated) articles; every article still gets a label
+NEAR_DUPLICATE_MODE = os.getenv('NEAR_DUPLICATE_MODE', 'keep')
+
+# 'vocabulary' fits the TF-IDF and term-count features with a vocabulary pass; 'hashing' hashes
+# shards of the corpus in parallel without one (scripts/featurization.py), at the cost of collisions
+FEATURIZATION_MODE = os.getenv('FEATURIZATION_MODE', 'vocabulary')
+
+# 'files' analyzes the CSV files in memory; 'database' runs the aggregations in the database
+# (DATABASE_URL) and only loads the article corpus for the sections analyzing its text.
+# Database results are cached for DB_CACHE_TTL seconds, since the tables change under the dashboard.
+DATA_SOURCE = os.getenv('DASHBOARD_DATA_SOURCE', 'files')
+DB_CACHE_TTL = float(os.getenv('DASHBOARD_DB_CACHE_TTL', '600'))
+
+# Datasets kept in the compact columnar representation (Arrow strings and categoricals, see
+# scripts/article_frame.py), which holds the article text in a fraction of the memory of Python strings
+COMPACT_DATASETS = ['data']
+
+
+def file_fingerprint(path):
+    """
+    Build a cheap fingerprint of a source file from its path, size and modification time.
+
+    Parameters:
+    - path (str): Path of the file.
+
+    Returns:
+    - fingerprint (str): A short hex digest that changes whenever the file is replaced or edited.
+    """
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="Loading and cleaning data...")
+def _load_clean_csv(path, fingerprint, custom_types=None, date_columns=None, compact=False):
+    # The fingerprint is unused in the body; it only takes part in the cache key
+    df = helper.clean_data(pd.read_csv(path), date_columns=date_columns, custom_types=custom_types)
+    return compact_articles(df) if compact else df
+
+
+def load_clean_csv(path, custom_types=None, date_columns=None, compact=False):
+    """
+    Read and clean a CSV file, reusing the cleaned frame while the file is unchanged.
+
+    Parameters:
+    - compact (bool, optional): Store the text as Arrow strings and the sources and categories as
+      categoricals (see compact_articles).
+
+    Returns:
+    - df (DataFrame): The cleaned DataFrame (a private copy, safe to modify).
+    - data_key (str): Fingerprint of the source file, used to key derived artifacts.
+    """
+    fingerprint = file_fingerprint(path)
+    return _load_clean_csv(path, fingerprint, custom_types, date_columns, compact), fingerprint
+
+
+def load_datasets(data_dir=DATA_DIR, names=('data', 'domains_location', 'traffic', 'rating')):
+    """
+    Load cleaned dashboard datasets.
+
+    Returns:
+    - frames (dict): Cleaned DataFrames keyed by name ('data', 'domains_location', 'traffic', 'rating').
+    - keys (dict): The matching source file fingerprints.
+    """
+    frames, keys = {}, {}
+    for name in names:
+        frames[name], keys[name] = load_clean_csv(os.path.join(data_dir, f'{name}.csv'), compact=name in COMPACT_DATASETS)
+    return frames, keys
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def content_fingerprint(_data_df, data_key):
+    """
+    Content hash of the article text, used to key the artifacts persisted on disk.
+
+    Unlike the file fingerprint it survives copying the data file, so a restarted dashboard
+    finds the features and models trained on the same data.
+    """
+    from scripts.feature_store import snapshot_fingerprint
+    return snapshot_fingerprint(_data_df)
+
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="Loading article features...")
+@instrumented
+def load_features(_data_df, data_key, name):
+    """
+    Load (or fit once and persist) a feature matrix of the feature store for this data snapshot.
+
+    The frame argument is not hashed (leading underscore); `data_key` identifies it.
+    The returned matrix and vectorizer are shared between sessions and must not be modified.
+    """
+    from scripts.feature_store import FeatureStore
+    return FeatureStore().get_or_build(name, _data_df, fingerprint=content_fingerprint(_data_df, data_key))
+
+
+def tfidf_features(_data_df, data_key):
+    """
+    TF-IDF matrix and vectorizer used for event clustering on title + full content.
+    """
+    return load_features(_data_df, data_key, feature_name('tfidf'))
+
+
+def feature_name(name):
+    """
+    Name of the feature store matrix used for `name` ('tfidf' or 'counts') in the FEATURIZATION_MODE.
+    """
+    return f'{name}_hashing' if FEATURIZATION_MODE == 'hashing' else name
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="Detecting syndicated articles...")
+@instrumented
+def near_duplicate_assignments(_data_df, data_key):
+    """
+    Canonical article of every article, from the near-duplicate index of this snapshot, signed in
+    one streaming pass of bounded batches. The index is persisted in a directory of its own (keyed
+    by the content fingerprint), so reused ids never keep the groups of another snapshot and every
+    canonical article belongs to the snapshot; a restarted dashboard loads it instead of re-signing.
+    """
+    from scripts.near_duplicates import NEAR_DUPLICATE_STATE_DIR, NearDuplicateIndex, detect_near_duplicates
+    path = os.path.join(NEAR_DUPLICATE_STATE_DIR, content_fingerprint(_data_df, data_key))
+    index = NearDuplicateIndex.load(path)
+    indexed = len(index)
+    assignments, index = detect_near_duplicates(_data_df, index)
+    if len(index) > indexed:
+        index.save(path)
+    return assignments, index.syndication_sources()
+
+
+def fit_rows(_data_df, data_key):
+    """
+    Positions of the articles the topic and event models are fitted on (None for all of them).
+    """
+    if NEAR_DUPLICATE_MODE != 'skip':
+        return None
+    assignments, _ = near_duplicate_assignments(_data_df, data_key)
+    return np.flatnonzero(~assignments['is_duplicate'].to_numpy())
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="Clustering articles into events...")
+@instrumented
+def kmeans_labels(_data_df, data_key, n_clusters=10, random_state=42):
+    """
+    Cluster the articles into events with K-Means and return one label per article.
+
+    The fitted model is loaded from the model registry when it was trained on the same data before.
+    """
+    from sklearn.cluster import KMeans
+    from scripts.model_registry import ModelRegistry
+    rows = fit_rows(_data_df, data_key)
+    tfidf_matrix, _ = tfidf_features(_data_df, data_key)
+
+    def train():
+        features = tfidf_matrix if rows is None else tfidf_matrix[rows]
+        with span('KMeans.fit', rows=features.shape[0]):
+            return KMeans(n_clusters=n_clusters, random_state=random_state).fit(features)
+
+    params = {'n_clusters': n_clusters, 'random_state': random_state, 'near_duplicates': NEAR_DUPLICATE_MODE,
+              'features': feature_name('tfidf')}
+    kmeans = ModelRegistry().load_or_train('kmeans', content_fingerprint(_data_df, data_key), params, train)
+    if rows is None:
+        return np.asarray(kmeans.labels_)
+    # Row slices copy the read-only memory-mapped features, which K-Means cannot predict from directly
+    return np.concatenate([kmeans.predict(tfidf_matrix[start:start + 50000])
+                           for start in range(0, tfidf_matrix.shape[0], 50000)])
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="Assigning new articles to events...")
+@instrumented
+def incremental_event_labels(_data_df, data_key):
+    """
+    Assign articles to persisted events; only articles not seen before are vectorized and clustered,
+    and only their labels are appended to the persisted state.
+    """
+    from scripts.event_clustering import IncrementalEventClusterer
+    from scripts.feature_store import build_text
+    clusterer = IncrementalEventClusterer.load()
+    article_ids = _data_df['article_id'].astype(str)
+    new = article_ids.map(clusterer.labels_).isna().to_numpy()
+    if new.any():
+        new_articles = _data_df[new]
+        clusterer.partial_fit(new_articles['article_id'], build_text(new_articles))
+        clusterer.save()
+    return article_ids.map(clusterer.labels_).to_numpy(dtype=np.int64)
+
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="Indexing articles for similarity search...")
+@instrumented
+def similar_article_index(_data_df, data_key):
+    """
+    Similar-article index of the articles of this snapshot, persisted in a directory of its own (keyed
+    by the content fingerprint) so that articles of other snapshots, or older texts of reused ids,
+    never show up in its results; a restarted dashboard loads it instead of re-vectorizing.
+    Shared between sessions, it must not be modified.
+    """
+    from scripts.similar_articles import SIMILAR_ARTICLES_STATE_DIR, SimilarArticleIndex
+    from scripts.feature_store import build_text
+    path = os.path.join(SIMILAR_ARTICLES_STATE_DIR, content_fingerprint(_data_df, data_key))
+    index = SimilarArticleIndex.load(path)
+    if index.add(_data_df['article_id'], build_text(_data_df)):
+        index.save(path)
+    return index
+
+
+def event_labels(data_df, data_key, n_clusters=10):
+    """
+    Event label per article, from a full K-Means fit or from the incremental event clusterer
+    (EVENT_CLUSTERING_MODE=incremental).
+    """
+    if EVENT_CLUSTERING_MODE == 'incremental':
+        return incremental_event_labels(data_df, data_key)
+    return kmeans_labels(data_df, data_key, n_clusters=n_clusters)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="Modeling topics...")
+@instrumented
+def lda_assignments(_data_df, data_key, n_topics=10):
+    """
+    Fit LDA on the articles and return the most likely topic per article and the topic words.
+    """
+    from scripts import topic_and_event_modeling
+    from scripts.model_registry import ModelRegistry
+
+    def train():
+        dtm, vectorizer = load_features(_data_df, data_key, feature_name('counts'))
+        lda, topics, _, topic_assignments = topic_and_event_modeling.perform_topic_modeling_by_lda(
+            _data_df, n_topics=n_topics, dtm=dtm, vectorizer=vectorizer, return_assignments=True,
+            fit_rows=fit_rows(_data_df, data_key))
+        return {'lda': lda, 'topics': topics, 'topic_assignments': topic_assignments}
+
+    params = {'n_topics': n_topics, 'near_duplicates': NEAR_DUPLICATE_MODE, 'features': feature_name('counts')}
+    bundle = ModelRegistry().load_or_train('lda', content_fingerprint(_data_df, data_key), params, train)
+    return np.asarray(bundle['topic_assignments']), bundle['topics']
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="Summarizing article lengths...")
+@instrumented
+def length_summaries(_data_df, data_key, max_outliers=20):
+    """
+    Per-source box statistics of the content length and title word count, computed once per data snapshot.
+    """
+    return compute_length_summaries(_data_df, max_outliers)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+def rating_with_sentiment(_rating_df, rating_key):
+    """
+    Return the rating frame with a 'title_sentiment_numeric' column (-1, 0, 1).
+    """
+    rating_df = _rating_df.copy()
+    rating_df['title_sentiment_numeric'] = sentiment_values(rating_df['title_sentiment'])
+    return rating_df
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+def sentiment_counts_by_source(_rating_df, rating_key):
+    """
+    Negative/neutral/positive/unrated title counts per source, computed once per rating snapshot.
+    """
+    return sentiment_counts(_rating_df)
+
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+@instrumented
+def source_dimension(_domains_location_df, _traffic_data_df, domains_key, traffic_key):
+    """
+    Source dimension (ids, domains, traffic ranks, countries and regions of the news sources) built
+    once per location and traffic snapshot and shared between sessions; it must not be modified.
+    """
+    from scripts.source_dimension import SourceDimension
+    return SourceDimension(_domains_location_df, _traffic_data_df)
+
+
+def with_traffic_rank(df, sources):
+    """
+    Rows of a per-source frame whose 'source_name' has a traffic rank, with its 'Domain' and
+    'GlobalRank' looked up in the source dimension (the result of an inner merge with the traffic data).
+    """
+    ranks = sources.lookup(df['source_name'], ['Domain', 'GlobalRank'])
+    ranked = ranks['GlobalRank'].notna().to_numpy()
+    return df[ranked].assign(Domain=ranks['Domain'][ranked].to_numpy(), GlobalRank=ranks['GlobalRank'][ranked].to_numpy()).reset_index(drop=True)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+@instrumented
+def sentiment_by_source(_rating_df, _domains_location_df, _traffic_data_df, rating_key, domains_key, traffic_key):
+    """
+    Join per-source report counts and average/median sentiment with the global traffic rank.
+    """
+    stats = sentiment_statistics(sentiment_counts_by_source(_rating_df, rating_key))
+    merged_data = pd.DataFrame({
+        'source_name': stats.index,
+        'total_reports': stats['total_reports'].to_numpy(),
+        'avg_sentiment': stats['mean_sentiment'].to_numpy(),
+        'median_sentiment': stats['median_sentiment'].to_numpy(),
+    })
+    return with_traffic_rank(merged_data, source_dimension(_domains_location_df, _traffic_data_df, domains_key, traffic_key))
+
+
+def _source_rollup_totals(dimension):
+    # Per-key totals of the daily rollups, named like the per-source query results
+    from src.db import rollups
+    totals = rollups.rollup_totals(dimension)
+    return totals.rename(columns={'key': 'source_name', 'article_count': 'total_reports', 'negative_count': 'negative',
+                                  'neutral_count': 'neutral', 'positive_count': 'positive'})
+
+
+@st.cache_data(ttl=DB_CACHE_TTL, show_spinner="Querying the database...")
+def db_top_articles(limit=10):
+    """
+    Top sources by article count, read from the daily rollups (same layout as get_top_articles).
+    """
+    totals = _source_rollup_totals('source')
+    top_articles = totals.sort_values(['total_reports', 'source_name'], ascending=[False, True]).head(limit)
+    top_articles = top_articles[['source_name', 'total_reports']].reset_index(drop=True)
+    top_articles.columns = ['Website', 'Article Count']
+    return top_articles
+
+
+@st.cache_data(ttl=DB_CACHE_TTL, show_spinner="Querying the database...")
+def db_sentiment_by_source(_domains_location_df, _traffic_data_df, domains_key, traffic_key):
+    """
+    Database counterpart of sentiment_by_source: per-source sentiment from the daily rollups with the global traffic rank.
+    """
+    from src.db import queries
+    sentiment = queries.sentiment_from_counts(_source_rollup_totals('source'))
+    return with_traffic_rank(sentiment, source_dimension(_domains_location_df, _traffic_data_df, domains_key, traffic_key))
+
+
+@st.cache_data(ttl=DB_CACHE_TTL, show_spinner="Querying the database...")
+def db_volume_by_country():
+    """
+    Reporting volume per source country, read from the daily rollups.
+    """
+    totals = _source_rollup_totals('country')
+    return totals[['source_name', 'total_reports']].set_axis(['Country', 'num_articles'], axis=1)
+
+
+@st.cache_data(ttl=DB_CACHE_TTL, show_spinner="Querying the database...")
+def db_topic_trends():
+    """
+    Number of articles per day and topic, read from the daily rollups.
+    """
+    from src.db import rollups
+    daily = rollups.read_rollup('topic')
+    daily = daily[daily['day'] != '']
+    return pd.DataFrame({'published_at': pd.to_datetime(daily['day']).dt.date, 'topic': daily['key'].astype(int),
+                         'count': daily['article_count']})
+
+
+@st.cache_data(ttl=DB_CACHE_TTL, show_spinner="Counting country and region mentions...")
+def db_mention_counts(_domains_location_df, domains_key):
+    """
+    Top and bottom countries and regions by article count, scanning the article content streamed from the database.
+    """
+    from src.db import queries
+    top_countries, bottom_countries = helper.analyze_country_article_counts(queries.article_texts('content'), _domains_location_df)
+    top_regions, bottom_regions = helper.analyze_region_article_counts(queries.article_texts('content'), _domains_location_df)
+    return top_countries, bottom_countries, top_regions, bottom_regions
+
+
+def clear_caches():
+    """
+    Drop every cached frame and derived artifact, forcing a reload on the next rerun.
+    """
+    for cached in [_load_clean_csv, content_fingerprint, source_dimension, load_features, near_duplicate_assignments, kmeans_labels, incremental_event_labels,
+                   similar_article_index, lda_assignments,
+                   length_summaries, rating_with_sentiment, sentiment_counts_by_source, sentiment_by_source, db_top_articles, db_sentiment_by_source, db_volume_by_country,
+                   db_topic_trends, db_mention_counts]:
+        cached.clear()
@@ -2,18 +2,27 @@ import sys
 import os
 # sys.path.append('../')
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import plotly.graph_objs as go
-from plotly import express as px
 import pandas as pd
-from scripts import helper, topic_and_event_modeling
+from scripts.plot_summaries import length_summaries, downsample_points
+from scripts.instrumentation import instrumented
+
+# Bound on what the figures send to the browser: outliers drawn per website in the box plots,
+# and points drawn per scatter plot (sparse regions are kept, dense ones thinned)
+PLOT_MAX_OUTLIERS = int(os.getenv('DASHBOARD_PLOT_MAX_OUTLIERS', '20'))
+PLOT_MAX_POINTS = int(os.getenv('DASHBOARD_PLOT_MAX_POINTS', '5000'))
+
+# Plotly and the topic models are imported by the functions using them, keeping the
+# Tabular page (the first one rendered) free of them
 
 # Function to get the top ten websites by news article count
+@instrumented
 def get_top_articles(data_df):
     top_articles = data_df['source_name'].value_counts().head(10).reset_index()
     top_articles.columns = ['Website', 'Article Count']
     return top_articles
 
 # Function to get the top ten websites by visitor traffic
+@instrumented
 def get_top_traffic(traffic_data_df):
     # Assuming traffic_data_df has 'Domain' and 'GlobalRank' columns
     top_traffic = traffic_data_df.sort_values(by='GlobalRank').head(10)
@@ -22,22 +31,39 @@ def get_top_traffic(traffic_data_df):
     return top_traffic
 
 # Define plotting functions
-def plot_content_length_distribution(data_df):
-    data_df['content_length'] = data_df['full_content'].apply(lambda x: len(x) if x else 0)
-    fig = px.box(data_df, x='source_name', y='content_length')
-    fig.update_layout(xaxis_title='Website', yaxis_title='Content Length (Characters)', xaxis_tickangle=90)
+def plot_box_summary(summary, outliers, yaxis_title):
+    # Box plot drawn from precomputed statistics: one box per website plus the sampled outliers,
+    # so the figure size does not grow with the number of articles
+    import plotly.graph_objs as go
+    fig = go.Figure()
+    fig.add_trace(go.Box(
+        x=summary.index.astype(str), q1=summary['q1'], median=summary['median'], q3=summary['q3'],
+        lowerfence=summary['lowerfence'], upperfence=summary['upperfence'], mean=summary['mean'],
+        boxpoints=False, name='', showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=outliers['group'].astype(str), y=outliers['value'], mode='markers',
+        marker=dict(size=4), name='Outliers (sample)', showlegend=False
+    ))
+    fig.update_layout(xaxis_title='Website', yaxis_title=yaxis_title, xaxis_tickangle=90)
     return fig
 
-def plot_title_word_count_distribution(data_df):
-    data_df['title_word_count'] = data_df['title'].apply(lambda x: len(x.split()) if x else 0)
-    fig = px.box(data_df, x='source_name', y='title_word_count')
-    fig.update_layout(xaxis_title='Website', yaxis_title='Title Word Count', xaxis_tickangle=90)
-    return fig
+@instrumented
+def plot_content_length_distribution(data_df, summaries=None):
+    summary, outliers = (summaries or length_summaries(data_df, PLOT_MAX_OUTLIERS))['content_length']
+    return plot_box_summary(summary, outliers, 'Content Length (Characters)')
 
+@instrumented
+def plot_title_word_count_distribution(data_df, summaries=None):
+    summary, outliers = (summaries or length_summaries(data_df, PLOT_MAX_OUTLIERS))['title_word_count']
+    return plot_box_summary(summary, outliers, 'Title Word Count')
 
-def plot_scatter_avg_sentiment(merged_data):
+
+@instrumented
+def plot_scatter_avg_sentiment(merged_data, max_points=PLOT_MAX_POINTS):
+    from plotly import express as px
     fig = px.scatter(
-        merged_data,
+        downsample_points(merged_data, 'total_reports', 'GlobalRank', max_points),
         x='total_reports',
         y='GlobalRank',
         color='avg_sentiment',
@@ -48,9 +74,11 @@ def plot_scatter_avg_sentiment(merged_data):
     fig.update_yaxes(autorange='reversed')  # GlobalRank (lower is better)
     return fig
 
-def plot_scatter_median_sentiment(merged_data):
+@instrumented
+def plot_scatter_median_sentiment(merged_data, max_points=PLOT_MAX_POINTS):
+    from plotly import express as px
     fig = px.scatter(
-        merged_data,
+        downsample_points(merged_data, 'total_reports', 'GlobalRank', max_points),
         x='total_reports',
         y='GlobalRank',
         color='median_sentiment',
@@ -62,19 +90,27 @@ def plot_scatter_median_sentiment(merged_data):
     return fig
 
 
-def plot_topic_trends(df, n_topics):
-    # Perform topic modeling
-    n_topics = 10  # Number of topics to identify
-    lda, topics, vectorizer = topic_and_event_modeling.perform_topic_modeling_by_lda(df, n_topics=n_topics)
-
-    # Assign the most likely topic to each article
-    topic_assignments = lda.transform(vectorizer.transform(df['text'])).argmax(axis=1)
+@instrumented
+def plot_topic_trends(df, n_topics, topic_assignments=None):
+    if topic_assignments is None:
+        from scripts import topic_and_event_modeling
+        # Perform topic modeling
+        n_topics = 10  # Number of topics to identify
+        # The most likely topic of each article under the trained model
+        lda, topics, vectorizer, topic_assignments = topic_and_event_modeling.perform_topic_modeling_by_lda(
+            df, n_topics=n_topics, return_assignments=True)
     df['topic'] = topic_assignments
 
     # Group by date and topic, then count the occurrences
     trend_data = df.groupby([df['published_at'].dt.date, 'topic']).size().reset_index(name='count')
-    
+    return plot_topic_trend_counts(trend_data, n_topics)
+
+@instrumented
+def plot_topic_trend_counts(trend_data, n_topics):
+    # trend_data holds the number of articles ('count') per day ('published_at') and 'topic',
+    # e.g. as read from the daily topic rollups
     # Create a scatter plot using Plotly
+    from plotly import express as px
     fig = px.scatter(
         trend_data,
         x='published_at',
@@ -0,0 +1,255 @@
+import io
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.db.db_config import engine as default_engine
+from src.db.models import Article, DomainLocation, Topic, Event, Feature
+from src.db.sparse_codec import encode_rows
+from src.db import rollups
+
+# content and title_sentiment are optional; articles loaded without them keep the stored values
+ARTICLE_COLUMNS = ['article_id', 'source_name', 'published_at', 'title', 'content', 'full_content', 'title_sentiment']
+
+
+def with_title_sentiment(data_df, rating_df):
+    """
+    Articles with the 'title_sentiment' label of their rating, joined on 'article_id'.
+
+    data.csv has no sentiment: the labels live in rating.csv, and the sentiment queries and rollups
+    aggregate Article.title_sentiment, so the ratings must be joined before load_articles. The last
+    rating of an article wins; articles without a rating keep the label they had (or none).
+
+    Parameters:
+    - data_df (DataFrame): Articles with an 'article_id' column.
+    - rating_df (DataFrame): Ratings with 'article_id' and 'title_sentiment' columns.
+
+    Returns:
+    - data_df (DataFrame): A new frame with the 'title_sentiment' column.
+    """
+    ratings = rating_df.dropna(subset=['article_id']).drop_duplicates('article_id', keep='last')
+    # Article ids are compared as strings, since the two files may parse them to different types
+    labels = pd.Series(ratings['title_sentiment'].astype(object).to_numpy(), index=ratings['article_id'].astype(str).to_numpy())
+    sentiment = data_df['article_id'].astype(str).map(labels).astype(object)
+    if 'title_sentiment' in data_df.columns:
+        sentiment = sentiment.where(sentiment.notna(), data_df['title_sentiment'].astype(object))
+    return data_df.assign(title_sentiment=sentiment.where(sentiment.notna(), None))
+
+
+def _iter_frames(data, batch_size):
+    # Slices of one DataFrame, or the chunks of an iterable of DataFrames (e.g. iter_clean_data)
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), batch_size):
+            yield data.iloc[start:start + batch_size]
+    else:
+        for chunk in data:
+            for start in range(0, len(chunk), batch_size):
+                yield chunk.iloc[start:start + batch_size]
+
+
+def build_batch(batch, tfidf_rows=None, topics=None, topic_column='topic', event_column='event_description',
+                vocabulary_version=None, event_cluster_column='cluster'):
+    """
+    Build the rows of every table for one batch of articles.
+
+    An article repeated in the batch is kept once, with its last row (and TF-IDF row), in every table.
+
+    Parameters:
+    - batch (DataFrame): The articles of the batch.
+    - tfidf_rows (csr_matrix, optional): The TF-IDF rows of these articles, in the same order.
+    - topics (list, optional): Keyword list per topic; `topic_column` indexes it modulo its length.
+    - topic_column (str, optional): Column holding the topic (e.g. the LDA assignment) of each article.
+    - event_column (str, optional): Column holding the event description of each article.
+    - vocabulary_version (str, optional): Version of the vocabulary indexed by the TF-IDF columns.
+    - event_cluster_column (str, optional): Column holding the event cluster (e.g. the K-Means label) of each article.
+
+    Returns:
+    - tables (dict): A DataFrame of rows per model, for the tables that can be filled from the batch.
+    """
+    keep = ~batch['article_id'].duplicated(keep='last').to_numpy()
+    if not keep.all():
+        batch = batch[keep]
+        tfidf_rows = tfidf_rows[keep.nonzero()[0]] if tfidf_rows is not None else None
+    columns = [column for column in ARTICLE_COLUMNS if column in batch.columns]
+    tables = {Article: batch[columns]}
+    article_ids = batch['article_id']
+    has_topic = topic_column in batch.columns
+    if topics and has_topic:
+        keywords = pd.Series([', '.join(words) for words in topics])
+        tables[Topic] = pd.DataFrame({
+            'topic_keywords': keywords.to_numpy()[batch[topic_column].to_numpy().astype(int) % len(topics)],
+            'article_id': article_ids.to_numpy()})
+    if event_column in batch.columns:
+        tables[Event] = pd.DataFrame({'event_description': batch[event_column].to_numpy(), 'article_id': article_ids.to_numpy()})
+    if tfidf_rows is not None:
+        topic = batch[topic_column].to_numpy() if has_topic else None
+        cluster = batch[event_cluster_column].to_numpy() if event_cluster_column in batch.columns else None
+        tables[Feature] = pd.DataFrame({'article_id': article_ids.to_numpy(), 'tfidf_vector': encode_rows(tfidf_rows),
+                                        'vocabulary_version': vocabulary_version, 'topic': topic, 'event_cluster': cluster})
+    return tables
+
+
+def _records(frame):
+    # Plain Python values for the DBAPI; missing values become NULL
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+
+def _executemany_batch(connection, tables):
+    # Upsert of the articles and replacement of their child rows through executemany
+    articles = tables[Article]
+    dialect = sqlite if connection.dialect.name == 'sqlite' else postgresql
+    statement = dialect.insert(Article.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=['article_id'],
+        set_={column: statement.excluded[column] for column in articles.columns if column != 'article_id'})
+    connection.execute(statement, _records(articles))
+    for model, frame in tables.items():
+        if model is Article:
+            continue
+        connection.execute(delete(model).where(model.article_id.in_(articles['article_id'].tolist())))
+        connection.execute(insert(model), _records(frame))
+
+
+def _copy_frame(cursor, table_name, frame):
+    # Binary columns travel in the hex text format of bytea
+    frame = frame.apply(lambda column: column.map(lambda value: '\\x' + value.hex())
+                        if column.map(type).eq(bytes).any() else column)
+    buffer = io.StringIO()
+    frame.to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table_name} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _copy_batch(connection, tables):
+    # PostgreSQL: COPY the batch into a staging table, then upsert from it in one statement
+    articles = tables[Article]
+    columns = ', '.join(articles.columns)
+    update = ', '.join(f'{column} = EXCLUDED.{column}' for column in articles.columns if column != 'article_id')
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS articles_stage (LIKE articles INCLUDING DEFAULTS) ON COMMIT DELETE ROWS')
+        _copy_frame(cursor, 'articles_stage', articles)
+        cursor.execute(f"INSERT INTO articles ({columns}) SELECT {columns} FROM articles_stage "
+                       f"ON CONFLICT (article_id) DO UPDATE SET {update}")
+        for model, frame in tables.items():
+            if model is Article:
+                continue
+            cursor.execute(f'DELETE FROM {model.__tablename__} WHERE article_id IN (SELECT article_id FROM articles_stage)')
+            _copy_frame(cursor, model.__tablename__, frame)
+    finally:
+        cursor.close()
+
+
+def load_run_key(data_df, topics=None, vocabulary_version=None):
+    """
+    Run key of a load_articles progress file that changes with everything loaded: every column of
+    the articles (text, sentiment, topic and event labels), the topic keywords and the vocabulary.
+
+    A finished load keeps its progress file, so a key covering the text alone would make a reload
+    with new ratings, topics or events resume after the last batch and load nothing.
+
+    Returns:
+    - run_key (str): A short hex digest.
+    """
+    row_hashes = pd.util.hash_pandas_object(data_df, index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(json.dumps([list(data_df.columns), topics, vocabulary_version], default=str).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _read_progress(progress_path, run_key):
+    if progress_path and os.path.exists(progress_path):
+        with open(progress_path) as f:
+            progress = json.load(f)
+        if progress.get('run_key') == run_key:
+            return progress['batches_done'], progress['rows_loaded']
+    return 0, 0
+
+
+def _write_progress(progress_path, run_key, batches_done, rows_loaded):
+    if progress_path:
+        with open(progress_path + '.tmp', 'w') as f:
+            json.dump({'run_key': run_key, 'batches_done': batches_done, 'rows_loaded': rows_loaded}, f)
+        os.replace(progress_path + '.tmp', progress_path)
+
+
+def load_articles(data, tfidf_matrix=None, topics=None, engine=None, batch_size=10000, progress_path=None, run_key=None,
+                  topic_column='topic', event_column='event_description', vocabulary_version=None, update_rollups=True,
+                  verbose=True, event_cluster_column='cluster'):
+    """
+    Stream articles with their topics, events and features into the database in batches.
+
+    Every batch is upserted on `article_id` (the topic, event and feature rows of its articles are
+    replaced) and committed on its own, so a failing batch only rolls back itself. PostgreSQL batches
+    are sent with COPY through a staging table; other databases (SQLite) use executemany. The daily
+    rollups are updated in the same transaction with the change in counts caused by the batch.
+
+    Parameters:
+    - data (DataFrame or iterable of DataFrames): The articles, e.g. the chunks of iter_clean_data.
+    - tfidf_matrix (sparse matrix, optional): TF-IDF row per article, in the order of `data`.
+    - topics (list, optional): Keyword list per topic, indexed by `topic_column`.
+    - engine (Engine, optional): Target database; the configured engine by default.
+    - batch_size (int, optional): Number of articles per batch and transaction.
+    - progress_path (str, optional): JSON file recording the committed batches; a rerun with the same
+      `run_key` skips them and resumes after the last committed batch.
+    - run_key (str, optional): Identifier of the load stored in the progress file, e.g. load_run_key(data).
+    - vocabulary_version (str, optional): Version of the TF-IDF vocabulary (see sparse_codec.vocabulary_version),
+      stored with every feature row.
+    - topic_column, event_column, event_cluster_column (str, optional): Columns holding the topic, the event
+      description and the event cluster of each article (see build_batch).
+    - update_rollups (bool, optional): Maintain the daily rollup table (see rollups.py).
+    - verbose (bool, optional): Print the throughput after every batch.
+
+    Returns:
+    - stats (dict): Rows loaded, batches committed, elapsed seconds and rows per second of this run.
+    """
+    engine = engine or default_engine
+    batches_done, rows_loaded = _read_progress(progress_path, run_key)
+    load_batch = _copy_batch if engine.dialect.name == 'postgresql' else _executemany_batch
+
+    start_time = time.perf_counter()
+    rows_this_run, batches_this_run, offset = 0, 0, 0
+    for batch_number, batch in enumerate(_iter_frames(data, batch_size)):
+        batch_offset, offset = offset, offset + len(batch)
+        if batch_number < batches_done:
+            continue
+        tfidf_rows = tfidf_matrix[batch_offset:offset] if tfidf_matrix is not None else None
+        tables = build_batch(batch, tfidf_rows, topics, topic_column, event_column, vocabulary_version, event_cluster_column)
+        with engine.begin() as connection:
+            article_ids = tables[Article]['article_id'].tolist()
+            if update_rollups:
+                # Counts of the stored versions of these articles, replaced by those of the new versions
+                before = rollups.aggregate(connection, article_ids)
+            load_batch(connection, tables)
+            if update_rollups:
+                rollups.apply_delta(connection, rollups.diff(rollups.aggregate(connection, article_ids), before))
+        rows_this_run += len(batch)
+        batches_this_run += 1
+        _write_progress(progress_path, run_key, batch_number + 1, rows_loaded + rows_this_run)
+        if verbose:
+            elapsed = time.perf_counter() - start_time
+            print(f"Batch {batch_number + 1}: {rows_this_run} rows in {elapsed:.1f}s ({rows_this_run / max(elapsed, 1e-9):.0f} rows/s)")
+
+    elapsed = time.perf_counter() - start_time
+    return {'rows': rows_this_run, 'batches': batches_this_run, 'seconds': elapsed,
+            'rows_per_second': rows_this_run / max(elapsed, 1e-9)}
+
+
+def load_domain_locations(domains_location_df, engine=None):
+    """
+    Replace the source locations used by the per-country queries, and rebuild the country rollups.
+
+    Parameters:
+    - domains_location_df (DataFrame): Locations with 'SourceCommonName', 'location' and 'Country' columns.
+    - engine (Engine, optional): Target database; the configured engine by default.
+    """
+    locations = domains_location_df.rename(columns={'SourceCommonName': 'source_name', 'Country': 'country'})
+    locations = locations[['source_name', 'location', 'country']].dropna(subset=['source_name']).drop_duplicates('source_name')
+    with (engine or default_engine).begin() as connection:
+        connection.execute(delete(DomainLocation))
+        connection.execute(insert(DomainLocation), _records(locations))
+    rollups.refresh_rollups(engine, dimensions=['country'])
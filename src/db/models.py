@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, String, Integer, Text, TIMESTAMP, ForeignKey, LargeBinary
 import sys
 sys.path.append('../')
 
@@ -7,27 +7,49 @@ from src.db.db_config import Base
 class Article(Base):
     __tablename__ = 'articles'
     article_id = Column(String, primary_key=True)
-    source_name = Column(String)
-    published_at = Column(TIMESTAMP)
+    source_name = Column(String, index=True)
+    published_at = Column(TIMESTAMP, index=True)
     title = Column(Text)
+    content = Column(Text)
     full_content = Column(Text)
+    title_sentiment = Column(String)
+
+class DomainLocation(Base):
+    __tablename__ = 'domain_locations'
+    source_name = Column(String, primary_key=True)
+    location = Column(String)
+    country = Column(String, index=True)
 
 class Topic(Base):
     __tablename__ = 'topics'
     topic_id = Column(Integer, primary_key=True, autoincrement=True)
     topic_keywords = Column(Text)
-    article_id = Column(String, ForeignKey('articles.article_id'))
+    article_id = Column(String, ForeignKey('articles.article_id'), index=True)
 
 class Event(Base):
     __tablename__ = 'events'
     event_id = Column(Integer, primary_key=True, autoincrement=True)
     event_description = Column(Text)
-    article_id = Column(String, ForeignKey('articles.article_id'))
+    article_id = Column(String, ForeignKey('articles.article_id'), index=True)
 
 class Feature(Base):
     __tablename__ = 'features'
     feature_id = Column(Integer, primary_key=True, autoincrement=True)
-    article_id = Column(String, ForeignKey('articles.article_id'))
-    tfidf_vector = Column(Text)
+    article_id = Column(String, ForeignKey('articles.article_id'), index=True)
+    # Packed sparse vector (see src/db/sparse_codec.py) and the vocabulary it indexes
+    tfidf_vector = Column(LargeBinary)
+    vocabulary_version = Column(String)
     topic = Column(Integer)
     event_cluster = Column(Integer)
+
+class DailyRollup(Base):
+    # Daily article and title sentiment counts per source, topic, event or country, kept up to date
+    # by the loader (see src/db/rollups.py)
+    __tablename__ = 'daily_rollups'
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    day = Column(String(10), primary_key=True)
+    article_count = Column(Integer, nullable=False, default=0)
+    negative_count = Column(Integer, nullable=False, default=0)
+    neutral_count = Column(Integer, nullable=False, default=0)
+    positive_count = Column(Integer, nullable=False, default=0)
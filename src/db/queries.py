@@ -0,0 +1,114 @@
+import pandas as pd
+from sqlalchemy import select, func, case
+
+from src.db.db_config import engine as default_engine
+from src.db.models import Article, DomainLocation
+from scripts.sentiment_stats import SENTIMENT_MAPPING, sentiment_statistics
+
+
+def read_query(statement, engine=None):
+    """
+    Run a query on a pooled connection and return its (small, aggregated) result as a DataFrame.
+    """
+    with (engine or default_engine).connect() as connection:
+        result = connection.execute(statement)
+        return pd.DataFrame(result.all(), columns=list(result.keys()))
+
+
+def stream_query(statement, engine=None, chunksize=10000):
+    """
+    Yield the result of a large query as DataFrames of at most `chunksize` rows.
+
+    Rows are fetched through a server-side cursor (stream_results), so neither the driver nor
+    this process holds the whole result at once.
+    """
+    with (engine or default_engine).connect() as connection:
+        result = connection.execution_options(stream_results=True, max_row_buffer=chunksize).execute(statement)
+        columns = list(result.keys())
+        for rows in result.partitions(chunksize):
+            yield pd.DataFrame(rows, columns=columns)
+
+
+def article_counts_by_source(engine=None, limit=10):
+    """
+    Number of articles per source, largest first.
+
+    Returns:
+    - counts (DataFrame): 'source_name' and 'article_count' columns.
+    """
+    article_count = func.count().label('article_count')
+    statement = (select(Article.source_name, article_count)
+                 .where(Article.source_name.is_not(None))
+                 .group_by(Article.source_name)
+                 .order_by(article_count.desc(), Article.source_name))
+    if limit is not None:
+        statement = statement.limit(limit)
+    return read_query(statement, engine)
+
+
+def sentiment_counts_by_source(engine=None):
+    """
+    Number of articles and of negative/neutral/positive titles per source.
+    """
+    counts = [func.sum(case((Article.title_sentiment == label, 1), else_=0)).label(label.lower())
+              for label in SENTIMENT_MAPPING]
+    statement = (select(Article.source_name, func.count().label('total_reports'), *counts)
+                 .where(Article.source_name.is_not(None))
+                 .group_by(Article.source_name)
+                 .order_by(Article.source_name))
+    return read_query(statement, engine)
+
+
+def sentiment_from_counts(counts):
+    """
+    Average and median title sentiment per source from its sentiment counts.
+
+    Parameters:
+    - counts (DataFrame): 'source_name', 'total_reports', 'negative', 'neutral' and 'positive' columns.
+
+    Returns:
+    - sentiment (DataFrame): 'source_name', 'total_reports', 'avg_sentiment' and 'median_sentiment'.
+    """
+    counts = counts.fillna({'negative': 0, 'neutral': 0, 'positive': 0})
+    stats = sentiment_statistics(counts.assign(unrated=counts['total_reports'] - counts[['negative', 'neutral', 'positive']].sum(axis=1)))
+    return pd.DataFrame({
+        'source_name': counts['source_name'].to_numpy(),
+        'total_reports': stats['total_reports'].to_numpy(),
+        'avg_sentiment': stats['mean_sentiment'].to_numpy(),
+        'median_sentiment': stats['median_sentiment'].to_numpy(),
+    })
+
+
+def sentiment_by_source(engine=None):
+    """
+    Report count and average/median title sentiment per source, aggregated in the database.
+
+    Only the per-source counts of every sentiment leave the database; mean and median are exact
+    functions of those counts (see scripts/sentiment_stats.py).
+
+    Returns:
+    - sentiment (DataFrame): 'source_name', 'total_reports', 'avg_sentiment' and 'median_sentiment'.
+    """
+    return sentiment_from_counts(sentiment_counts_by_source(engine))
+
+
+def volume_by_country(engine=None):
+    """
+    Number of articles published by the sources of every country.
+
+    Returns:
+    - volume (DataFrame): 'Country' and 'num_articles' columns, sorted by country.
+    """
+    statement = (select(DomainLocation.country.label('Country'), func.count().label('num_articles'))
+                 .select_from(Article)
+                 .join(DomainLocation, Article.source_name == DomainLocation.source_name)
+                 .group_by(DomainLocation.country)
+                 .order_by(DomainLocation.country))
+    return read_query(statement, engine)
+
+
+def article_texts(column='content', engine=None, chunksize=10000):
+    """
+    Stream one text column of the articles, e.g. for mention counts, in DataFrame chunks.
+    """
+    return stream_query(select(Article.article_id, getattr(Article, column)), engine, chunksize)
@@ -0,0 +1,128 @@
+import pandas as pd
+from sqlalchemy import select, func, case, cast, delete, String
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.db.db_config import engine as default_engine
+from src.db.models import Article, DomainLocation, Feature, DailyRollup
+
+DIMENSIONS = ['source', 'topic', 'event', 'country']
+COUNT_COLUMNS = ['article_count', 'negative_count', 'neutral_count', 'positive_count']
+KEY_COLUMNS = ['dimension', 'key', 'day']
+
+
+def _aggregate_statement(dimension, article_ids=None):
+    # Daily counts of one dimension, over all articles or over the given ones
+    day = func.coalesce(cast(func.date(Article.published_at), String), '')
+    if dimension == 'source':
+        key, statement = Article.source_name, select().select_from(Article)
+    elif dimension == 'country':
+        key = DomainLocation.country
+        statement = select().select_from(Article).join(DomainLocation, Article.source_name == DomainLocation.source_name)
+    elif dimension in ('topic', 'event'):
+        key = Feature.topic if dimension == 'topic' else Feature.event_cluster
+        statement = select().select_from(Article).join(Feature, Article.article_id == Feature.article_id)
+    else:
+        raise ValueError(f"Unknown rollup dimension: {dimension}. Use one of {DIMENSIONS}.")
+
+    key = cast(key, String)
+    counts = [func.count().label('article_count')] + [
+        func.sum(case((Article.title_sentiment == label, 1), else_=0)).label(f'{label.lower()}_count')
+        for label in ['Negative', 'Neutral', 'Positive']]
+    statement = statement.add_columns(key.label('key'), day.label('day'), *counts).where(key.is_not(None)).group_by(key, day)
+    if article_ids is not None:
+        statement = statement.where(Article.article_id.in_(article_ids))
+    return statement
+
+
+def aggregate(connection, article_ids=None, dimensions=DIMENSIONS):
+    """
+    Compute daily rollup rows from the base tables.
+
+    Parameters:
+    - connection (Connection): An open connection (the rows are read inside its transaction).
+    - article_ids (list, optional): Only count these articles; every article when omitted.
+    - dimensions (list, optional): The dimensions to aggregate.
+
+    Returns:
+    - rows (DataFrame): One row per dimension, key and day with the COUNT_COLUMNS.
+    """
+    frames = []
+    for dimension in dimensions:
+        result = connection.execute(_aggregate_statement(dimension, article_ids))
+        frame = pd.DataFrame(result.all(), columns=list(result.keys()))
+        frame.insert(0, 'dimension', dimension)
+        frames.append(frame)
+    rows = pd.concat(frames, ignore_index=True)
+    rows[COUNT_COLUMNS] = rows[COUNT_COLUMNS].astype('float64').fillna(0).astype('int64')
+    return rows[KEY_COLUMNS + COUNT_COLUMNS]
+
+
+def apply_delta(connection, delta):
+    """
+    Add signed count changes to the rollup table and drop the rows left without articles.
+    """
+    delta = delta[(delta[COUNT_COLUMNS] != 0).any(axis=1)]
+    if delta.empty:
+        return
+    dialect = sqlite if connection.dialect.name == 'sqlite' else postgresql
+    statement = dialect.insert(DailyRollup.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={column: getattr(DailyRollup, column) + statement.excluded[column] for column in COUNT_COLUMNS})
+    connection.execute(statement, delta.astype(object).to_dict(orient='records'))
+    connection.execute(delete(DailyRollup).where(DailyRollup.article_count <= 0))
+
+
+def diff(new, old):
+    """
+    Signed difference of two sets of rollup rows (new - old), keyed by dimension, key and day.
+    """
+    combined = pd.concat([new, old.assign(**{column: -old[column] for column in COUNT_COLUMNS})])
+    return combined.groupby(KEY_COLUMNS, as_index=False)[COUNT_COLUMNS].sum()
+
+
+def refresh_rollups(engine=None, dimensions=DIMENSIONS):
+    """
+    Rebuild the rollups of the given dimensions from a full scan of the base tables.
+    """
+    with (engine or default_engine).begin() as connection:
+        connection.execute(delete(DailyRollup).where(DailyRollup.dimension.in_(dimensions)))
+        apply_delta(connection, aggregate(connection, dimensions=dimensions))
+
+
+def read_rollup(dimension, engine=None, start=None, end=None):
+    """
+    Daily rollup rows of one dimension, optionally limited to days between `start` and `end` (inclusive ISO dates).
+    """
+    statement = select(*[getattr(DailyRollup, column) for column in ['key', 'day'] + COUNT_COLUMNS]).where(DailyRollup.dimension == dimension)
+    if start is not None:
+        statement = statement.where(DailyRollup.day >= str(start))
+    if end is not None:
+        statement = statement.where(DailyRollup.day <= str(end))
+    with (engine or default_engine).connect() as connection:
+        result = connection.execute(statement.order_by(DailyRollup.key, DailyRollup.day))
+        return pd.DataFrame(result.all(), columns=list(result.keys()))
+
+
+def rollup_totals(dimension, engine=None, start=None, end=None):
+    """
+    Counts per key of one dimension over a date range, summed from the daily rollups.
+    """
+    daily = read_rollup(dimension, engine, start, end)
+    return daily.groupby('key', as_index=False)[COUNT_COLUMNS].sum()
+
+
+def check_rollups(engine=None, dimensions=DIMENSIONS):
+    """
+    Compare the maintained rollups with a full recompute.
+
+    Returns:
+    - mismatches (DataFrame): The rows whose counts differ (stored - recomputed); empty when consistent.
+    """
+    with (engine or default_engine).connect() as connection:
+        expected = aggregate(connection, dimensions=dimensions)
+        result = connection.execute(select(DailyRollup.__table__).where(DailyRollup.dimension.in_(dimensions)))
+        stored = pd.DataFrame(result.all(), columns=list(result.keys()))
+    stored[COUNT_COLUMNS] = stored[COUNT_COLUMNS].astype('int64')
+    delta = diff(stored[KEY_COLUMNS + COUNT_COLUMNS], expected)
+    return delta[(delta[COUNT_COLUMNS] != 0).any(axis=1)].reset_index(drop=True)
@@ -0,0 +1,102 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sqlalchemy import select
+
+# Every stored entry is a little-endian uint32 column index followed, after all the indices of
+# the row, by the float32 values: 8 bytes per non-zero instead of a printed dense array
+INDEX_DTYPE = np.dtype('<u4')
+VALUE_DTYPE = np.dtype('<f4')
+
+
+def vocabulary_version(feature_names):
+    """
+    Short hash of a vectorizer vocabulary; vectors are only comparable within one version.
+    """
+    raw = '\n'.join(str(name) for name in feature_names)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def encode_rows(matrix):
+    """
+    Encode every row of a sparse matrix as packed index/value bytes.
+
+    Parameters:
+    - matrix (sparse matrix): The vectors, one per row.
+
+    Returns:
+    - blobs (list of bytes): One entry per row; an empty row encodes to b''.
+    """
+    matrix = sp.csr_matrix(matrix)
+    matrix.sort_indices()
+    index_bytes = matrix.indices.astype(INDEX_DTYPE).tobytes()
+    value_bytes = matrix.data.astype(VALUE_DTYPE).tobytes()
+    bounds = (matrix.indptr * 4).tolist()
+    return [index_bytes[start:end] + value_bytes[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def decode_rows(blobs, n_features=None):
+    """
+    Rebuild a CSR matrix from encoded rows in one vectorized pass.
+
+    Parameters:
+    - blobs (iterable of bytes): Encoded rows; None stands for a missing (empty) row.
+    - n_features (int, optional): Number of columns; the largest stored index + 1 when omitted.
+
+    Returns:
+    - matrix (csr_matrix): float32 matrix with one row per blob.
+    """
+    blobs = [blob or b'' for blob in blobs]
+    nnz = np.fromiter((len(blob) // 8 for blob in blobs), dtype=np.int64, count=len(blobs))
+    indptr = np.concatenate([[0], np.cumsum(nnz)])
+    words = np.frombuffer(b''.join(blobs), dtype=INDEX_DTYPE)
+
+    # Within the 2 * nnz words of a row, the first nnz are indices and the rest the values
+    row_start = np.repeat(2 * indptr[:-1], 2 * nnz)
+    is_index = np.arange(len(words)) - row_start < np.repeat(nnz, 2 * nnz)
+    indices = words[is_index].astype(np.int32)
+    values = words[~is_index].view(VALUE_DTYPE).astype(np.float32)
+
+    if n_features is None:
+        n_features = int(indices.max()) + 1 if len(indices) else 0
+    return sp.csr_matrix((values, indices, indptr), shape=(len(blobs), n_features))
+
+
+def fetch_features(article_ids, engine=None, n_features=None, vocabulary_version=None, chunk_size=10000):
+    """
+    Read the stored TF-IDF vectors of a set of articles back as one CSR matrix.
+
+    Parameters:
+    - article_ids (iterable): The articles; row i of the result belongs to the i-th id.
+    - engine (Engine, optional): Source database; the configured engine by default.
+    - n_features (int, optional): Number of columns (the vocabulary size).
+    - vocabulary_version (str, optional): Only read vectors of this vocabulary version.
+    - chunk_size (int, optional): Number of article ids per query.
+
+    Returns:
+    - matrix (csr_matrix): One row per article; articles without stored features get an empty row.
+
+    Raises:
+    - ValueError: If the stored vectors belong to more than one vocabulary version.
+    """
+    # Imported here so the codec itself does not need a configured database
+    from src.db.db_config import engine as default_engine
+    from src.db.models import Feature
+
+    article_ids = [str(article_id) for article_id in article_ids]
+    rows = []
+    with (engine or default_engine).connect() as connection:
+        # Bounded IN lists keep every statement under the bound-parameter limits of the drivers
+        for start in range(0, len(article_ids), chunk_size):
+            query = select(Feature.article_id, Feature.tfidf_vector, Feature.vocabulary_version).where(
+                Feature.article_id.in_(article_ids[start:start + chunk_size]))
+            if vocabulary_version is not None:
+                query = query.where(Feature.vocabulary_version == vocabulary_version)
+            rows.extend(connection.execute(query).all())
+    stored = pd.DataFrame(rows, columns=['article_id', 'tfidf_vector', 'vocabulary_version'])
+
+    if stored['vocabulary_version'].nunique() > 1:
+        raise ValueError("Stored features mix vocabulary versions; pass vocabulary_version to select one.")
+    blobs = stored.drop_duplicates('article_id', keep='last').set_index('article_id')['tfidf_vector'].reindex(article_ids)
+    return decode_rows(blobs.where(blobs.notna(), None).tolist(), n_features=n_features)
@@ -1,13 +1,11 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import pandas as pd
 import re
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics.pairwise import cosine_similarity
 
-# Load the data
-data_df = pd.read_csv('C:\\Users\\araso\\Documents\\10academy\\data\\data.csv')
+# Nothing is read at import time and sklearn is imported by the functions using it;
+# load_clean_data reads and prepares the articles on demand.
 
 def clean_data(df):
     # Fill missing values
@@ -24,11 +22,6 @@ def clean_data(df):
     
     return df
 
-# Load and clean data
-data_df = pd.read_csv('data.csv')
-data_df = clean_data(data_df)
-
-
 # Data cleaning function
 def clean_text(text):
     text = str(text).lower()  # Convert to lowercase
@@ -36,40 +29,43 @@ def clean_text(text):
     text = re.sub(r'\W', ' ', text)  # Remove non-word characters
     return text
 
-# Apply cleaning
-data_df['cleaned_title'] = data_df['title'].apply(clean_text)
-data_df['cleaned_content'] = data_df['full_content'].apply(clean_text)
+# Load and clean data, adding the cleaned title and content columns
+def load_clean_data(path='data.csv'):
+    data_df = clean_data(pd.read_csv(path))
+    data_df['cleaned_title'] = data_df['title'].apply(clean_text)
+    data_df['cleaned_content'] = data_df['full_content'].apply(clean_text)
+    return data_df
 
-# Convert published_at to datetime
-data_df['published_at'] = pd.to_datetime(data_df['published_at'], errors='coerce')
 
+# Sparse top-n keyword extraction is shared with the topic modeling scripts
+def extract_keywords_tfidf(*args, **kwargs):
+    from scripts.topic_and_event_modeling import extract_keywords_tfidf
+    return extract_keywords_tfidf(*args, **kwargs)
 
-# Function to extract top n keywords using TF-IDF
-def extract_keywords_tfidf(texts, n=5):
-    vectorizer = TfidfVectorizer(max_df=0.8, max_features=10000, stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(texts)
-    feature_names = vectorizer.get_feature_names_out()
-    top_keywords = []
-
-    for i in range(tfidf_matrix.shape[0]):
-        tfidf_scores = tfidf_matrix[i].T.todense() # type: ignore
-        sorted_indices = tfidf_scores.argsort(axis=0)[::-1]
-        top_n = [feature_names[index[0, 0]] for index in sorted_indices[:n]]
-        top_keywords.append(top_n)
-    
-    return top_keywords
+def extract_keyword_ids_tfidf(*args, **kwargs):
+    from scripts.topic_and_event_modeling import extract_keyword_ids_tfidf
+    return extract_keyword_ids_tfidf(*args, **kwargs)
 
 
 # Function to calculate cosine similarity between two lists of keywords
 def calculate_similarity(keywords1, keywords2):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
     vectorizer = TfidfVectorizer().fit([' '.join(keywords1), ' '.join(keywords2)])
     tfidf_matrix = vectorizer.transform([' '.join(keywords1), ' '.join(keywords2)])
     return cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0] # type: ignore
 
 
-# Topic modeling function
-def perform_lda(text_data, n_topics=5):
-    vectorizer = CountVectorizer(max_df=0.9, min_df=10, stop_words='english')
+# Topic modeling function; hashing=True counts the terms in parallel shards without a vocabulary
+# (the returned HashingFeaturizer has no feature names, see feature_names to decode columns)
+def perform_lda(text_data, n_topics=5, hashing=False):
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.decomposition import LatentDirichletAllocation
+    if hashing:
+        from scripts.featurization import HashingFeaturizer
+        vectorizer = HashingFeaturizer(n_features=2 ** 18, use_idf=False, norm=None, max_df=0.9, min_df=10, stop_words='english')
+    else:
+        vectorizer = CountVectorizer(max_df=0.9, min_df=10, stop_words='english')
     dtm = vectorizer.fit_transform(text_data)
     lda_model = LatentDirichletAllocation(n_components=n_topics, random_state=42)
     lda_model.fit(dtm)
@@ -0,0 +1,83 @@
+import sys
+import os
+import json
+import time
+import subprocess
+import pandas as pd
+
+# Time budget (in seconds) of a cold start: importing the dashboard modules and rendering its first page
+STARTUP_BUDGET = float(os.getenv('DASHBOARD_STARTUP_BUDGET', '5'))
+
+# Libraries the first page must not need; they are imported by the sections using them
+HEAVY_MODULES = ['sklearn', 'scipy', 'joblib', 'sqlalchemy', 'psycopg2', 'matplotlib', 'seaborn']
+
+# Modules imported by the dashboard script before it renders anything
+DASHBOARD_MODULES = ['data_cache', 'data_loader', 'src.helper']
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Process-wide timings of the running dashboard, shared by all sessions
+_timings = {}
+
+
+def record(name, seconds):
+    """
+    Record a timing of the running dashboard, keeping its first (cold) and last value.
+    """
+    timing = _timings.setdefault(name, {'first_seconds': seconds, 'runs': 0})
+    timing['last_seconds'] = seconds
+    timing['runs'] += 1
+
+
+def timings():
+    """
+    Timings recorded by the running dashboard, one row per name.
+    """
+    return pd.DataFrame([{'name': name, **timing} for name, timing in _timings.items()],
+                        columns=['name', 'first_seconds', 'last_seconds', 'runs'])
+
+
+def import_report(modules=DASHBOARD_MODULES):
+    """
+    Import every module in a fresh interpreter and report how long it took and which heavy libraries it loaded.
+
+    Returns:
+    - report (DataFrame): 'module', 'seconds' and 'heavy_modules' (comma separated, empty when none).
+    """
+    code = (
+        "import sys, time, json\n"
+        f"sys.path[:0] = [{os.path.join(ROOT_DIR, 'src')!r}, {ROOT_DIR!r}]\n"
+        "import streamlit\n"
+        "started = time.perf_counter()\n"
+        "__import__(sys.argv[1])\n"
+        "seconds = time.perf_counter() - started\n"
+        f"heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "print(json.dumps({'seconds': seconds, 'heavy_modules': ','.join(heavy)}))\n"
+    )
+    rows = []
+    for module in modules:
+        output = subprocess.run([sys.executable, '-c', code, module], capture_output=True, text=True, check=True, cwd=ROOT_DIR)
+        rows.append({'module': module, **json.loads(output.stdout.strip().splitlines()[-1])})
+    return pd.DataFrame(rows, columns=['module', 'seconds', 'heavy_modules'])
+
+
+def first_paint_seconds(timeout=120):
+    """
+    Seconds from a cold run of the dashboard script to its first rendered page (the Tabular page).
+    """
+    from streamlit.testing.v1 import AppTest
+    started = time.perf_counter()
+    app = AppTest.from_file(os.path.join(ROOT_DIR, 'src', 'dashboard.py'), default_timeout=timeout).run()
+    seconds = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(f"The dashboard failed to render: {app.exception[0].value}")
+    return seconds
+
+
+if __name__ == '__main__':
+    report = import_report()
+    print(report.to_string(index=False))
+    paint = first_paint_seconds()
+    print(f"First paint: {paint:.2f}s (budget {STARTUP_BUDGET:.1f}s)")
+    # A non-zero exit status flags a startup regression
+    sys.exit(0 if paint <= STARTUP_BUDGET and not report['heavy_modules'].any() else 1)
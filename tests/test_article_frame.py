@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+from scripts.article_frame import ArticleText, compact_articles, text_lengths, text_word_counts
+
+
+class test_article_frame(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'article_id': [1, 2, 3, 4],
+            'source_name': ['bbc', 'cnn', 'bbc', None],
+            'category': ['Sport', 'Sport', 'World', 'World'],
+            'title': ['Goal!', 'Vote count ’24', '', 'Storm'],
+            'full_content': ['A late goal', ' Polls  close ', None, 'Rain and wind'],
+        })
+
+    def test_compact_keeps_values(self):
+        compact = compact_articles(self.df)
+        self.assertIsInstance(compact['source_name'].dtype, pd.CategoricalDtype)
+        self.assertEqual(str(compact['title'].dtype), 'string')
+        self.assertEqual(compact['title'].dtype.storage, 'pyarrow')
+        self.assertEqual(compact['source_name'].tolist()[:3], ['bbc', 'cnn', 'bbc'])
+        self.assertTrue(pd.isna(compact['source_name'].iloc[3]))
+        self.assertEqual(compact['title'].tolist(), self.df['title'].tolist())
+        self.assertEqual(compact.groupby('category', observed=True).size().tolist(), [2, 2])
+        # The input frame is left unchanged
+        self.assertEqual(self.df['title'].dtype, object)
+
+    def test_lengths_match_python(self):
+        texts = pd.Series(['One two  three', '', None, ' padded\ttitle \n', 'non breaking ’space', 12])
+        expected_words = [len(str(text).split()) if text is not None else 0 for text in texts]
+        expected_lengths = [len(str(text)) if text is not None else 0 for text in texts]
+        np.testing.assert_array_equal(text_word_counts(texts), expected_words)
+        np.testing.assert_array_equal(text_lengths(texts), expected_lengths)
+        compact = compact_articles(self.df)['full_content']
+        np.testing.assert_array_equal(text_lengths(compact), [11, 14, 0, 13])
+
+    def test_article_text_view(self):
+        compact = compact_articles(self.df)
+        view = ArticleText(compact, chunksize=3)
+        expected = (self.df['title'].fillna('') + ' ' + self.df['full_content'].fillna('')).tolist()
+        self.assertEqual(len(view), 4)
+        self.assertEqual(list(view), expected)
+        self.assertEqual(list(view), expected)
+        self.assertEqual(view.to_series().tolist(), expected)
+        matrix = CountVectorizer().fit_transform(view)
+        np.testing.assert_array_equal(matrix.toarray(), CountVectorizer().fit_transform(expected).toarray())
+        self.assertNotIn('text', compact.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from scripts.cooccurrence import source_correlations
+
+
+class test_source_correlations(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 2000
+        self.df = pd.DataFrame({'event_cluster': rng.integers(0, 25, n),
+                                'source_name': rng.choice([f'site{i}' for i in range(40)], n)})
+        # A source in every event exactly once has no variance and no defined correlation
+        self.df = pd.concat([self.df, pd.DataFrame({'event_cluster': range(25), 'source_name': 'constant'})])
+        pivot = pd.pivot_table(self.df, index='event_cluster', columns='source_name', aggfunc='size', fill_value=0)
+        self.expected = pivot.corr()
+
+    def test_top_k_matches_dense_correlation(self):
+        pairs = source_correlations(self.df['event_cluster'], self.df['source_name'], top_k=3, block_size=7)
+        self.assertNotIn('constant', set(pairs['source_name']) | set(pairs['partner']))
+        self.assertEqual(len(pairs), 40 * 3)
+        for source, group in pairs.groupby('source_name'):
+            expected = self.expected[source].drop(source).dropna().sort_values(ascending=False)
+            np.testing.assert_allclose(group['correlation'].to_numpy(), expected.to_numpy()[:3])
+            np.testing.assert_allclose(self.expected.loc[source, group['partner']].to_numpy(), group['correlation'].to_numpy())
+
+    def test_threshold_and_export(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'correlation.npy')
+            pairs = source_correlations(self.df['event_cluster'], self.df['source_name'], top_k=None, threshold=0.3,
+                                        block_size=16, export_path=path)
+            exported = np.load(path)
+            np.testing.assert_allclose(exported, self.expected.to_numpy(), rtol=1e-5, atol=1e-6)
+        dense = self.expected.where(~np.eye(len(self.expected), dtype=bool)).stack()
+        self.assertEqual(len(pairs), int((dense >= 0.3).sum()))
+        self.assertTrue((pairs['correlation'] >= 0.3).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
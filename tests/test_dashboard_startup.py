@@ -0,0 +1,19 @@
+import unittest
+
+from src.startup_timing import import_report, record, timings
+
+
+class test_dashboard_startup(unittest.TestCase):
+    def test_dashboard_modules_import_without_heavy_libraries(self):
+        report = import_report()
+        self.assertEqual(report['heavy_modules'].tolist(), [''] * len(report), report.to_string())
+
+    def test_record_keeps_first_and_last_timing(self):
+        record('test: page', 2.0)
+        record('test: page', 0.5)
+        row = timings().set_index('name').loc['test: page']
+        self.assertEqual((row['first_seconds'], row['last_seconds'], row['runs']), (2.0, 0.5, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
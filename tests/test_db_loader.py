@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sqlalchemy import create_engine, text
+
+from src.db.db_config import Base
+from src.db.loader import load_articles
+from src.db.sparse_codec import decode_rows, encode_rows, fetch_features, vocabulary_version
+
+
+class test_load_articles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'news.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.df = pd.DataFrame({
+            'article_id': [str(i) for i in range(7)],
+            'source_name': ['bbc', 'cnn', 'bbc', 'aljazeera', 'cnn', 'bbc', 'npr'],
+            'published_at': pd.to_datetime(['2024-01-0%d' % (i + 1) for i in range(7)]),
+            'title': [f'title {i}' for i in range(7)],
+            'full_content': [f'content {i}' for i in range(7)],
+            'topic': [0, 2, 1, 0, 0, 2, 1],
+            'cluster': [0, 1, 2, 0, 1, 2, 0],
+            'event_description': [f'event {i % 3}' for i in range(7)],
+        })
+        self.tfidf = sp.random(7, 20, density=0.3, format='csr', random_state=0)
+        self.topics = [['election', 'votes'], ['football'], ['market']]
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def count(self, table):
+        with self.engine.connect() as connection:
+            return connection.execute(text(f'SELECT COUNT(*) FROM {table}')).scalar()
+
+    def test_reload_upserts_instead_of_duplicating(self):
+        load_articles(self.df, self.tfidf, self.topics, engine=self.engine, batch_size=3, verbose=False)
+        updated = self.df.assign(title=self.df['title'] + ' (updated)')
+        stats = load_articles(updated, self.tfidf, self.topics, engine=self.engine, batch_size=3, verbose=False)
+        self.assertEqual(stats['batches'], 3)
+        for table in ['articles', 'topics', 'events', 'features']:
+            self.assertEqual(self.count(table), 7)
+        with self.engine.connect() as connection:
+            title, keywords = connection.execute(text(
+                "SELECT a.title, t.topic_keywords FROM articles a JOIN topics t USING (article_id) WHERE article_id = '3'")).one()
+        self.assertEqual(title, 'title 3 (updated)')
+        self.assertEqual(keywords, 'election, votes')
+
+    def test_repeated_article_keeps_its_last_row(self):
+        df = pd.concat([self.df, self.df.iloc[[3]].assign(title='title 3 (again)', topic=2, event_description='event 9')],
+                       ignore_index=True)
+        tfidf = sp.vstack([self.tfidf, sp.random(1, 20, density=0.5, format='csr', random_state=1)], format='csr')
+        load_articles(df, tfidf, self.topics, engine=self.engine, batch_size=8, verbose=False)
+        for table in ['articles', 'topics', 'events', 'features']:
+            self.assertEqual(self.count(table), 7)
+        with self.engine.connect() as connection:
+            title, keywords, event, topic = connection.execute(text(
+                "SELECT a.title, t.topic_keywords, e.event_description, f.topic FROM articles a JOIN topics t USING (article_id) "
+                "JOIN events e USING (article_id) JOIN features f USING (article_id) WHERE article_id = '3'")).one()
+        self.assertEqual((title, keywords, event, topic), ('title 3 (again)', 'market', 'event 9', 2))
+        np.testing.assert_allclose(fetch_features(['3'], engine=self.engine, n_features=20).toarray(), tfidf[7].toarray(), rtol=1e-6)
+
+    def test_resumes_after_last_committed_batch(self):
+        progress_path = os.path.join(self.tmp.name, 'progress.json')
+        with open(progress_path, 'w') as f:
+            json.dump({'run_key': 'snapshot', 'batches_done': 2, 'rows_loaded': 6}, f)
+        stats = load_articles(self.df, self.tfidf, self.topics, engine=self.engine, batch_size=3,
+                              progress_path=progress_path, run_key='snapshot', verbose=False)
+        self.assertEqual(stats['rows'], 1)
+        self.assertEqual(self.count('articles'), 1)
+        with open(progress_path) as f:
+            self.assertEqual(json.load(f)['batches_done'], 3)
+
+    def test_features_round_trip_through_the_database(self):
+        load_articles(self.df, self.tfidf, self.topics, engine=self.engine, batch_size=3,
+                      vocabulary_version=vocabulary_version(range(20)), verbose=False)
+        ids = ['6', 'missing', '0', '3']
+        matrix = fetch_features(ids, engine=self.engine, n_features=20, chunk_size=2)
+        expected = self.tfidf.toarray()[[6, 0, 0, 3]]
+        expected[1] = 0
+        np.testing.assert_allclose(matrix.toarray(), expected, rtol=1e-6)
+
+
+class test_sparse_codec(unittest.TestCase):
+    def test_round_trip_keeps_empty_rows(self):
+        matrix = sp.csr_matrix(np.array([[0, 1.5, 0, 2], [0, 0, 0, 0], [3, 0, 0, 0]], dtype=np.float32))
+        blobs = encode_rows(matrix)
+        self.assertEqual(blobs[1], b'')
+        self.assertEqual(len(blobs[0]), 16)
+        decoded = decode_rows(blobs + [None], n_features=4)
+        np.testing.assert_array_equal(decoded.toarray(), np.vstack([matrix.toarray(), np.zeros(4)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from src.db.db_config import Base
+from src.db import queries
+from src.db import rollups
+from src.db.loader import load_articles, load_domain_locations, with_title_sentiment
+
+
+class test_queries(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'news.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        rng = np.random.default_rng(0)
+        n = 200
+        self.df = pd.DataFrame({
+            'article_id': [str(i) for i in range(n)],
+            'source_name': rng.choice(['bbc', 'cnn', 'aljazeera', 'npr', 'dw'], n),
+            'published_at': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 30, n), unit='D'),
+            'title': 'title',
+            'content': rng.choice(['news from Kenya', 'China and US talks', 'nothing'], n),
+            'full_content': 'content',
+            'title_sentiment': rng.choice(['Negative', 'Neutral', 'Positive', None], n),
+        })
+        self.locations = pd.DataFrame({'SourceCommonName': ['bbc', 'cnn', 'aljazeera', 'npr'],
+                                       'location': ['GB', 'US', 'QA', 'US'],
+                                       'Country': ['United Kingdom', 'United States', 'Qatar', 'United States']})
+        load_articles(self.df, engine=self.engine, batch_size=64, verbose=False)
+        load_domain_locations(self.locations, engine=self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_sentiment_matches_pandas(self):
+        numeric = self.df['title_sentiment'].map(queries.SENTIMENT_MAPPING)
+        expected = numeric.groupby(self.df['source_name']).agg(['size', 'mean', 'median'])
+        result = queries.sentiment_by_source(self.engine).set_index('source_name').loc[expected.index]
+        np.testing.assert_array_equal(result['total_reports'], expected['size'])
+        np.testing.assert_allclose(result['avg_sentiment'], expected['mean'])
+        np.testing.assert_allclose(result['median_sentiment'], expected['median'])
+
+    def test_counts_and_volume_match_pandas(self):
+        counts = queries.article_counts_by_source(self.engine, limit=None).set_index('source_name')['article_count']
+        pd.testing.assert_series_equal(counts.sort_index(), self.df['source_name'].value_counts().sort_index(),
+                                       check_names=False, check_dtype=False)
+        merged = self.df.merge(self.locations, left_on='source_name', right_on='SourceCommonName')
+        expected = merged.groupby('Country').size()
+        volume = queries.volume_by_country(self.engine).set_index('Country')['num_articles']
+        pd.testing.assert_series_equal(volume, expected, check_names=False, check_dtype=False)
+
+    def test_streamed_text_gives_same_mention_counts(self):
+        from scripts.helper import analyze_country_article_counts
+        chunks = queries.article_texts('content', engine=self.engine, chunksize=50)
+        streamed, _ = analyze_country_article_counts(chunks, pd.DataFrame({'Country': ['Kenya', 'China']}))
+        expected, _ = analyze_country_article_counts(self.df, pd.DataFrame({'Country': ['Kenya', 'China']}))
+        pd.testing.assert_frame_equal(streamed, expected)
+
+    def test_sentiment_from_ratings(self):
+        # data.csv has no title_sentiment column: the labels come from rating.csv
+        articles = self.df.drop(columns='title_sentiment').assign(article_id=range(len(self.df)))
+        ratings = pd.DataFrame({'article_id': self.df['article_id'][::-1].to_numpy(),
+                                'title_sentiment': self.df['title_sentiment'][::-1].to_numpy()})
+        engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'ratings.db')}")
+        Base.metadata.create_all(bind=engine)
+        try:
+            load_articles(with_title_sentiment(articles, ratings), engine=engine, batch_size=64, verbose=False)
+            expected = queries.sentiment_by_source(self.engine).set_index('source_name')
+            result = queries.sentiment_by_source(engine).set_index('source_name').loc[expected.index]
+            self.assertFalse(result['avg_sentiment'].isna().any())
+            pd.testing.assert_frame_equal(result, expected)
+            totals = rollups.rollup_totals('source', engine)
+            self.assertEqual(totals['positive_count'].sum(), (self.df['title_sentiment'] == 'Positive').sum())
+        finally:
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
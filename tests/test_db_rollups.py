@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sqlalchemy import create_engine
+
+from src.db.db_config import Base
+from src.db import queries, rollups
+from src.db.loader import load_articles, load_domain_locations
+
+
+class test_rollups(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'news.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.rng = np.random.default_rng(1)
+        load_domain_locations(pd.DataFrame({'SourceCommonName': ['bbc', 'cnn'], 'location': ['GB', 'US'],
+                                            'Country': ['United Kingdom', 'United States']}), engine=self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def articles(self, ids):
+        n = len(ids)
+        return pd.DataFrame({
+            'article_id': [str(i) for i in ids],
+            'source_name': self.rng.choice(['bbc', 'cnn', 'npr'], n),
+            'published_at': pd.Timestamp('2024-01-01') + pd.to_timedelta(self.rng.integers(0, 5, n), unit='D'),
+            'title': 'title',
+            'full_content': 'content',
+            'title_sentiment': self.rng.choice(['Negative', 'Neutral', 'Positive'], n),
+            'topic': self.rng.integers(0, 3, n),
+            'cluster': self.rng.integers(0, 3, n),
+            'event_description': 'event',
+        })
+
+    def load(self, df):
+        load_articles(df, sp.csr_matrix((len(df), 4)), [['a'], ['b'], ['c']], engine=self.engine, batch_size=25, verbose=False)
+
+    def test_incremental_updates_match_full_recompute(self):
+        self.load(self.articles(range(100)))
+        # Overlapping reload: changed sources, days, sentiments and topics, plus new articles
+        self.load(self.articles(range(60, 160)))
+        self.assertTrue(rollups.check_rollups(self.engine).empty)
+
+        totals = rollups.rollup_totals('source', self.engine).set_index('key')['article_count']
+        counts = queries.article_counts_by_source(self.engine, limit=None).set_index('source_name')['article_count']
+        pd.testing.assert_series_equal(totals.sort_index(), counts.sort_index(), check_names=False, check_dtype=False)
+        self.assertEqual(rollups.rollup_totals('topic', self.engine)['article_count'].sum(), 160)
+
+    def test_topic_and_event_rollups_use_their_own_labels(self):
+        df = self.articles(range(90)).assign(topic=lambda df: np.arange(len(df)) % 3, cluster=lambda df: np.arange(len(df)) // 30)
+        # Topic 0 articles spread over every event cluster, event 0 articles only over the first 30
+        df['topic'] = df['topic'].where(df.index >= 10, 0)
+        self.load(df)
+        for dimension, column in [('topic', 'topic'), ('event', 'cluster')]:
+            totals = rollups.rollup_totals(dimension, self.engine).set_index('key')['article_count']
+            expected = df[column].astype(str).value_counts()
+            pd.testing.assert_series_equal(totals.sort_index(), expected.sort_index(), check_names=False, check_dtype=False)
+
+    def test_refresh_repairs_stale_rollups(self):
+        self.load(self.articles(range(50)))
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql("UPDATE daily_rollups SET article_count = article_count + 1 WHERE dimension = 'event'")
+        self.assertFalse(rollups.check_rollups(self.engine).empty)
+        rollups.refresh_rollups(self.engine, dimensions=['event'])
+        self.assertTrue(rollups.check_rollups(self.engine).empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
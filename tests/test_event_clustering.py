@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from scripts.event_clustering import IncrementalEventClusterer
+
+
+class test_IncrementalEventClusterer(unittest.TestCase):
+    first = [
+        'election vote parliament results', 'election vote campaign results',
+        'football match goal league', 'football league goal striker',
+        'storm flood rain warning', 'flood rain storm damage',
+    ]
+
+    def test_labels_are_stable_and_new_events_spawn(self):
+        clusterer = IncrementalEventClusterer(n_initial_events=3, distance_threshold=0.7)
+        labels = clusterer.partial_fit(range(6), self.first)
+        self.assertEqual(clusterer.n_events, 3)
+        self.assertEqual(labels[0], labels[1])
+
+        batch = ['football goal league final', 'quantum computing chip research', 'election results vote']
+        new_labels = clusterer.partial_fit([2, 10, 11], batch)
+        self.assertEqual(new_labels[0], labels[2])
+        self.assertEqual(new_labels[2], labels[0])
+        # Without any known term an article joins the nearest event instead of opening one
+        self.assertLess(new_labels[1], 3)
+
+        clusterer.distance_threshold = 1e-9
+        spawned = clusterer.partial_fit([20, 21], ['election results rain', 'rain election results'])
+        self.assertEqual(spawned.tolist(), [3, 3])
+        self.assertEqual(clusterer.n_events, 4)
+
+    def test_save_and_load(self):
+        clusterer = IncrementalEventClusterer(n_initial_events=3)
+        labels = clusterer.partial_fit(range(6), self.first)
+        with tempfile.TemporaryDirectory() as path:
+            clusterer.save(path)
+            restored = IncrementalEventClusterer.load(path)
+        np.testing.assert_array_equal(restored.partial_fit(range(6), self.first), labels)
+        np.testing.assert_allclose(restored.centroids, clusterer.centroids)
+
+    def test_small_first_batch_and_appended_labels(self):
+        # Three articles leave no term within min_df=2 and max_df=0.8
+        clusterer = IncrementalEventClusterer(n_initial_events=2)
+        labels = clusterer.partial_fit(range(3), ['storm floods coast', 'court opens trial', 'league final goal'])
+        self.assertEqual(len(labels), 3)
+        with tempfile.TemporaryDirectory() as path:
+            clusterer.save(path)
+            clusterer.partial_fit([3, 4], ['storm floods city', 'court trial verdict'])
+            clusterer.save(path)
+            # The second save only writes the labels of the two new articles
+            shards = sorted(name for name in os.listdir(path) if name.startswith('labels-'))
+            self.assertEqual([len(np.load(os.path.join(path, name))['labels']) for name in shards], [3, 2])
+            restored = IncrementalEventClusterer.load(path)
+            self.assertEqual(restored.labels_, clusterer.labels_)
+            restored.partial_fit([5], ['league goal again'])
+            restored.save(path)
+            self.assertEqual(len(IncrementalEventClusterer.load(path).labels_), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from scripts.feature_store import FeatureStore, snapshot_fingerprint
+
+
+class test_FeatureStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = FeatureStore(self.tmp.name)
+        self.df = pd.DataFrame({
+            'title': ['Election results', 'Football final', 'Election debate', 'Market rally'],
+            'full_content': ['votes counted in the election', 'the final match of football',
+                             'debate before the votes', 'stocks rally in the market'],
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_persisted_matrix_is_memory_mapped(self):
+        matrix, vectorizer = self.store.get_or_build('tfidf', self.df)
+        self.assertEqual(matrix.shape[0], len(self.df))
+        self.assertFalse(matrix.data.flags.writeable)
+        expected = vectorizer.transform(self.df['title'] + ' ' + self.df['full_content'])
+        np.testing.assert_allclose(matrix.toarray(), expected.toarray())
+
+    def test_snapshot_change_builds_new_entry(self):
+        fingerprint = snapshot_fingerprint(self.df)
+        self.store.get_or_build('counts', self.df)
+        self.assertTrue(self.store.exists('counts', fingerprint))
+        changed = self.df.assign(title=self.df['title'] + ' update')
+        self.assertNotEqual(snapshot_fingerprint(changed), fingerprint)
+        self.assertFalse(self.store.exists('counts', snapshot_fingerprint(changed)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+from scripts.featurization import HashingFeaturizer, stack_rows
+from scripts.topic_and_event_modeling import extract_keywords_tfidf
+
+
+class test_featurization(unittest.TestCase):
+    def setUp(self):
+        words = ['election', 'vote', 'market', 'inflation', 'storm', 'floods', 'goal', 'league', 'court', 'trial']
+        rng = np.random.default_rng(0)
+        self.texts = [' '.join(rng.choice(words, 12)) for _ in range(40)] + ['', 'The of and']
+
+    def test_matches_sklearn_tfidf(self):
+        expected = TfidfTransformer().fit_transform(
+            HashingVectorizer(n_features=2 ** 12, alternate_sign=False, norm=None).transform(self.texts))
+        for n_jobs in [1, 2]:
+            featurizer = HashingFeaturizer(n_features=2 ** 12, n_jobs=n_jobs, shard_size=7)
+            matrix = featurizer.fit_transform(iter(self.texts))
+            self.assertEqual(matrix.shape, (len(self.texts), 2 ** 12))
+            self.assertAlmostEqual(abs(matrix - expected).max(), 0.0)
+            # transform reuses the document frequencies of the fit
+            self.assertAlmostEqual(abs(featurizer.transform(self.texts[:5]) - expected[:5]).max(), 0.0)
+
+    def test_stack_rows_and_df_filters(self):
+        blocks = [sp.random(3, 20, density=0.3, format='csr', random_state=i) for i in range(3)] + [sp.csr_matrix((0, 20))]
+        stacked = stack_rows([(b.data, b.indices, b.indptr) for b in blocks], 20)
+        self.assertEqual((stacked != sp.vstack(blocks)).nnz, 0)
+
+        texts = ['common rare', 'common', 'common twice', 'twice']
+        featurizer = HashingFeaturizer(n_features=2 ** 10, use_idf=False, norm=None, min_df=2, max_df=0.7, n_jobs=1)
+        counts = featurizer.fit_transform(texts)
+        # 'common' (3 of 4 documents) and 'rare' (1 document) are dropped, 'twice' is kept
+        names = featurizer.feature_names(np.unique(counts.indices), texts)
+        self.assertEqual(names.tolist(), ['twice'])
+        with self.assertRaises(ValueError):
+            HashingFeaturizer().transform(texts)
+
+    def test_feature_names_and_hashing_keywords(self):
+        featurizer = HashingFeaturizer(n_features=2 ** 12, n_jobs=1).fit(self.texts)
+        vectorizer = HashingVectorizer(n_features=2 ** 12, alternate_sign=False)
+        columns = [vectorizer.transform([word]).indices[0] for word in ['storm', 'court']]
+        self.assertEqual(featurizer.feature_names(columns + [1], self.texts).tolist(), ['storm', 'court', ''])
+
+        texts = pd.Series(['Storm floods the coast', 'The court opens the trial', 'Storm and floods again'])
+        # Tied scores may be ordered differently, so the keywords are compared as sets
+        hashed = extract_keywords_tfidf(texts, n=3, hashing=True)
+        self.assertEqual([set(words) for words in hashed], [set(words) for words in extract_keywords_tfidf(texts, n=3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
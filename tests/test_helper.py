@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from scripts import helper
+
+
+class test_CleanDataStreaming(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 500
+        df = pd.DataFrame({
+            'article_id': np.arange(n),
+            'source_name': rng.choice([' bbc.co.uk', 'cnn.com ', 'Reuters'], n),
+            'title': rng.choice(['Markets rally ', ' Election day', None], n),
+            'full_content': rng.choice(['Long text about the economy.', '  ', None], n),
+            'published_at': rng.choice(['2024-01-02 10:00:00', 'not a date', None], n),
+            'score': np.where(rng.random(n) < 0.2, np.nan, rng.random(n) * 100),
+        })
+        df = pd.concat([df, df.iloc[::7]], ignore_index=True)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'data.csv')
+        df.to_csv(self.path, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_clean_data(self):
+        for strategy in ['mean', 'median', 'mode', {'score': -1}]:
+            expected = helper.clean_data(pd.read_csv(self.path), fillna_strategy=strategy)
+            # Stripped text columns are object columns, as before the vectorized strip
+            self.assertEqual(expected['source_name'].dtype, object)
+            for chunksize in [64, 1000]:
+                result = helper.clean_data_streaming(self.path, chunksize=chunksize, fillna_strategy=strategy)
+                pd.testing.assert_frame_equal(result.reset_index(drop=True), expected)
+
+    def test_fill_columns(self):
+        for strategy in ['median', 'mode']:
+            expected = helper.clean_data(pd.read_csv(self.path), fillna_strategy=strategy, fill_columns=['score', 'title'])
+            result = helper.clean_data_streaming(self.path, chunksize=64, fillna_strategy=strategy, fill_columns=['score', 'title'])
+            pd.testing.assert_frame_equal(result.reset_index(drop=True), expected)
+        # Only the listed columns are counted and filled
+        self.assertTrue(result['published_at'].isna().any())
+        self.assertFalse(result['score'].isna().any())
+        self.assertEqual(result['title'].dtype, object)
+
+    def test_dedupe_subset(self):
+        result = helper.clean_data_streaming(self.path, chunksize=100, dedupe_subset=['article_id'])
+        self.assertFalse(result['article_id'].duplicated().any())
+
+    def test_invalid_strategy(self):
+        with self.assertRaises(ValueError):
+            list(helper.iter_clean_data(self.path, fillna_strategy='bogus'))
+
+
+if __name__ == '__main__':
+    unittest.main()
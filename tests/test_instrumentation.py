@@ -0,0 +1,68 @@
+import os
+import json
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from scripts import instrumentation
+from scripts.instrumentation import instrumented, span
+
+
+@instrumented
+def allocate(frame, size):
+    return np.ones(size).sum()
+
+
+class test_instrumentation(unittest.TestCase):
+    def setUp(self):
+        self.was_enabled = instrumentation.is_enabled()
+        instrumentation.clear()
+
+    def tearDown(self):
+        instrumentation.enable() if self.was_enabled else instrumentation.disable()
+        instrumentation.clear()
+
+    def test_nothing_recorded_when_disabled(self):
+        instrumentation.disable()
+        self.assertEqual(allocate(pd.DataFrame({'a': [1, 2]}), 10), 10)
+        with span('panel'):
+            pass
+        self.assertTrue(instrumentation.trace().empty)
+
+    def test_nested_spans(self):
+        instrumentation.enable()
+        with span('panel', rows=3):
+            allocate(pd.DataFrame({'a': range(5)}), 2 ** 20)
+        with self.assertRaises(ZeroDivisionError):
+            with span('failing'):
+                1 / 0
+        trace = instrumentation.trace().set_index('name')
+        self.assertEqual(trace.loc['test_instrumentation.allocate', 'parent'], 'panel')
+        self.assertEqual(trace.loc['test_instrumentation.allocate', 'rows'], 5)
+        self.assertEqual(trace.loc['panel', 'rows'], 3)
+        self.assertEqual(trace.loc['failing', 'error'], 'ZeroDivisionError')
+        # One million float64 values: 8 MB allocated within the call, and within the enclosing panel
+        self.assertGreater(trace.loc['test_instrumentation.allocate', 'peak_memory_mb'], 7.5)
+        self.assertGreaterEqual(trace.loc['panel', 'peak_memory_mb'], trace.loc['test_instrumentation.allocate', 'peak_memory_mb'])
+        self.assertGreaterEqual(trace.loc['panel', 'wall_seconds'], trace.loc['test_instrumentation.allocate', 'wall_seconds'])
+
+    def test_export_and_summary(self):
+        instrumentation.enable(trace_memory=False)
+        for _ in range(3):
+            allocate([1, 2], 10)
+        summary = instrumentation.summary()
+        self.assertEqual(summary.loc[0, 'calls'], 3)
+        self.assertEqual(summary.loc[0, 'last_rows'], 2)
+        directory = tempfile.mkdtemp()
+        with open(instrumentation.export(os.path.join(directory, 'trace.json'))) as f:
+            records = json.load(f)
+        self.assertEqual([record['rows'] for record in records], [2, 2, 2])
+        self.assertIsNone(records[0]['peak_memory_mb'])
+        trace = pd.read_csv(instrumentation.export(os.path.join(directory, 'trace.csv')))
+        self.assertEqual(list(trace.columns), instrumentation.TRACE_COLUMNS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+from scripts.model_registry import ModelRegistry
+
+
+class test_ModelRegistry(unittest.TestCase):
+    def test_load_or_train_trains_once(self):
+        X = np.random.default_rng(0).random((50, 4))
+        calls = []
+
+        def train():
+            calls.append(1)
+            return KMeans(n_clusters=3, n_init=1, random_state=0).fit(X)
+
+        with tempfile.TemporaryDirectory() as root:
+            registry = ModelRegistry(root)
+            first = registry.load_or_train('kmeans', 'abc', {'n_clusters': 3}, train)
+            second = registry.load_or_train('kmeans', 'abc', {'n_clusters': 3}, train)
+            registry.load_or_train('kmeans', 'abc', {'n_clusters': 4}, train)
+            self.assertEqual(len(calls), 2)
+            self.assertIsInstance(second.cluster_centers_, np.memmap)
+            np.testing.assert_array_equal(first.labels_, second.labels_)
+            self.assertEqual(len(registry.list_models()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
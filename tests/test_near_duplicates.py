@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from scripts.near_duplicates import NearDuplicateIndex, detect_near_duplicates
+
+
+class test_NearDuplicateIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        vocabulary = [f'word{i}' for i in range(3000)]
+        self.originals = [' '.join(rng.choice(vocabulary, 200)) for _ in range(50)]
+        # Republished copies with a few words edited
+        self.copies = []
+        for text in self.originals[:10]:
+            words = text.split()
+            words[5] = words[120] = 'edited'
+            self.copies.append(' '.join(words))
+
+    def frame(self, texts, start, source):
+        return pd.DataFrame({'article_id': [str(start + i) for i in range(len(texts))],
+                             'full_content': texts, 'source_name': source})
+
+    def test_copies_join_their_original(self):
+        data = pd.concat([self.frame(self.originals, 0, 'wire'), self.frame(self.copies, 100, 'site'),
+                          self.frame(['too short'], 200, 'site')], ignore_index=True)
+        assignments, index = detect_near_duplicates(data, batch_size=16)
+        self.assertEqual(assignments['is_duplicate'].sum(), 10)
+        duplicates = assignments[assignments['is_duplicate']]
+        self.assertEqual(duplicates['canonical_id'].tolist(), [str(i) for i in range(10)])
+        self.assertTrue((duplicates['similarity'] >= 0.8).all())
+        sources = index.syndication_sources()
+        self.assertEqual(sources.iloc[0].tolist(), ['wire', 'site', 10])
+        self.assertEqual(len(index.syndication_groups()), 20)
+
+    def test_persisted_index_checks_new_articles(self):
+        index = NearDuplicateIndex()
+        index.add(range(50), self.originals)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state')
+            NearDuplicateIndex().save(path)
+            # Saving replaces the previous state through a temporary directory
+            index.save(path)
+            self.assertEqual(os.listdir(tmp), ['state'])
+            restored = NearDuplicateIndex.load(path)
+        assignments = restored.add(['3', 'new'], [self.originals[3], self.copies[7]])
+        self.assertEqual(assignments['canonical_id'].tolist(), ['3', '7'])
+        self.assertEqual(len(restored), 51)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sqlalchemy import create_engine, text
+
+from scripts.pipeline import Pipeline, Stage, _FreshProcessPool, load_database
+
+
+def read_numbers(path):
+    with open(path) as f:
+        return [int(line) for line in f if line.strip()]
+
+
+def total(numbers):
+    return sum(numbers)
+
+
+def parity(numbers):
+    return sorted({number % 2 for number in numbers})
+
+
+def combine(total, parity):
+    return {'total': total, 'parity': parity}
+
+
+def failing(value):
+    raise ValueError(value)
+
+
+class test_pipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, 'numbers.txt')
+        self.write_numbers([1, 2, 3])
+        self.pipeline = Pipeline([
+            Stage('numbers', read_numbers, ['numbers_txt']),
+            Stage('total', total, ['numbers']),
+            Stage('parity', parity, ['numbers']),
+            Stage('combined', combine, ['total', 'parity']),
+        ], {'numbers_txt': self.source}, root=os.path.join(self.tmp.name, 'pipeline'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_numbers(self, numbers):
+        with open(self.source, 'w') as f:
+            f.write('\n'.join(map(str, numbers)))
+        # Make sure the modification time changes between writes
+        stamp = time.time() + len(numbers)
+        os.utime(self.source, (stamp, stamp))
+
+    def test_fresh_process_pool(self):
+        # The pool used on Python 3.10 runs every task in a new process
+        with _FreshProcessPool(1) as executor:
+            pids = [executor.submit(os.getpid).result() for _ in range(2)]
+            error = executor.submit(failing, 'boom').exception()
+        self.assertNotEqual(pids[0], pids[1])
+        self.assertIsInstance(error, ValueError)
+
+    def statuses(self, report):
+        return dict(zip(report['stage'], report['status']))
+
+    def test_runs_stages_and_skips_unchanged_ones(self):
+        report = self.pipeline.run()
+        self.assertEqual(set(self.statuses(report).values()), {'ran'})
+        self.assertTrue((report['peak_memory_mb'] > 0).all())
+        self.assertEqual(self.pipeline.output('combined'), {'total': 6, 'parity': [0, 1]})
+        self.assertEqual(set(self.statuses(self.pipeline.run()).values()), {'cached'})
+
+    def test_new_data_only_reruns_affected_stages(self):
+        self.pipeline.run()
+        # New data reruns every stage reading it
+        self.write_numbers([1, 2, 5])
+        statuses = self.statuses(self.pipeline.run())
+        self.assertEqual(statuses, {'numbers': 'ran', 'total': 'ran', 'parity': 'ran', 'combined': 'ran'})
+        self.assertEqual(self.pipeline.output('combined')['total'], 8)
+        # A rewritten but identical file reruns the reading stage only, whose output is unchanged
+        self.write_numbers([1, 2, 5])
+        statuses = self.statuses(self.pipeline.run())
+        self.assertEqual(statuses, {'numbers': 'ran', 'total': 'cached', 'parity': 'cached', 'combined': 'cached'})
+
+    def test_targets_and_force(self):
+        report = self.pipeline.run(targets=['total'])
+        self.assertEqual(sorted(report['stage']), ['numbers', 'total'])
+        statuses = self.statuses(self.pipeline.run(targets=['total'], force=['total']))
+        self.assertEqual(statuses, {'numbers': 'cached', 'total': 'ran'})
+
+    def test_database_stage_reloads_changed_ratings(self):
+        data_df = pd.DataFrame({'article_id': [1, 2, 3], 'source_name': ['bbc', 'cnn', 'bbc'],
+                                'published_at': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+                                'title': ['Storm floods', 'Court trial', 'Storm again'],
+                                'full_content': ['storm floods coast', 'court opens trial', 'storm floods again']})
+        locations = pd.DataFrame({'SourceCommonName': ['bbc'], 'location': ['GB'], 'Country': ['United Kingdom']})
+        vectorizer = TfidfVectorizer()
+        tfidf = {'matrix': vectorizer.fit_transform(data_df['full_content']), 'vectorizer': vectorizer}
+        topics = {'topics': [['storm'], ['court']], 'assignments': [0, 1, 0]}
+        events = {'labels': [1, 0, 1], 'descriptions': ['court', 'storm']}
+        engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'news.db')}")
+        progress_path = os.path.join(self.tmp.name, 'load_progress.json')
+        try:
+            for sentiment in ['Positive', 'Negative']:
+                ratings = pd.DataFrame({'article_id': [1, 2, 3], 'title_sentiment': sentiment})
+                stats = load_database(data_df, locations, ratings, tfidf, topics, events, progress_path=progress_path, engine=engine)
+                # The finished first load does not make the rerun with new ratings skip every batch
+                self.assertEqual(stats['rows'], 3)
+                with engine.connect() as connection:
+                    stored = connection.execute(text('SELECT DISTINCT title_sentiment FROM articles')).scalars().all()
+                self.assertEqual(stored, [sentiment])
+        finally:
+            engine.dispose()
+
+    def test_unknown_input(self):
+        with self.assertRaises(ValueError):
+            Pipeline([Stage('total', total, ['missing'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from scripts.plot_summaries import box_summaries, content_lengths, downsample_points, word_counts
+
+
+class test_plot_summaries(unittest.TestCase):
+    def test_lengths_match_per_row_apply(self):
+        texts = pd.Series(['One two  three', '', None, ' padded\ttitle \n'])
+        np.testing.assert_array_equal(word_counts(texts), texts.apply(lambda x: len(x.split()) if x else 0))
+        np.testing.assert_array_equal(content_lengths(texts), texts.apply(lambda x: len(x) if x else 0))
+
+    def test_box_summaries_match_numpy(self):
+        rng = np.random.default_rng(0)
+        groups = rng.choice(['bbc', 'cnn', 'npr'], 3000)
+        values = rng.lognormal(size=3000)
+        summary, outliers = box_summaries(values, groups, max_outliers=5)
+        for group in ['bbc', 'cnn', 'npr']:
+            group_values = values[groups == group]
+            q1, median, q3 = np.quantile(group_values, [0.25, 0.5, 0.75])
+            limit = q3 + 1.5 * (q3 - q1)
+            row = summary.loc[group]
+            np.testing.assert_allclose([row['q1'], row['median'], row['q3']], [q1, median, q3])
+            self.assertEqual(row['upperfence'], group_values[group_values <= limit].max())
+            self.assertEqual(row['outliers'], (group_values > limit).sum())
+            sampled = outliers.loc[outliers['group'] == group, 'value']
+            self.assertEqual(len(sampled), 5)
+            self.assertEqual(sampled.max(), group_values.max())
+
+    def test_downsample_keeps_sparse_points(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'x': np.concatenate([rng.normal(size=20000), [50.0, -50.0]]),
+                           'y': np.concatenate([rng.normal(size=20000), [50.0, 50.0]])})
+        sample = downsample_points(df, 'x', 'y', max_points=1000)
+        self.assertLessEqual(len(sample), 1000)
+        self.assertGreater(len(sample), 900)
+        self.assertTrue({20000, 20001} <= set(sample.index))
+        self.assertTrue(downsample_points(df.head(10), 'x', 'y', max_points=1000).equals(df.head(10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
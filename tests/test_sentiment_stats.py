@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from scripts.sentiment_stats import (SENTIMENT_MAPPING, merge_counts, sentiment_counts,
+                                     sentiment_distribution, sentiment_statistics)
+
+
+class test_sentiment_stats(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 500
+        self.df = pd.DataFrame({
+            'source_name': rng.choice(['bbc', 'cnn', 'npr', 'dw', None], n),
+            'title_sentiment': rng.choice(['Negative', 'Neutral', 'Positive', None, 'Unknown'], n, p=[.3, .3, .3, .05, .05]),
+        })
+
+    def test_statistics_match_pandas(self):
+        numeric = self.df['title_sentiment'].map(SENTIMENT_MAPPING)
+        expected = numeric.groupby(self.df['source_name']).agg(['size', 'count', 'mean', 'median', 'var'])
+        stats = sentiment_statistics(sentiment_counts(self.df))
+        np.testing.assert_array_equal(stats.index, expected.index)
+        np.testing.assert_array_equal(stats['total_reports'], expected['size'])
+        np.testing.assert_array_equal(stats['count'], expected['count'])
+        for column, expected_column in [('mean_sentiment', 'mean'), ('median_sentiment', 'median'), ('variance_sentiment', 'var')]:
+            np.testing.assert_allclose(stats[column], expected[expected_column])
+
+    def test_merged_batches_equal_full_pass(self):
+        batches = [sentiment_counts(self.df.iloc[start:start + 120]) for start in range(0, len(self.df), 120)]
+        pd.testing.assert_frame_equal(merge_counts(*batches), sentiment_counts(self.df))
+        batches = [sentiment_counts(self.df.iloc[start:start + 120], dropna=False) for start in range(0, len(self.df), 120)]
+        pd.testing.assert_frame_equal(merge_counts(*batches), sentiment_counts(self.df, dropna=False))
+
+    def test_distribution_matches_value_counts(self):
+        expected = self.df['title_sentiment'].value_counts(normalize=True)
+        distribution = sentiment_distribution(sentiment_counts(self.df, dropna=False))
+        pd.testing.assert_series_equal(distribution.sort_index(), expected.sort_index(), check_index_type=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
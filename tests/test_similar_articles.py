@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from scripts.similar_articles import SimilarArticleIndex, evaluate_recall
+
+
+class test_SimilarArticleIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        topics = [[f'topic{t}word{i}' for i in range(30)] for t in range(6)]
+        background = [f'word{i}' for i in range(2000)]
+        self.texts, self.topics = [], []
+        for i in range(300):
+            topic = i % 6
+            words = list(rng.choice(topics[topic], 40)) + list(rng.choice(background, 60))
+            self.texts.append(' '.join(rng.permutation(words)))
+            self.topics.append(topic)
+        self.ids = [f'a{i}' for i in range(300)]
+
+    def test_similar_articles_share_the_topic(self):
+        index = SimilarArticleIndex(seed=1)
+        self.assertEqual(index.add(self.ids, self.texts), 300)
+        similar = index.similar('a0', k=5)
+        self.assertEqual(similar['rank'].tolist(), [1, 2, 3, 4, 5])
+        self.assertNotIn('a0', similar['article_id'].tolist())
+        self.assertTrue(all(self.topics[int(article_id[1:])] == 0 for article_id in similar['article_id']))
+        self.assertTrue((np.diff(similar['similarity']) <= 0).all())
+        # Re-ranked scores are exact cosine similarities
+        exact = index.exact_similar('a0', k=50).set_index('article_id')['similarity']
+        np.testing.assert_allclose(similar['similarity'], exact.loc[similar['article_id']], rtol=1e-5)
+        with self.assertRaises(KeyError):
+            index.similar('missing')
+
+        report = evaluate_recall(index, k=5, n_queries=50)
+        self.assertGreaterEqual(report['recall'], 0.8)
+
+    def test_incremental_add_and_persistence(self):
+        index = SimilarArticleIndex(seed=1)
+        index.add(self.ids[:200], self.texts[:200])
+        # Known ids are skipped; new articles are vectorized with the fitted vectorizer
+        self.assertEqual(index.add(self.ids[150:], self.texts[150:]), 100)
+        self.assertEqual(len(index), 300)
+
+        attributes = dict(vars(index.vectorizer))
+        with tempfile.TemporaryDirectory() as path:
+            index.save(path)
+            # Saving leaves the (possibly shared) index untouched
+            self.assertEqual(vars(index.vectorizer).keys(), attributes.keys())
+            restored = SimilarArticleIndex.load(path)
+            self.assertEqual(restored.n_bits, index.n_bits)
+            self.assertTrue(restored.similar('a250', k=5).equals(index.similar('a250', k=5)))
+            self.assertEqual(len(SimilarArticleIndex.load(path + '/empty')), 0)
+
+        results = index.query([self.texts[7], 'no known words'], k=3)
+        self.assertEqual(results[results['query'] == 0]['article_id'].iloc[0], 'a7')
+        self.assertEqual(set(results['query']), {0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from scripts.helper import analyze_region_article_counts
+from scripts.source_dimension import AFRICA_LOCATIONS, EU_LOCATIONS, REGION_BITS, SourceDimension, normalize_sources
+
+
+class test_source_dimension(unittest.TestCase):
+    def setUp(self):
+        self.domains_location = pd.DataFrame({
+            'SourceCommonName': ['bbc.co.uk', 'aljazeera.com', 'Punchng.com', 'lemonde.fr', None],
+            'location': ['GB', 'QA', 'NG', 'FR', 'EG'],
+            'Country': ['United Kingdom', 'Qatar', 'Nigeria', 'France', 'Egypt'],
+        })
+        self.traffic = pd.DataFrame({
+            'Domain': ['bbc.co.uk', 'www.aljazeera.com', 'lemonde.fr', 'lemonde.fr', 'google.com'],
+            'GlobalRank': [90, 400, 1200, 1100, 1],
+        })
+        self.sources = SourceDimension(self.domains_location, self.traffic)
+
+    def test_normalized_ids_and_lookups(self):
+        codes, keys = normalize_sources(pd.Series(['https://www.BBC.co.uk/news', ' bbc.co.uk ', None]))
+        self.assertEqual(keys[codes[:2]].tolist(), ['bbc.co.uk', 'bbc.co.uk'])
+        self.assertEqual(codes[2], -1)
+
+        # Location and traffic rows of one source share an id; google.com only has a rank
+        self.assertEqual(len(self.sources), 5)
+        names = pd.Series(['AlJazeera.com', 'lemonde.fr', 'unknown.org', None, 'google.com'], index=[5, 6, 7, 8, 9])
+        attributes = self.sources.lookup(names, ['GlobalRank', 'Country'])
+        self.assertEqual(attributes.index.tolist(), [5, 6, 7, 8, 9])
+        # The best rank of a domain listed twice
+        np.testing.assert_array_equal(attributes['GlobalRank'].to_numpy(), [400, 1100, np.nan, np.nan, 1])
+        self.assertEqual(attributes['Country'].tolist()[:2], ['Qatar', 'France'])
+        self.assertTrue(attributes['Country'].iloc[2:].isna().all())
+
+    def test_region_bitmask(self):
+        self.assertEqual(self.sources.in_region(['punchng.com', 'aljazeera.com', 'bbc.co.uk', 'nope'], 'Africa').tolist(),
+                         [True, False, False, False])
+        self.assertEqual(sorted(self.sources.region_sources('EU')), ['lemonde.fr'])
+        self.assertEqual(self.sources.table.set_index('source').loc['aljazeera.com', 'regions'], REGION_BITS['Middle East'])
+
+        # Same result as filtering the location frame by the region location codes
+        data = pd.DataFrame({'content': ['Punchng.com reports', 'lemonde.fr and aljazeera.com', 'China and US talks']})
+        top, _ = analyze_region_article_counts(data, self.domains_location, source_dimension=self.sources)
+        counts = dict(zip(top['Region'], top['ArticleCount']))
+        self.assertEqual((counts['Africa'], counts['EU'], counts['Middle East'], counts['China']), (1, 1, 1, 1))
+
+    def test_region_counts_match_location_filter_for_respelled_sources(self):
+        # Two spellings of one source, located in different regions
+        locations = pd.DataFrame({'SourceCommonName': ['allafrica.com', 'AllAfrica.com', 'lemonde.fr'],
+                                  'location': ['GB', 'NG', 'FR'], 'Country': ['United Kingdom', 'Nigeria', 'France']})
+        sources = SourceDimension(locations)
+        self.assertEqual(len(sources), 2)
+        self.assertTrue(sources.in_region(['allafrica.com'], 'Africa')[0])
+        for region, codes in [('Africa', AFRICA_LOCATIONS), ('EU', EU_LOCATIONS)]:
+            expected = locations[locations['location'].isin(codes)]['SourceCommonName'].dropna().unique()
+            self.assertEqual(sorted(sources.region_sources(region)), sorted(expected))
+
+        data = pd.DataFrame({'content': ['From AllAfrica.com', 'allafrica.com says', 'lemonde.fr']})
+        top, _ = analyze_region_article_counts(data, locations, source_dimension=sources)
+        counts = dict(zip(top['Region'], top['ArticleCount']))
+        # The counts of the location filter used before the source dimension
+        self.assertEqual((counts['Africa'], counts['EU']), (1, 1))
+
+    def test_counts_by_country(self):
+        articles = pd.Series(['bbc.co.uk', 'BBC.co.uk', 'lemonde.fr', 'google.com', 'unknown.org']).astype('category')
+        counts = self.sources.counts_by(articles, 'Country')
+        self.assertEqual(counts.to_dict(), {'France': 1, 'United Kingdom': 2})
+        merged = (articles.to_frame('source_name').groupby('source_name', observed=True).size().reset_index(name='n')
+                  .merge(self.domains_location, left_on='source_name', right_on='SourceCommonName').groupby('Country')['n'].sum())
+        # The normalized ids also join the 'BBC.co.uk' spelling that the merge drops
+        self.assertEqual(merged.to_dict(), {'France': 1, 'United Kingdom': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
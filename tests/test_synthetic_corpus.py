@@ -0,0 +1,50 @@
+import unittest
+
+import pandas as pd
+
+from benchmarks.run_benchmarks import compare
+from benchmarks.synthetic_corpus import generate_corpus
+from scripts.helper import analyze_country_article_counts, clean_data
+
+
+class test_synthetic_corpus(unittest.TestCase):
+    def setUp(self):
+        self.frames = generate_corpus(2000, seed=3)
+
+    def test_deterministic(self):
+        again = generate_corpus(2000, seed=3)
+        for name, frame in self.frames.items():
+            pd.testing.assert_frame_equal(frame, again[name])
+        self.assertFalse(generate_corpus(2000, seed=4)['data']['title'].equals(self.frames['data']['title']))
+
+    def test_shape_of_the_datasets(self):
+        data = self.frames['data']
+        self.assertEqual(len(data), 2000)
+        self.assertEqual(list(self.frames['rating']['article_id']), list(data['article_id']))
+        self.assertTrue(set(data['source_name']) <= set(self.frames['domains_location']['SourceCommonName']))
+        # A few large sites and a long tail
+        counts = data['source_name'].value_counts()
+        self.assertGreater(counts.iloc[0], 10 * counts.median())
+        top_countries, _ = analyze_country_article_counts(clean_data(data), clean_data(self.frames['domains_location']))
+        self.assertGreater(top_countries['ArticleCount'].iloc[0], 0)
+
+    def test_compare_flags_regressions(self):
+        results = pd.DataFrame({'benchmark': ['fast', 'slow', 'noisy'], 'seconds': [1.0, 3.0, 0.02],
+                                'peak_memory_mb': [100.0, 100.0, 1.0]})
+        baseline = {'fast': {'seconds': 1.0, 'peak_memory_mb': 50.0}, 'slow': {'seconds': 1.0, 'peak_memory_mb': 100.0},
+                    'noisy': {'seconds': 0.01, 'peak_memory_mb': 0.1}}
+        comparison = compare(results, baseline, tolerance=0.5)
+        self.assertEqual(comparison['regression'].tolist(), [True, True, False])
+
+    def test_compare_without_baseline(self):
+        results = pd.DataFrame({'benchmark': ['fast', 'new'], 'seconds': [1.0, 2.0], 'peak_memory_mb': [10.0, 20.0]})
+        # No baseline for the scale, e.g. --scale 100k with a 10k baseline only
+        comparison = compare(results, {})
+        self.assertEqual(comparison['status'].tolist(), ['no baseline', 'no baseline'])
+        self.assertFalse(comparison['regression'].any())
+        comparison = compare(results, {'fast': {'seconds': 1.0, 'peak_memory_mb': 10.0}})
+        self.assertEqual(comparison['status'].tolist(), ['ok', 'no baseline'])
+
+
+if __name__ == '__main__':
+    unittest.main()
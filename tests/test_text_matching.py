@@ -0,0 +1,50 @@
+import unittest
+
+import pandas as pd
+
+from scripts.text_matching import MultiPatternMatcher
+
+
+class test_MultiPatternMatcher(unittest.TestCase):
+    texts = [
+        'Protests in Nigeria and Niger as the US responds.',
+        'nigeria signs trade deal',
+        'A business update from Russia and Ukraine',
+        'Read more on allafrica.com today',
+        'ALLAFRICA.COM is uppercase',
+        None,
+        '',
+    ]
+
+    def test_substring_counts_match_separate_searches(self):
+        groups = {'Niger': ['Niger'], 'Nigeria': ['Nigeria'], 'US': ['US'], 'Russia': ['Russia']}
+        counts = MultiPatternMatcher(groups).count_documents(self.texts)
+        content = pd.Series(self.texts)
+        for label, terms in groups.items():
+            expected = content.str.contains(terms[0], case=False, na=False, regex=False).sum()
+            self.assertEqual(counts[label], expected, label)
+
+    def test_word_boundary(self):
+        matcher = MultiPatternMatcher({'Niger': ['Niger'], 'US': ['US']}, word_boundary=True)
+        self.assertEqual(matcher.match_labels(self.texts[0]), {'Niger', 'US'})
+        self.assertEqual(matcher.match_labels(self.texts[1]), set())
+        self.assertEqual(matcher.match_labels(self.texts[2]), set())
+
+    def test_case_sensitive_groups(self):
+        groups = {'Africa': ['allafrica.com'], 'Russia': ['russia']}
+        counts = MultiPatternMatcher(groups, case_sensitive=['Africa']).count_documents(self.texts)
+        self.assertEqual(counts['Africa'], 1)
+        self.assertEqual(counts['Russia'], 1)
+
+    def test_parallel_matches_serial(self):
+        groups = {'Niger': ['Niger'], 'Region': ['Russia', 'Ukraine', 'US']}
+        matcher = MultiPatternMatcher(groups)
+        texts = self.texts * 50
+        pd.testing.assert_series_equal(
+            matcher.count_documents(texts, n_jobs=2, chunk_size=40),
+            matcher.count_documents(texts),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from scripts import topic_and_event_modeling as modeling
+from scripts.article_frame import article_text
+
+
+class test_TopNSparse(unittest.TestCase):
+    def test_matches_dense_argsort(self):
+        matrix = sp.random(200, 500, density=0.02, format='csr', random_state=0)
+        for max_cells in [50, 2**24]:
+            top_ids = modeling.top_n_sparse(matrix, n=5, max_cells=max_cells)
+            for i in range(matrix.shape[0]):
+                row = matrix[i].toarray().ravel()
+                expected = np.sort(row[row > 0])[::-1][:5]
+                ids = top_ids[i][top_ids[i] >= 0]
+                np.testing.assert_allclose(row[ids], expected)
+
+    def test_empty_rows_are_padded(self):
+        matrix = sp.csr_matrix(np.array([[0, 0, 0], [0, 2.0, 1.0]]))
+        top_ids = modeling.top_n_sparse(matrix, n=3)
+        np.testing.assert_array_equal(top_ids, [[-1, -1, -1], [1, 2, -1]])
+
+    def test_extract_keywords(self):
+        texts = ['election results economy', 'football match results', 'economy markets rally']
+        keyword_ids, feature_names = modeling.extract_keyword_ids_tfidf(texts, n=2)
+        self.assertEqual(keyword_ids.shape, (3, 2))
+        keywords = modeling.extract_keywords_tfidf(texts, n=2)
+        self.assertEqual(keywords, modeling.keywords_from_ids(keyword_ids, feature_names))
+        self.assertTrue(set(keywords[1]) <= {'football', 'match'})
+
+
+class test_KeywordSimilarity(unittest.TestCase):
+    def test_matches_calculate_similarity(self):
+        vocabulary_a = np.array(['bank', 'economy', 'election', 'vote'])
+        vocabulary_b = np.array(['economy', 'growth', 'vote'])
+        ids_a = np.array([[1, 2, -1], [0, -1, -1], [-1, -1, -1], [3, 1, 0]])
+        ids_b = np.array([[0, 2, -1], [1, -1, -1], [-1, -1, -1], [2, 0, -1]])
+        similarities = modeling.keyword_similarity_batch(ids_a, vocabulary_a, ids_b, vocabulary_b)
+        for i in [0, 1, 3]:
+            expected = modeling.calculate_similarity(
+                vocabulary_a[ids_a[i][ids_a[i] >= 0]].tolist(), vocabulary_b[ids_b[i][ids_b[i] >= 0]].tolist())
+            self.assertAlmostEqual(similarities[i], expected)
+        self.assertTrue(np.isnan(similarities[2]))
+
+
+class test_OnlineTopicModeling(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        vocabulary = ['election', 'vote', 'party', 'football', 'goal', 'league', 'storm', 'rain', 'flood']
+        self.df = pd.DataFrame({
+            'title': [' '.join(rng.choice(vocabulary, 3)) for _ in range(60)],
+            'full_content': [' '.join(rng.choice(vocabulary, 20)) for _ in range(60)],
+        })
+
+    def test_assignments_from_trained_model(self):
+        for learning_method in ['batch', 'online']:
+            lda, topics, vectorizer, assignments = modeling.perform_topic_modeling_by_lda(
+                self.df, n_topics=3, learning_method=learning_method, batch_size=1, n_jobs=1, return_assignments=True)
+            self.assertEqual(len(topics), 3)
+            # Every document is assigned by the final model, whichever chunk it was trained in
+            np.testing.assert_array_equal(assignments, lda.transform(vectorizer.transform(article_text(self.df))).argmax(axis=1))
+
+    def test_fit_rows_skip_documents_but_assign_all(self):
+        df = pd.concat([self.df, self.df.iloc[:20]], ignore_index=True)
+        lda, _, vectorizer, assignments = modeling.perform_topic_modeling_by_lda(
+            df, n_topics=3, n_jobs=1, return_assignments=True, fit_rows=np.arange(60))
+        self.assertEqual(len(assignments), 80)
+        np.testing.assert_array_equal(assignments[60:], lda.transform(vectorizer.transform(article_text(df.iloc[60:]))).argmax(axis=1))
+
+    def test_online_checkpoint_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = os.path.join(tmp, 'lda.pkl')
+            lda, _, vectorizer, assignments = modeling.perform_topic_modeling_by_lda(
+                self.df.iloc[:40].copy(), n_topics=3, learning_method='online', batch_size=10, n_jobs=1,
+                checkpoint=checkpoint, return_assignments=True)
+            self.assertEqual(len(assignments), 40)
+            resumed, _, resumed_vectorizer, new_assignments = modeling.perform_topic_modeling_by_lda(
+                self.df.iloc[40:].copy(), n_topics=3, learning_method='online', batch_size=10, n_jobs=1,
+                checkpoint=checkpoint, return_assignments=True)
+        self.assertEqual(len(new_assignments), 20)
+        self.assertEqual(resumed.n_batch_iter_, lda.n_batch_iter_ + 2)
+        self.assertEqual(resumed_vectorizer.vocabulary_, vectorizer.vocabulary_)
+
+
+if __name__ == '__main__':
+    unittest.main()